@@ -16,9 +16,11 @@ from .exceptions import (
     DeleteError,
     NoneReferenceError,
     NotCreatedError,
+    NotLoadedFieldError,
     UMongoError,
     UnknownFieldInDBError,
     UpdateError,
+    VersionConflictError,
 )
 from .expose_missing import ExposeMissing, RemoveMissingSchema
 from .i18n import set_gettext
@@ -35,12 +37,14 @@ __all__ = (
     "MixinDocument",
     "NoneReferenceError",
     "NotCreatedError",
+    "NotLoadedFieldError",
     "Reference",
     "RemoveMissingSchema",
     "UMongoError",
     "UnknownFieldInDBError",
     "UpdateError",
     "ValidationError",
+    "VersionConflictError",
     "fields",
     "missing",
     "post_dump",
@@ -228,6 +228,33 @@ class BaseValidator(ma.validate.Validator):
 class BaseDataObject:
     """All data objects in umongo should inherit from this base data object."""
 
+    # ``(container, key)`` holding this data object, the container (data proxy
+    # or data object) is notified through ``_child_modified`` each time this
+    # data object is modified
+    _parent = None
+
+    def _set_parent(self, parent, key):
+        self._parent = (parent, key)
+
+    def _get_parent(self):
+        return self._parent
+
+    def _notify_modified(self):
+        if self._parent is not None:
+            parent, key = self._parent
+            parent._child_modified(key)
+
+    def _child_modified(self, key):
+        pass
+
+    def _partial_update(self):
+        """Return the MongoDB update operators applying the modifications of
+        this data object, with paths relative to it (``None`` being the data
+        object itself). ``None`` means the data object has to be rewritten
+        as a whole.
+        """
+        return
+
     def is_modified(self):
         raise NotImplementedError
 
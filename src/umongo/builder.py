@@ -35,6 +35,14 @@ TEMPLATE_OPTIONS_MAPPING = {
     MixinDocumentTemplate: MixinDocumentOpts,
 }
 
+# Meta attributes passed to the collection's `with_options`
+COLLECTION_OPTIONS = (
+    "write_concern",
+    "read_concern",
+    "read_preference",
+    "codec_options",
+)
+
 
 def _get_base_template_cls(template):
     if issubclass(template, DocumentTemplate):
@@ -125,6 +133,8 @@ class BaseBuilder:
     """
 
     BASE_DOCUMENT_CLS = None
+    # Collection options supported by the driver's `with_options`
+    COLLECTION_OPTIONS = COLLECTION_OPTIONS
 
     def __init__(self, instance):
         assert self.BASE_DOCUMENT_CLS
@@ -187,7 +197,20 @@ class BaseBuilder:
             kwargs["is_child"] = is_child
             kwargs["strict"] = getattr(meta, "strict", True)
             if base_tmpl_cls is DocumentTemplate:
+                kwargs["lazy"] = getattr(meta, "lazy", False)
                 collection_name = getattr(meta, "collection_name", None)
+                version_field = getattr(meta, "version_field", None)
+                collection_options = {
+                    name: getattr(meta, name)
+                    for name in COLLECTION_OPTIONS
+                    if getattr(meta, name, None) is not None
+                }
+                unsupported = collection_options.keys() - set(self.COLLECTION_OPTIONS)
+                if unsupported:
+                    raise DocumentDefinitionError(
+                        f"Collection options {sorted(unsupported)} are not "
+                        "supported by this framework",
+                    )
 
             # Handle option inheritance and integrity checks
             for base in bases:
@@ -206,6 +229,12 @@ class BaseBuilder:
                                 "use abstract instead",
                             )
                         collection_name = popts.collection_name
+                    # Documents sharing a collection share the versioning
+                    version_field = version_field or popts.version_field
+                    collection_options = {
+                        **popts.collection_options,
+                        **collection_options,
+                    }
 
         if base_tmpl_cls is DocumentTemplate:
             if collection_name:
@@ -217,6 +246,8 @@ class BaseBuilder:
                 # Determine the collection name from the class name
                 collection_name = camel_to_snake(template.__name__)
             kwargs["collection_name"] = collection_name
+            kwargs["version_field"] = version_field
+            kwargs["collection_options"] = collection_options
 
         return base_opts_cls(**kwargs)
 
@@ -262,8 +293,18 @@ class BaseBuilder:
         nmspc["Schema"] = schema_cls
         schema = schema_cls()
         nmspc["schema"] = schema
+        if base_tmpl_cls is DocumentTemplate and opts.version_field is not None:
+            if not isinstance(schema.fields.get(opts.version_field), fields.IntField):
+                raise DocumentDefinitionError(
+                    f"Version field `{opts.version_field}` must be an IntField",
+                )
         if base_tmpl_cls is not MixinDocumentTemplate:
-            nmspc["DataProxy"] = data_proxy_factory(name, schema, strict=opts.strict)
+            nmspc["DataProxy"] = data_proxy_factory(
+                name,
+                schema,
+                strict=opts.strict,
+                compiled_dump=self.instance.compiled_dump,
+            )
             # Add field names set as class attribute
             nmspc["_fields"] = set(schema.fields.keys())
 
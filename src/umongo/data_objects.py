@@ -1,4 +1,7 @@
+from copy import deepcopy
+
 from bson import DBRef
+from bson.raw_bson import RawBSONDocument
 
 from .abstract import BaseDataObject, I18nErrorDict
 from .i18n import N_
@@ -6,150 +9,415 @@ from .i18n import N_
 __all__ = ("Dict", "List", "Reference")
 
 
+def _set_parent(obj, parent, key):
+    """Attach ``obj`` to the container ``parent`` and return it. A data object
+    already held by another container is copied instead, a data object only
+    notifying a single container of its modifications."""
+    if isinstance(obj, BaseDataObject):
+        current = obj._get_parent()
+        if current is not None and (current[0] is not parent or current[1] != key):
+            obj = deepcopy(obj)
+        obj._set_parent(parent, key)
+    return obj
+
+
+def unshare(obj):
+    """Give their own copy of the data object containing ``obj`` to the
+    documents sharing it (see :meth:`umongo.data_proxy.BaseDataProxy._share_with`),
+    ``obj`` being about to be modified.
+    """
+    key = None
+    while obj._parent is not None:
+        obj, key = obj._parent
+    if key is not None and getattr(obj, "_clones", None):
+        obj._unshare(key)
+
+
+def decode_raw_bson(value):
+    """Decode the :class:`bson.raw_bson.RawBSONDocument` nested in a value
+    retrieved from mongo into dicts, which unlike raw documents are mutable."""
+    if isinstance(value, RawBSONDocument):
+        return {key: decode_raw_bson(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_raw_bson(item) for item in value]
+    return value
+
+
+def copy_output(value):
+    """Copy the dicts and lists of a cached ``to_mongo`` or ``dump`` output,
+    so the caller can modify it without altering the cache. Raw documents
+    of the fields not loaded yet are decoded."""
+    if isinstance(value, (dict, RawBSONDocument)):
+        return {key: copy_output(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_output(item) for item in value]
+    return value
+
+
+def merge_update(mongo_data, path, update):
+    """Merge into ``mongo_data`` the update operators of a data object stored
+    at ``path`` (see :meth:`umongo.abstract.BaseDataObject._partial_update`).
+    """
+    for operator, paths in update.items():
+        operator_data = mongo_data.setdefault(operator, {})
+        for sub_path, value in paths.items():
+            operator_data[path if sub_path is None else f"{path}.{sub_path}"] = value
+
+
 class List(BaseDataObject, list):
-    __slots__ = ("_modified", "inner_field")
+    __slots__ = (
+        "_children_modified",
+        "_modified",
+        "_operations",
+        "_parent",
+        "inner_field",
+    )
 
     def __init__(self, inner_field, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._modified = False
+        # Set when an element notified a modification
+        self._children_modified = False
+        # Operations applied since the last `clear_modified`, used to update
+        # the list with `$push`, `$pop` or `$pull` (see `_partial_update`)
+        self._operations = []
+        self._parent = None
         self.inner_field = inner_field
+        if self and isinstance(self[0], BaseDataObject):
+            for index, obj in enumerate(self):
+                attached = _set_parent(obj, self, None)
+                if attached is not obj:
+                    list.__setitem__(self, index, attached)
+                if attached.is_modified():
+                    self._children_modified = True
 
     def __setitem__(self, key, obj):
+        unshare(self)
         obj = self.inner_field.deserialize(obj)
+        if isinstance(key, slice):
+            obj = [_set_parent(each, self, None) for each in obj]
+        else:
+            obj = _set_parent(obj, self, None)
         super().__setitem__(key, obj)
         self.set_modified()
 
     def __delitem__(self, key):
+        unshare(self)
         super().__delitem__(key)
         self.set_modified()
 
     def append(self, obj):
-        obj = self.inner_field.deserialize(obj)
+        unshare(self)
+        obj = _set_parent(self.inner_field.deserialize(obj), self, None)
         ret = super().append(obj)
-        self.set_modified()
+        self._add_operation("push", [obj])
         return ret
 
     def insert(self, i, obj):
-        obj = self.inner_field.deserialize(obj)
+        unshare(self)
+        obj = _set_parent(self.inner_field.deserialize(obj), self, None)
+        # Resolve the position the same way `list.insert` does
+        position = min(max(i + len(self), 0) if i < 0 else i, len(self))
         ret = super().insert(i, obj)
-        self.set_modified()
+        self._add_operation("insert", (position, obj))
         return ret
 
-    def pop(self, *args, **kwargs):
-        ret = super().pop(*args, **kwargs)
-        self.set_modified()
+    def pop(self, index=-1):
+        unshare(self)
+        position = index + len(self) if index < 0 else index
+        ret = super().pop(index)
+        if position == len(self):
+            self._add_operation("pop", 1)
+        elif position == 0:
+            self._add_operation("pop", -1)
+        else:
+            self.set_modified()
         return ret
 
     def clear(self, *args, **kwargs):
+        unshare(self)
         ret = super().clear(*args, **kwargs)
         self.set_modified()
         return ret
 
-    def remove(self, *args, **kwargs):
-        ret = super().remove(*args, **kwargs)
-        self.set_modified()
-        return ret
+    def remove(self, obj):
+        unshare(self)
+        index = self.index(obj)
+        obj = self[index]
+        super().__delitem__(index)
+        # `$pull` matches embedded documents on their whole content, which
+        # may differ in database (e.g. unknown fields), rewrite the list instead
+        if isinstance(obj, BaseDataObject):
+            self.set_modified()
+        else:
+            self._add_operation("pull", obj)
 
     def reverse(self, *args, **kwargs):
+        unshare(self)
         ret = super().reverse(*args, **kwargs)
         self.set_modified()
         return ret
 
     def sort(self, *args, **kwargs):
+        unshare(self)
         ret = super().sort(*args, **kwargs)
         self.set_modified()
         return ret
 
     def extend(self, iterable):
-        iterable = [self.inner_field.deserialize(obj) for obj in iterable]
+        unshare(self)
+        iterable = [
+            _set_parent(self.inner_field.deserialize(obj), self, None)
+            for obj in iterable
+        ]
         ret = super().extend(iterable)
-        self.set_modified()
+        self._add_operation("push", iterable)
         return ret
 
     def __repr__(self):
         return f"<object {self.__module__}.{self.__class__.__name__}({list(self)})>"
 
+    def __deepcopy__(self, memo):
+        new = self.__class__(self.inner_field, [deepcopy(obj, memo) for obj in self])
+        new._modified = self.is_modified()
+        return new
+
     def is_modified(self):
-        if self._modified:
+        if self._modified or self._operations:
             return True
-        if self and isinstance(self[0], BaseDataObject):
-            return any(obj.is_modified() for obj in self)
+        # Elements are only checked if one of them notified a modification
+        if self._children_modified:
+            if any(obj.is_modified() for obj in self):
+                return True
+            self._children_modified = False
         return False
 
     def set_modified(self):
+        # The list will be rewritten as a whole, no need to keep operations
         self._modified = True
+        self._operations.clear()
+        self._notify_modified()
+
+    def _add_operation(self, operation, value):
+        if not self._modified:
+            self._operations.append((operation, value))
+        self._notify_modified()
+
+    def _child_modified(self, key):
+        self._children_modified = True
+        self._notify_modified()
+
+    def _partial_update(self):  # noqa: PLR0911 (one return per update kind)
+        if self._modified or (
+            self._children_modified and any(obj.is_modified() for obj in self)
+        ):
+            return None
+        # MongoDB doesn't allow multiple operators on the same field, hence
+        # only operations of a single kind can be turned into an update
+        operations = {operation for operation, _ in self._operations}
+        if len(operations) != 1:
+            return None
+        operation = operations.pop()
+        serialize = self.inner_field.serialize_to_mongo
+        if operation == "push":
+            return {
+                "$push": {
+                    None: {
+                        "$each": [
+                            serialize(obj)
+                            for _, objs in self._operations
+                            for obj in objs
+                        ],
+                    },
+                },
+            }
+        if operation == "pull":
+            removed = [obj for _, obj in self._operations]
+            # `$pull` removes all the matching elements
+            if any(obj in self for obj in removed):
+                return None
+            return {"$pull": {None: {"$in": [serialize(obj) for obj in removed]}}}
+        # Positional `$push` and `$pop` can only be applied once per update
+        if len(self._operations) != 1:
+            return None
+        _, value = self._operations[0]
+        if operation == "insert":
+            position, obj = value
+            return {"$push": {None: {"$each": [serialize(obj)], "$position": position}}}
+        return {"$pop": {None: value}}
 
     def clear_modified(self):
         self._modified = False
+        self._children_modified = False
+        self._operations.clear()
         if self and isinstance(self[0], BaseDataObject):
             for obj in self:
                 obj.clear_modified()
 
 
 class Dict(BaseDataObject, dict):
-    __slots__ = ("_modified", "key_field", "value_field")
+    __slots__ = (
+        "_modified",
+        "_modified_children",
+        "_modified_keys",
+        "_parent",
+        "key_field",
+        "value_field",
+    )
 
     def __init__(self, key_field, value_field, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._modified = False
+        # Keys set or deleted since the last `clear_modified`, used to update
+        # them with `$set` and `$unset` (see `_partial_update`)
+        self._modified_keys = set()
+        # Keys of the values that notified a modification
+        self._modified_children = set()
+        self._parent = None
         self.key_field = key_field
         self.value_field = value_field
+        for key, obj in self.items():
+            if isinstance(obj, BaseDataObject):
+                attached = _set_parent(obj, self, key)
+                if attached is not obj:
+                    dict.__setitem__(self, key, attached)
+                if attached.is_modified():
+                    self._modified_children.add(key)
 
     def __setitem__(self, key, obj):
+        unshare(self)
         key = self.key_field.deserialize(key) if self.key_field else key
         obj = self.value_field.deserialize(obj) if self.value_field else obj
+        obj = _set_parent(obj, self, key)
         super().__setitem__(key, obj)
-        self.set_modified()
+        self._set_key_modified(key)
 
     def __delitem__(self, key):
+        unshare(self)
         super().__delitem__(key)
-        self.set_modified()
-
-    def pop(self, *args, **kwargs):
-        ret = super().pop(*args, **kwargs)
-        self.set_modified()
-        return ret
-
-    def popitem(self, *args, **kwargs):
-        ret = super().popitem(*args, **kwargs)
-        self.set_modified()
+        self._set_key_modified(key)
+
+    def pop(self, key, *args):
+        unshare(self)
+        if key in self:
+            self._set_key_modified(key)
+        return super().pop(key, *args)
+
+    def popitem(self):
+        unshare(self)
+        ret = super().popitem()
+        self._set_key_modified(ret[0])
         return ret
 
     def setdefault(self, key, obj=None):
+        unshare(self)
         key = self.key_field.deserialize(key) if self.key_field else key
         obj = self.value_field.deserialize(obj) if self.value_field else obj
-        ret = super().setdefault(key, obj)
-        self.set_modified()
+        ret = super().setdefault(key, _set_parent(obj, self, key))
+        self._set_key_modified(key)
         return ret
 
     def update(self, other):
+        unshare(self)
         new = {
             self.key_field.deserialize(k)
             if self.key_field
             else k: self.value_field.deserialize(v) if self.value_field else v
             for k, v in other.items()
         }
+        for key, obj in new.items():
+            new[key] = _set_parent(obj, self, key)
         super().update(new)
-        self.set_modified()
+        if not self._modified:
+            self._modified_keys.update(new)
+        self._notify_modified()
 
     def __repr__(self):
         return f"<object {self.__module__}.{self.__class__.__name__}({dict(self)})>"
 
+    def __deepcopy__(self, memo):
+        new = self.__class__(
+            self.key_field,
+            self.value_field,
+            {key: deepcopy(obj, memo) for key, obj in self.items()},
+        )
+        new._modified = self.is_modified()
+        return new
+
     def is_modified(self):
-        if self._modified:
+        if self._modified or self._modified_keys:
             return True
-        if self and any(isinstance(v, BaseDataObject) for v in self.values()):
-            return any(obj.is_modified() for obj in self.values())
+        # Values are only checked if they notified a modification
+        for key in self._modified_children:
+            obj = self.get(key)
+            if isinstance(obj, BaseDataObject) and obj.is_modified():
+                return True
         return False
 
     def set_modified(self):
+        # The dict will be rewritten as a whole, no need to keep modified keys
         self._modified = True
+        self._modified_keys.clear()
+        self._notify_modified()
+
+    def _set_key_modified(self, key):
+        if not self._modified:
+            self._modified_keys.add(key)
+        self._notify_modified()
+
+    def _child_modified(self, key):
+        self._modified_children.add(key)
+        self._notify_modified()
+
+    def _get_key_path(self, key):
+        path = self.key_field.serialize_to_mongo(key) if self.key_field else key
+        # Such keys cannot be used in a dotted path
+        if not isinstance(path, str) or not path or "." in path or path[0] == "$":
+            return None
+        return path
+
+    def _partial_update(self):
+        if self._modified:
+            return None
+        mongo_data = {}
+        for key in self._modified_keys:
+            path = self._get_key_path(key)
+            if path is None:
+                return None
+            if key not in self:
+                mongo_data.setdefault("$unset", {})[path] = ""
+                continue
+            obj = self[key]
+            if self.value_field:
+                obj = self.value_field.serialize_to_mongo(obj)
+            mongo_data.setdefault("$set", {})[path] = obj
+        for key in self._modified_children - self._modified_keys:
+            obj = self.get(key)
+            if not isinstance(obj, BaseDataObject) or not obj.is_modified():
+                continue
+            path = self._get_key_path(key)
+            if path is None:
+                return None
+            update = obj._partial_update()
+            if update is None:
+                obj = self.value_field.serialize_to_mongo(obj)
+                mongo_data.setdefault("$set", {})[path] = obj
+            else:
+                merge_update(mongo_data, path, update)
+        return mongo_data
 
     def clear_modified(self):
-        self._modified = False
-        if self and any(isinstance(v, BaseDataObject) for v in self.values()):
-            for obj in self.values():
+        if self._modified:
+            keys = list(self)
+        else:
+            keys = self._modified_keys | self._modified_children
+        for key in keys:
+            obj = self.get(key)
+            if isinstance(obj, BaseDataObject):
                 obj.clear_modified()
+        self._modified = False
+        self._modified_keys.clear()
+        self._modified_children.clear()
 
 
 class Reference:
@@ -1,32 +1,177 @@
 """umongo BaseDataProxy"""
 
+from collections.abc import MutableMapping
+from copy import deepcopy
+from weakref import ref
+
 import marshmallow as ma
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
 
-from .abstract import BaseDataObject
-from .exceptions import UnknownFieldInDBError
+from .abstract import BaseDataObject, BaseField
+from .data_objects import _set_parent, copy_output, merge_update, unshare
+from .exceptions import NotLoadedFieldError, UnknownFieldInDBError
+from .expose_missing import ExposeMissing
 from .i18n import gettext as _
+from .marshmallow_bonus import ObjectId
 
 __all__ = [
     "data_proxy_factory",
 ]
 
 
+class BaseDataStorage(MutableMapping):
+    """Values of a data proxy, in mongo world representation
+
+    Generated for each data proxy by :func:`data_storage_factory` with one
+    slot per field, which takes far less memory than a dict. It behaves as a
+    dict keyed by the fields' mongo names, fields whose slot is not set being
+    absent.
+    """
+
+    __slots__ = ()
+    # Mongo name -> slot descriptor
+    _slots = {}
+
+    def __init__(self, data=None):
+        if data:
+            self.update(data)
+
+    def __getitem__(self, key):
+        try:
+            return self._slots[key].__get__(self)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        self._slots[key].__set__(self, value)
+
+    def __delitem__(self, key):
+        try:
+            self._slots[key].__delete__(self)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        try:
+            self._slots[key].__get__(self)
+        except (KeyError, AttributeError):
+            return False
+        return True
+
+    def __iter__(self):
+        return (key for key, _ in self.items())
+
+    def __len__(self):
+        return sum(1 for _ in self.items())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def get(self, key, default=None):
+        try:
+            return self._slots[key].__get__(self)
+        except (KeyError, AttributeError):
+            return default
+
+    def items(self):
+        for key, slot in self._slots.items():
+            try:
+                value = slot.__get__(self)
+            except AttributeError:
+                continue
+            yield key, value
+
+    def values(self):
+        return (value for _, value in self.items())
+
+    def copy(self):
+        storage = self.__class__()
+        for slot in self._slots.values():
+            try:
+                slot.__set__(storage, slot.__get__(self))
+            except AttributeError:
+                continue
+        return storage
+
+
 class BaseDataProxy:
-    __slots__ = ("_data", "_modified_data")
+    __slots__ = (
+        "__weakref__",
+        "_atomic_updates",
+        "_clones",
+        "_data",
+        "_dump_cache",
+        "_modified_children",
+        "_modified_data",
+        "_mongo_cache",
+        "_not_loaded",
+        "_parent",
+        "_raw_data",
+        "_shared",
+    )
     schema = None
     _fields = None
     _fields_from_mongo_key = None
+    # Generated `BaseDataStorage` subclass holding the data
+    _storage_cls = None
+    # Mongo name -> bit of the field in the modification bitmasks
+    _key_bits = None
+    # Generated dump function, `schema.dump` is used when not set
+    _compiled_dump = None
 
     def __init__(self, data=None):
-        # Inside data proxy, data are stored in mongo world representation
-        self._modified_data = set()
-        self._data = {}
+        self._init_storage()
         self.load(data or {})
 
+    def _init_storage(self):
+        # Bitmask of the modified keys (see `_key_bits`)
+        self._modified_data = 0
+        # Bitmask of the keys of the data objects that notified a modification
+        self._modified_children = 0
+        # Inside data proxy, data are stored in mongo world representation
+        self._data = self._storage_cls()
+        # Output of `to_mongo` and `dump`, reset on modification
+        self._mongo_cache = None
+        self._dump_cache = None
+        # Values loaded lazily from mongo are kept here in mongo world
+        # representation until they are needed (see `_load_lazy_field`)
+        self._raw_data = None
+        # Keys excluded by the projection used to retrieve the data from
+        # mongo, they are neither readable nor committed until set
+        self._not_loaded = None
+        # ``(container, key)`` holding the embedded document, notified on
+        # modification (see `BaseDataObject._set_parent`)
+        self._parent = None
+        # Copy-on-write bookkeeping (see `_share_with`): data proxies sharing
+        # our data objects by key, and data proxies sharing theirs with us
+        self._clones = None
+        self._shared = None
+        # Update operators queued by `inc`, `push`, `add_to_set` and `pull`
+        # by key, as ``(operator, value)``
+        self._atomic_updates = None
+
+    @classmethod
+    def _build_empty(cls):
+        """Create a data proxy holding no data at all.
+
+        Unlike ``cls()``, this doesn't go through marshmallow load and
+        doesn't set default values. It should be followed by ``from_mongo``.
+        """
+        data_proxy = cls.__new__(cls)
+        data_proxy._init_storage()
+        return data_proxy
+
     def to_mongo(self, update=False):
         if update:
             return self._to_mongo_update()
-        return self._to_mongo()
+        return copy_output(self._to_mongo_cached())
+
+    def _to_mongo_cached(self):
+        # Embedded documents' cached output is reused in the output of their
+        # parent, which is only rebuilt when they notify a modification
+        if self._mongo_cache is None:
+            self._mongo_cache = self._to_mongo()
+        return self._mongo_cache
 
     def _to_mongo(self):
         mongo_data = {}
@@ -35,61 +180,217 @@ class BaseDataProxy:
             val = field.serialize_to_mongo(val)
             if val is not ma.missing:
                 mongo_data[key] = val
+        if self._raw_data:
+            # Lazy values are still in mongo world representation
+            mongo_data.update(self._raw_data)
         return mongo_data
 
     def _to_mongo_update(self):
         mongo_data = {}
-        set_data = {}
-        unset_data = []
-        for name in self.get_modified_fields():
-            field = self._fields[name]
-            name = field.attribute or name
-            val = field.serialize_to_mongo(self._data[name])
+        atomic_updates = self._atomic_updates
+        modified_keys = self._get_modified_keys()
+        for key in modified_keys:
+            val = self._data[key]
+            # If the field has not been set but its data object notified
+            # modifications, only the modified parts are updated. Values
+            # also modified by an atomic operator are rewritten.
+            if self._modified_data & self._key_bits[key] or (
+                atomic_updates and key in atomic_updates
+            ):
+                update = None
+            else:
+                update = val._partial_update()
+            if update is not None:
+                merge_update(mongo_data, key, update)
+                continue
+            val = self._fields_from_mongo_key[key].serialize_to_mongo(val)
             if val is ma.missing:
-                unset_data.append(name)
+                mongo_data.setdefault("$unset", {})[key] = ""
             else:
-                set_data[name] = val
+                mongo_data.setdefault("$set", {})[key] = val
+        if atomic_updates:
+            for key, (operator, value) in atomic_updates.items():
+                if key not in modified_keys:
+                    mongo_data.setdefault(operator, {})[key] = value
+        return mongo_data or None
+
+    def _to_mongo_loaded_update(self):
+        """Return an update replacing the loaded fields only, used instead of
+        replacing the document when some fields have not been loaded."""
+        mongo_data = {}
+        set_data = self._to_mongo()
+        set_data.pop("_id", None)
         if set_data:
             mongo_data["$set"] = set_data
+        unset_data = {
+            key: ""
+            for key in self._fields_from_mongo_key
+            if key != "_id" and key not in set_data and key not in self._not_loaded
+        }
         if unset_data:
-            mongo_data["$unset"] = dict.fromkeys(unset_data, "")
-        return mongo_data or None
+            mongo_data["$unset"] = unset_data
+        return mongo_data
+
+    # `from_mongo(data, lazy=False)` is generated for each schema by
+    # `data_proxy_factory`, see `_compile_from_mongo`
+
+    def _from_mongo_unknown_field(self, key, val):
+        raise UnknownFieldInDBError(
+            _('%s: unknown "%s" field found in DB.') % (self.__class__.__name__, key),
+        )
 
-    def from_mongo(self, data):
-        self._data = {}
+    def _from_mongo_unknown_fields(self, data):
         for key, val in data.items():
-            try:
-                field = self._fields_from_mongo_key[key]
-            except KeyError as exc:
-                raise UnknownFieldInDBError(
-                    _('%s: unknown "%s" field found in DB.')
-                    % (self.__class__.__name__, key),
-                ) from exc
-            self._data[key] = field.deserialize_from_mongo(val)
-        self.clear_modified()
-        self._add_missing_fields()
+            if key not in self._fields_from_mongo_key:
+                self._from_mongo_unknown_field(key, val)
+
+    def _load_lazy_field(self, key):
+        value = self._raw_data.pop(key)
+        value = self._fields_from_mongo_key[key].deserialize_from_mongo(value)
+        self._data[key] = self._attach(key, value)
+        return value
+
+    def _load_lazy_fields(self):
+        for key in list(self._raw_data or ()):
+            self._load_lazy_field(key)
+
+    def _set_projection(self, projection):
+        """Mark the fields excluded by ``projection`` as not loaded.
+
+        :param projection: projection used to retrieve the data from mongo,
+            in mongo world representation.
+
+        Fields whose content is only partially retrieved (e.g. dotted paths,
+        ``$slice``) are not loaded either, otherwise committing them would
+        overwrite the part left in database.
+        """
+        inclusion = False
+        included = set()
+        not_loaded = set()
+        for path, value in projection.items():
+            key, dot, _ = path.partition(".")
+            if isinstance(value, dict):
+                # `$elemMatch` only returns the matched elements and, like
+                # inclusions, leaves out the fields not in the projection
+                inclusion = inclusion or "$elemMatch" in value
+                not_loaded.add(key)
+            elif dot:
+                inclusion = inclusion or bool(value)
+                not_loaded.add(key)
+            elif value:
+                inclusion = inclusion or key != "_id"
+                included.add(key)
+            else:
+                not_loaded.add(key)
+        if inclusion:
+            included -= not_loaded
+            if "_id" not in not_loaded:
+                included.add("_id")
+            not_loaded = set(self._fields_from_mongo_key) - included
+        else:
+            not_loaded &= set(self._fields_from_mongo_key)
+        for key in not_loaded:
+            # Drop the default values and partially retrieved data
+            self._data.pop(key, None)
+            if self._raw_data:
+                self._raw_data.pop(key, None)
+        self._not_loaded = not_loaded or None
+        self._mongo_cache = self._dump_cache = None
+
+    def _load_not_loaded(self, data):
+        """Load the fields not loaded so far from data retrieved from mongo"""
+        for key in self._not_loaded:
+            field = self._fields_from_mongo_key[key]
+            if key in data:
+                value = field.deserialize_from_mongo(data[key])
+            elif callable(field.load_default):
+                value = field.load_default()
+            else:
+                value = field.load_default
+            self._data[key] = self._attach(key, value)
+        self._not_loaded = None
+        self._mongo_cache = self._dump_cache = None
+
+    def get_loaded_fields(self):
+        """Return the name of the fields loaded from mongo, or None if the
+        whole document has been loaded."""
+        if not self._not_loaded:
+            return None
+        return {
+            field.name
+            for key, field in self._fields_from_mongo_key.items()
+            if key not in self._not_loaded
+        }
 
     def dump(self):
-        return self.schema.dump(self._data)
+        return copy_output(self._dump_cached())
+
+    def _dump_cached(self):
+        if self._dump_cache is None:
+            self._load_lazy_fields()
+            if self._compiled_dump is None:
+                self._dump_cache = self.schema.dump(self._data)
+            else:
+                self._dump_cache = self._compiled_dump()
+        return self._dump_cache
+
+    def _keys_from_bits(self, bits):
+        return [key for key, bit in self._key_bits.items() if bits & bit]
+
+    def _bits_from_keys(self, keys):
+        bits = 0
+        for key in keys:
+            bits |= self._key_bits[key]
+        return bits
 
     def _mark_as_modified(self, key):
-        self._modified_data.add(key)
+        self._modified_data |= self._key_bits[key]
+        self._mongo_cache = self._dump_cache = None
+        if self._parent is not None:
+            parent, parent_key = self._parent
+            parent._child_modified(parent_key)
+
+    def _child_modified(self, key):
+        self._modified_children |= self._key_bits[key]
+        self._mongo_cache = self._dump_cache = None
+        if self._parent is not None:
+            parent, parent_key = self._parent
+            parent._child_modified(parent_key)
+
+    def _attach(self, key, value):
+        # Data objects notify the data proxy when modified, this way
+        # we don't have to scan the data to find modified fields
+        return _set_parent(value, self, key)
 
     def update(self, data):
         # Always use marshmallow partial load to skip required checks
         loaded_data = self.schema.load(data, partial=True)
-        self._data.update(loaded_data)
         for key in loaded_data:
+            self._prepare_modification(key)
+            if self._not_loaded:
+                self._not_loaded.discard(key)
+        for key, value in loaded_data.items():
+            self._data[key] = self._attach(key, value)
+            if self._raw_data:
+                self._raw_data.pop(key, None)
             self._mark_as_modified(key)
 
     def load(self, data):
         # Always use marshmallow partial load to skip required checks
         loaded_data = self.schema.load(data, partial=True)
-        # Cast to dict to ignore field order in comparisons
-        self._data = dict(loaded_data)
+        if self._clones:
+            self._unshare_all()
+        self._shared = None
+        self._data = self._storage_cls(loaded_data)
+        self._raw_data = None
+        self._not_loaded = None
+        self._atomic_updates = None
+        self._mongo_cache = self._dump_cache = None
         # Map the modified fields list on the the loaded data
-        self.clear_modified()
-        for key in loaded_data:
+        self._modified_data = 0
+        self._modified_children = 0
+        for key, value in loaded_data.items():
+            self._data[key] = self._attach(key, value)
             self._mark_as_modified(key)
         # TODO: mark added missing fields as modified?
         self._add_missing_fields()
@@ -99,9 +400,27 @@ class BaseDataProxy:
         name = field.attribute or name
         return name, field
 
-    def get(self, name):
-        name, _ = self._get_field(name)
-        return self._data[name]
+    def get(self, name, *, shared=False):
+        """Return the value of a field
+
+        :param shared: if True, the returned data object may be shared with
+            another document (see `_share_with`) and must not be modified.
+        """
+        name, field = self._get_field(name)
+        if self._shared and not shared and name in self._shared:
+            return self._copy_shared(name)
+        try:
+            return self._data[name]
+        except KeyError:
+            if self._not_loaded and name in self._not_loaded:
+                if name == "_id":
+                    # The primary key is readable even when left out
+                    return ma.missing
+                raise NotLoadedFieldError(
+                    _('%s: field "%s" has not been loaded from DB.')
+                    % (self.__class__.__name__, field.name),
+                ) from None
+            return self._load_lazy_field(name)
 
     def set(self, name, value):
         name, field = self._get_field(name)
@@ -110,63 +429,190 @@ class BaseDataProxy:
         if value is not None:
             value = field._deserialize(value, name, None)
             field._validate(value)
-        self._data[name] = value
+        self._prepare_modification(name)
+        self._data[name] = self._attach(name, value)
+        if self._raw_data:
+            self._raw_data.pop(name, None)
+        if self._not_loaded:
+            self._not_loaded.discard(name)
         self._mark_as_modified(name)
 
     def delete(self, name):
         name, field = self._get_field(name)
         default = field.dump_default
-        self._data[name] = default() if callable(default) else default
+        self._prepare_modification(name)
+        self._data[name] = self._attach(
+            name, default() if callable(default) else default
+        )
+        if self._raw_data:
+            self._raw_data.pop(name, None)
+        if self._not_loaded:
+            self._not_loaded.discard(name)
         self._mark_as_modified(name)
 
+    def _atomic_field(self, name):
+        """Return the mongo name, field and value of a field about to be
+        modified in place by an atomic operator."""
+        key, field = self._get_field(name)
+        value = self.get(name)
+        self._prepare_modification(key)
+        return key, field, value
+
+    def _atomic_list(self, key, field, value):
+        if value is None or value is ma.missing:
+            value = self._data[key] = self._attach(key, field.deserialize([]))
+        return value
+
+    def _queue_atomic_update(self, key, operator, value):
+        """Queue an update operator, merged with the one already queued on
+        the same key if any."""
+        self._mongo_cache = self._dump_cache = None
+        if self._atomic_updates is None:
+            self._atomic_updates = {}
+        queued = self._atomic_updates.get(key)
+        if queued is None:
+            self._atomic_updates[key] = (operator, value)
+            return
+        queued_operator, queued_value = queued
+        if operator != queued_operator or (
+            operator == "$push" and queued_value.get("$slice") != value.get("$slice")
+        ):
+            # MongoDB doesn't allow multiple operators on the same field and
+            # pushes with different slices cannot be merged, the field is
+            # rewritten instead
+            del self._atomic_updates[key]
+            self._mark_as_modified(key)
+            return
+        if operator == "$inc":
+            merged = queued_value + value
+        else:
+            items_key = "$in" if operator == "$pull" else "$each"
+            merged = {
+                **queued_value,
+                items_key: queued_value[items_key] + value[items_key],
+            }
+        self._atomic_updates[key] = (operator, merged)
+
+    def inc(self, name, value):
+        key, field, current = self._atomic_field(name)
+        value = field.deserialize(value)
+        if current is None or current is ma.missing:
+            self._data[key] = value
+        else:
+            self._data[key] = current + value
+        self._queue_atomic_update(key, "$inc", field.serialize_to_mongo(value))
+
+    def push(self, name, values, slice_length=None):
+        key, field, current = self._atomic_field(name)
+        items = [field.inner.deserialize(value) for value in values]
+        current = self._atomic_list(key, field, current)
+        for item in items:
+            list.append(current, _set_parent(item, current, None))
+        update = {"$each": [field.inner.serialize_to_mongo(item) for item in items]}
+        if slice_length is not None:
+            if slice_length < 0:
+                list.__delitem__(current, slice(max(len(current) + slice_length, 0)))
+            else:
+                list.__delitem__(current, slice(slice_length, None))
+            update["$slice"] = slice_length
+        self._queue_atomic_update(key, "$push", update)
+
+    def add_to_set(self, name, values):
+        key, field, current = self._atomic_field(name)
+        items = [field.inner.deserialize(value) for value in values]
+        current = self._atomic_list(key, field, current)
+        for item in items:
+            if item not in current:
+                list.append(current, _set_parent(item, current, None))
+        update = {"$each": [field.inner.serialize_to_mongo(item) for item in items]}
+        self._queue_atomic_update(key, "$addToSet", update)
+
+    def pull(self, name, values):
+        key, field, current = self._atomic_field(name)
+        items = [field.inner.deserialize(value) for value in values]
+        if current is not None and current is not ma.missing:
+            kept = [item for item in current if item not in items]
+            list.clear(current)
+            list.extend(current, kept)
+        update = {"$in": [field.inner.serialize_to_mongo(item) for item in items]}
+        self._queue_atomic_update(key, "$pull", update)
+
     def __repr__(self):
         # Display data in oo world format
         return f"<{self.__class__.__name__}({dict(self.items())})>"
 
     def __eq__(self, other):
+        self._load_lazy_fields()
         if isinstance(other, dict):
             return self._data == other
+        if isinstance(other, BaseDataProxy):
+            other._load_lazy_fields()
         if hasattr(other, "_data"):
             return self._data == other._data
         return NotImplemented
 
-    def get_modified_fields(self):
-        modified = set()
-        for name, field in self._fields.items():
-            value_name = field.attribute or name
-            value = self._data[value_name]
-            if value_name in self._modified_data or (
-                isinstance(value, BaseDataObject) and value.is_modified()
-            ):
-                modified.add(name)
+    def _get_modified_keys(self):
+        # Modified data objects notify the data proxy (see `_child_modified`),
+        # only them have to be checked (they may have been cleared since)
+        modified = set(self._keys_from_bits(self._modified_data))
+        children = self._modified_children & ~self._modified_data
+        for key in self._keys_from_bits(children) if children else ():
+            val = self._data.get(key)
+            if isinstance(val, BaseDataObject) and val.is_modified():
+                modified.add(key)
         return modified
 
+    def get_modified_fields(self):
+        keys = self._get_modified_keys()
+        if self._atomic_updates:
+            keys.update(self._atomic_updates)
+        return {self._fields_from_mongo_key[key].name for key in keys}
+
     def clear_modified(self):
-        self._modified_data.clear()
-        for val in self._data.values():
+        for key in self._keys_from_bits(self._modified_data | self._modified_children):
+            # Shared data objects hold the modifications of their owner
+            if self._shared and key in self._shared:
+                continue
+            val = self._data.get(key)
             if isinstance(val, BaseDataObject):
                 val.clear_modified()
+        self._modified_data = 0
+        self._modified_children = 0
+        self._atomic_updates = None
 
     def is_modified(self):
-        return bool(self._modified_data) or any(
-            isinstance(v, BaseDataObject) and v.is_modified()
-            for v in self._data.values()
-        )
+        if self._modified_data or self._atomic_updates:
+            return True
+        if not self._modified_children:
+            return False
+        for key in self._keys_from_bits(self._modified_children):
+            val = self._data.get(key)
+            if isinstance(val, BaseDataObject) and val.is_modified():
+                return True
+        return False
 
     def _add_missing_fields(self):
         # TODO: we should be able to do that by configuring marshmallow...
         for name, field in self._fields.items():
             mongo_name = field.attribute or name
-            if mongo_name not in self._data:
+            if mongo_name not in self._data and (
+                not self._raw_data or mongo_name not in self._raw_data
+            ):
                 if callable(field.load_default):
-                    self._data[mongo_name] = field.load_default()
+                    self._data[mongo_name] = self._attach(
+                        mongo_name, field.load_default()
+                    )
                 else:
                     self._data[mongo_name] = field.load_default
 
     def required_validate(self):
         errors = {}
         for name, field in self.schema.fields.items():
-            value = self._data[field.attribute or name]
+            # Lazy values have been loaded from mongo as is and not modified
+            # since, no need to load them only to validate them
+            value = self._data.get(field.attribute or name)
+            if value is None:
+                continue
             if field.required and value is ma.missing:
                 errors[name] = [_("Missing data for required field.")]
             elif value is ma.missing or value is None:
@@ -182,17 +628,100 @@ class BaseDataProxy:
     # Standards iterators providing oo and mongo worlds views
 
     def items(self):
+        self._load_lazy_fields()
+        self._copy_shared_all()
         return (
             (key, self._data[field.attribute or key])
             for key, field in self._fields.items()
+            if not self._not_loaded or (field.attribute or key) not in self._not_loaded
         )
 
     def keys(self):
         return (field.attribute or key for key, field in self._fields.items())
 
     def values(self):
+        self._load_lazy_fields()
+        self._copy_shared_all()
         return self._data.values()
 
+    # Copy-on-write of the data objects shared between documents
+
+    def _share_with(self, data_proxy):
+        """Copy our data into ``data_proxy``, data objects being shared
+        between both until one of them modifies them.
+
+        Shared data objects remain attached to their owner. The data proxy
+        sharing them copies them before giving access to them (see `get`),
+        and the owner gives a copy to the data proxies sharing them before
+        modifying them (see `_unshare`).
+        """
+        self._load_lazy_fields()
+        data_proxy._data = self._data.copy()
+        data_proxy._modified_data = self._bits_from_keys(self._data)
+        if self._not_loaded:
+            data_proxy._not_loaded = set(self._not_loaded)
+        data_proxy._shared = {}
+        for key, value in self._data.items():
+            if not isinstance(value, BaseDataObject):
+                continue
+            owner = self._shared.get(key, self) if self._shared else self
+            data_proxy._shared[key] = owner
+            if owner._clones is None:
+                owner._clones = {}
+            owner._clones.setdefault(key, []).append(ref(data_proxy))
+
+    def _prepare_modification(self, key):
+        # The value of `key` is about to be replaced or modified in place
+        if self._parent is not None:
+            unshare(self)
+            return
+        if self._clones:
+            self._unshare(key)
+        if self._shared:
+            self._shared.pop(key, None)
+
+    def _unshare(self, key):
+        clones = self._clones.pop(key, None)
+        if not clones:
+            return
+        value = self._data.get(key)
+        for clone_ref in clones:
+            clone = clone_ref()
+            if (
+                clone is not None
+                and clone._shared
+                and clone._shared.get(key) is self
+                and clone._data.get(key) is value
+            ):
+                clone._copy_shared(key)
+
+    def _unshare_all(self):
+        for key in list(self._clones):
+            self._unshare(key)
+
+    def _copy_shared(self, key):
+        del self._shared[key]
+        value = deepcopy(self._data[key])
+        # Pending modifications of the data object are the owner's ones
+        value.clear_modified()
+        self._data[key] = self._attach(key, value)
+        return value
+
+    def _copy_shared_all(self):
+        for key in list(self._shared or ()):
+            self._copy_shared(key)
+
+    def __deepcopy__(self, memo):
+        data_proxy = self._build_empty()
+        memo[id(self)] = data_proxy
+        for key, value in self._data.items():
+            data_proxy._data[key] = data_proxy._attach(key, deepcopy(value, memo))
+        data_proxy._raw_data = deepcopy(self._raw_data, memo)
+        data_proxy._not_loaded = deepcopy(self._not_loaded, memo)
+        data_proxy._modified_data = self._bits_from_keys(self._get_modified_keys())
+        data_proxy._atomic_updates = deepcopy(self._atomic_updates, memo)
+        return data_proxy
+
 
 class BaseNonStrictDataProxy(BaseDataProxy):
     """This data proxy will accept unknown data comming from mongo and will
@@ -201,44 +730,266 @@ class BaseNonStrictDataProxy(BaseDataProxy):
 
     __slots__ = ("_additional_data",)
 
-    def __init__(self, data=None):
-        self._additional_data = {}
-        super().__init__(data=data)
+    def _init_storage(self):
+        super()._init_storage()
+        # Only created when unknown data are found
+        self._additional_data = None
 
     def _to_mongo(self):
         mongo_data = super()._to_mongo()
-        mongo_data.update(self._additional_data)
+        if self._additional_data:
+            mongo_data.update(self._additional_data)
         return mongo_data
 
-    def from_mongo(self, data):
-        self._data = {}
-        for key, val in data.items():
-            try:
-                field = self._fields_from_mongo_key[key]
-            except KeyError:
-                self._additional_data[key] = val
-            else:
-                self._data[key] = field.deserialize_from_mongo(val)
-        self.clear_modified()
-        self._add_missing_fields()
+    def _from_mongo_unknown_field(self, key, val):
+        if self._additional_data is None:
+            self._additional_data = {}
+        self._additional_data[key] = val
+
+    def __deepcopy__(self, memo):
+        data_proxy = super().__deepcopy__(memo)
+        data_proxy._additional_data = deepcopy(self._additional_data, memo)
+        return data_proxy
+
+
+def _storage_slot_names(keys):
+    return {key: f"_{idx}" for idx, key in enumerate(keys)}
+
+
+def data_storage_factory(basename, keys):
+    """Generate the `BaseDataStorage` of a data proxy, with one slot per field
+
+    :param keys: mongo names of the fields
+    """
+    slot_names = _storage_slot_names(keys)
+    storage_cls = type(
+        f"{basename}DataStorage",
+        (BaseDataStorage,),
+        {"__slots__": tuple(slot_names.values())},
+    )
+    storage_cls._slots = {
+        key: getattr(storage_cls, name) for key, name in slot_names.items()
+    }
+    return storage_cls
 
 
-def data_proxy_factory(basename, schema, strict=True):
+def _compile_from_mongo(cls_name, fields_from_mongo_key, storage_cls):
+    """Generate a ``from_mongo`` function specialised for the given fields.
+
+    The generated function hydrates the data proxy in a single pass over
+    the schema's fields: fields with no mongo conversion are copied as is,
+    conversions are called directly (bypassing ``deserialize_from_mongo``
+    dispatch) and default values are set for fields absent from the data.
+    In lazy mode, values needing a conversion are kept in ``_raw_data``.
+    Values are stored directly in the slots of a new data storage, which
+    replaces the one of the data proxy once the data is known to be valid.
+    """
+    nmspc = {
+        "_NOT_FOUND": object(),
+        "_missing": ma.missing,
+        "_storage_cls": storage_cls,
+        "BaseDataObject": BaseDataObject,
+    }
+    slot_names = _storage_slot_names(fields_from_mongo_key)
+    lines = [
+        "def from_mongo(self, data, lazy=False):",
+        '    """Load data retrieved from mongo',
+        "",
+        "    :param lazy: if True, deserialization of the values is delayed until",
+        "        they are accessed.",
+        '    """',
+        "    _data = _storage_cls()",
+        "    raw_data = {} if lazy else None",
+        "    found = 0",
+    ]
+    for idx, (key, field) in enumerate(fields_from_mongo_key.items()):
+        key_repr = repr(key)
+        slot = f"_data.{slot_names[key]}"
+        field_cls = type(field)
+        if field_cls.deserialize_from_mongo is not BaseField.deserialize_from_mongo:
+            nmspc[f"convert_{idx}"] = field.deserialize_from_mongo
+            value_expr = f"convert_{idx}(value)"
+        elif field_cls._deserialize_from_mongo is BaseField._deserialize_from_mongo:
+            value_expr = None
+        else:
+            nmspc[f"convert_{idx}"] = field._deserialize_from_mongo
+            if getattr(field, "allow_none", False) is True:
+                value_expr = f"None if value is None else convert_{idx}(value)"
+            else:
+                value_expr = f"convert_{idx}(value)"
+        default = field.load_default
+        if default is ma.missing:
+            default_expr = "_missing"
+        else:
+            nmspc[f"default_{idx}"] = default
+            default_expr = f"default_{idx}()" if callable(default) else f"default_{idx}"
+        lines += [
+            f"    value = data.get({key_repr}, _NOT_FOUND)",
+            "    if value is _NOT_FOUND:",
+        ]
+        if callable(default):
+            lines += [
+                f"        value = {default_expr}",
+                "        if isinstance(value, BaseDataObject):",
+                f"            value._set_parent(self, {key_repr})",
+                f"        {slot} = value",
+            ]
+        else:
+            lines.append(f"        {slot} = {default_expr}")
+        lines += [
+            "    else:",
+            "        found += 1",
+        ]
+        if value_expr is None:
+            lines.append(f"        {slot} = value")
+        else:
+            lines += [
+                "        if lazy:",
+                f"            raw_data[{key_repr}] = value",
+                "        else:",
+                f"            value = {value_expr}",
+                "            if isinstance(value, BaseDataObject):",
+                f"                value._set_parent(self, {key_repr})",
+                f"            {slot} = value",
+            ]
+    # Unknown fields are checked before modifying the data proxy, which is
+    # left untouched if they are not allowed
+    lines += [
+        "    if found != len(data):",
+        "        self._from_mongo_unknown_fields(data)",
+        "    if self._clones:",
+        "        self._unshare_all()",
+        "    self._shared = None",
+        "    self._not_loaded = None",
+        "    self._atomic_updates = None",
+        "    self._mongo_cache = self._dump_cache = None",
+        "    self._data = _data",
+        "    self._raw_data = raw_data",
+        "    self._modified_data = 0",
+        "    self._modified_children = 0",
+    ]
+    source = "\n".join(lines)
+    exec(compile(source, f"<{cls_name} from_mongo>", "exec"), nmspc)
+    return nmspc["from_mongo"]
+
+
+def _compile_dump(cls_name, schema, fields_from_mongo_key):
+    """Generate a ``dump`` function specialised for the given schema.
+
+    The generated function produces the same output as ``schema.dump``
+    without going through marshmallow's generic machinery: values are read
+    directly from the slots of the data storage, missing values are skipped
+    and ``_serialize`` is called directly (or inlined for fields with no
+    conversion). ``pre_dump`` and ``post_dump`` hooks are still honoured.
+    """
+    nmspc = {
+        "_missing": ma.missing,
+        "schema": schema,
+        "PRE_DUMP": PRE_DUMP,
+        "POST_DUMP": POST_DUMP,
+    }
+    slot_names = _storage_slot_names(fields_from_mongo_key)
+    hooks = schema._hooks[PRE_DUMP] or schema._hooks[POST_DUMP]
+    lines = [
+        "def dump(self):",
+        "    data = self._data",
+    ]
+    if schema._hooks[PRE_DUMP]:
+        lines += [
+            "    data = schema._invoke_dump_processors(",
+            "        PRE_DUMP, data, many=False, original_data=data",
+            "    )",
+        ]
+    lines.append("    ret = {}")
+    for idx, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.attribute or name
+        out_repr = repr(field.data_key if field.data_key is not None else name)
+        field_cls = type(field)
+        if not field._CHECK_ATTRIBUTE:
+            nmspc[f"serialize_{idx}"] = field._serialize
+            lines.append(f"    ret[{out_repr}] = serialize_{idx}(None, {name!r}, data)")
+            continue
+        # Pre-dump hooks may return anything, fallback to generic access then
+        if schema._hooks[PRE_DUMP] or key not in slot_names:
+            nmspc[f"get_{idx}"] = schema.get_attribute
+            lines.append(f"    value = get_{idx}(data, {key!r}, _missing)")
+        else:
+            lines += [
+                "    try:",
+                f"        value = data.{slot_names[key]}",
+                "    except AttributeError:",
+                "        value = _missing",
+            ]
+        default = field.dump_default
+        if default is not ma.missing:
+            nmspc[f"default_{idx}"] = default
+            default_expr = f"default_{idx}()" if callable(default) else f"default_{idx}"
+            lines += [
+                "    if value is _missing:",
+                f"        value = {default_expr}",
+            ]
+        lines.append("    if value is not _missing:")
+        if field_cls._serialize is ma.fields.Field._serialize:
+            lines.append(f"        ret[{out_repr}] = value")
+        elif field_cls._serialize is ObjectId._serialize:
+            lines.append(
+                f"        ret[{out_repr}] = None if value is None else str(value)"
+            )
+        else:
+            nmspc[f"serialize_{idx}"] = field._serialize
+            lines.append(
+                f"        ret[{out_repr}] = serialize_{idx}(value, {name!r}, data)"
+            )
+    if schema._hooks[POST_DUMP]:
+        lines += [
+            "    ret = schema._invoke_dump_processors(",
+            "        POST_DUMP, ret, many=False, original_data=self._data",
+            "    )",
+        ]
+    lines.append("    return ret")
+    source = "\n".join(lines)
+    exec(compile(source, f"<{cls_name} dump>", "exec"), nmspc)
+    dump = nmspc["dump"]
+    if not hooks:
+        return dump
+
+    # Hooks may access the document, let them see missing values as
+    # `schema.dump` does
+    def dump_exposing_missing(self):
+        with ExposeMissing():
+            return dump(self)
+
+    return dump_exposing_missing
+
+
+def data_proxy_factory(basename, schema, strict=True, compiled_dump=False):
     """Generate a DataProxy from the given schema.
 
     This way all generic informations (like schema and fields lookups)
     are kept inside the  DataProxy class and it instances are just flyweights.
+
+    :param compiled_dump: Use a dump function generated for the schema
+        rather than the generic ``schema.dump``.
     """
     cls_name = f"{basename}DataProxy"
+    fields_from_mongo_key = {v.attribute or k: v for k, v in schema.fields.items()}
+    storage_cls = data_storage_factory(basename, fields_from_mongo_key)
 
     nmspc = {
         "__slots__": (),
         "schema": schema,
         "_fields": schema.fields,
-        "_fields_from_mongo_key": {
-            v.attribute or k: v for k, v in schema.fields.items()
-        },
+        "_fields_from_mongo_key": fields_from_mongo_key,
+        "_storage_cls": storage_cls,
+        "_key_bits": {key: 1 << idx for idx, key in enumerate(fields_from_mongo_key)},
+        "from_mongo": _compile_from_mongo(cls_name, fields_from_mongo_key, storage_cls),
     }
+    if compiled_dump:
+        nmspc["_compiled_dump"] = _compile_dump(
+            cls_name,
+            schema,
+            fields_from_mongo_key,
+        )
 
     data_proxy_cls = type(
         cls_name,
@@ -1,7 +1,5 @@
 """umongo Document"""
 
-from copy import deepcopy
-
 import marshmallow as ma
 from marshmallow import (
     post_dump,
@@ -20,6 +18,8 @@ from .exceptions import (
     AlreadyCreatedError,
     NoDBDefinedError,
     NotCreatedError,
+    UpdateError,
+    VersionConflictError,
 )
 from .indexes import parse_index
 from .template import MetaImplementation, Template
@@ -85,7 +85,17 @@ class DocumentOpts:
                                                 document
     strict               yes                    Don't accept unknown fields from mongo
                                                 (default: True)
+    lazy                 yes                    Deserialize data loaded from mongo
+                                                on field access (default: False)
     indexes              yes                    List of custom indexes
+    version_field        yes                    Name of the integer field used
+                                                to detect concurrent updates
+                                                (default: None)
+    collection_options   yes                    Options of the collection, set
+                                                with the ``write_concern``,
+                                                ``read_concern``,
+                                                ``read_preference`` and
+                                                ``codec_options`` Meta attributes
     offspring            no                     List of Documents inheriting this one
     ==================== ====================== ===========
     """
@@ -99,7 +109,10 @@ class DocumentOpts:
             f"collection_name={self.collection_name}, "
             f"is_child={self.is_child}, "
             f"strict={self.strict}, "
+            f"lazy={self.lazy}, "
             f"indexes={self.indexes}, "
+            f"version_field={self.version_field}, "
+            f"collection_options={self.collection_options}, "
             f"offspring={self.offspring})>"
         )
 
@@ -112,6 +125,9 @@ class DocumentOpts:
         indexes=None,
         is_child=True,
         strict=True,
+        lazy=False,
+        version_field=None,
+        collection_options=None,
         offspring=None,
     ):
         self.instance = instance
@@ -121,21 +137,36 @@ class DocumentOpts:
         self.indexes = indexes or []
         self.is_child = is_child
         self.strict = strict
+        self.lazy = lazy
+        self.version_field = version_field
+        # Options of the collection (write_concern, read_concern...)
+        self.collection_options = collection_options or {}
         self.offspring = set(offspring) if offspring else set()
 
 
 class MetaDocumentImplementation(MetaImplementation):
     def __init__(cls, *args, **kwargs):
         cls._indexes = None
+        cls._collection = None
 
     @property
     def collection(cls):
-        """Return the collection used by this document class"""
+        """Return the collection used by this document class
+
+        The collection is configured with the collection options of the
+        document and cached until the database of the instance is changed.
+        """
+        if cls._collection is not None:
+            return cls._collection
         if cls.opts.abstract:
             raise NoDBDefinedError("Abstract document has no collection")
         if cls.opts.instance.db is None:
             raise NoDBDefinedError("Instance must be initialized first")
-        return cls.opts.instance.db[cls.opts.collection_name]
+        collection = cls.opts.instance.db[cls.opts.collection_name]
+        if cls.opts.collection_options:
+            collection = collection.with_options(**cls.opts.collection_options)
+        cls._collection = collection
+        return collection
 
     @property
     def indexes(cls):
@@ -230,14 +261,18 @@ class DocumentImplementation(
     def clone(self):
         """Return a copy of this Document as a new Document instance
 
-        All fields are deep-copied except the _id field.
+        All fields are copied except the _id field. Lists, dicts and embedded
+        documents are shared between both documents until one of them
+        modifies them (copy-on-write), cloning doesn't deep-copy them.
         """
-        new = self.__class__()
-        data = deepcopy(self._data._data)
+        new = self._build_empty()
+        self._data._share_with(new._data)
         # Replace ID with new ID ("missing" unless a default value is provided)
-        data["_id"] = new._data._data["_id"]
-        new._data._data = data
-        new._data._modified_data = set(data.keys())
+        pk_field = self.schema.fields[self.pk_field]
+        default = pk_field.load_default
+        new._data._data[pk_field.attribute or self.pk_field] = (
+            default() if callable(default) else default
+        )
         return new
 
     @property
@@ -268,26 +303,51 @@ class DocumentImplementation(
         return DBRef(collection=self.collection.name, id=self.pk)
 
     @classmethod
-    def build_from_mongo(cls, data, use_cls=False):
+    def _build_empty(cls):
+        """Create a document instance holding no data at all.
+
+        Unlike ``cls()``, this doesn't go through marshmallow load. It should
+        be followed by ``from_mongo``.
+        """
+        if cls.opts.abstract:
+            raise AbstractDocumentError("Cannot instantiate an abstract Document")
+        doc = super()._build_empty()
+        doc.is_created = False
+        return doc
+
+    @classmethod
+    def build_from_mongo(cls, data, use_cls=False, lazy=None, projection=None):
         """Create a document instance from MongoDB data
 
         :param data: data as retrieved from MongoDB
         :param use_cls: if the data contains a ``_cls`` field,
             use it determine the Document class to instanciate
+        :param lazy: if True, fields are deserialized on first access
+            (default: ``lazy`` Meta option)
+        :param projection: projection used to retrieve the data, in MongoDB
+            names (see :meth:`from_mongo`)
         """
         # If a _cls is specified, we have to use this document class
         if use_cls and "_cls" in data:
             cls = cls.opts.instance.retrieve_document(data["_cls"])
-        doc = cls()
-        doc.from_mongo(data)
+        doc = cls._build_empty()
+        doc.from_mongo(data, lazy=lazy, projection=projection)
         return doc
 
-    def from_mongo(self, data):
+    def from_mongo(self, data, lazy=None, projection=None):
         """Update the document with the MongoDB data
 
         :param data: data as retrieved from MongoDB
+        :param lazy: if True, fields are deserialized on first access
+            (default: ``lazy`` Meta option)
+        :param projection: projection used to retrieve the data, in MongoDB
+            names. Fields left out by the projection are not loaded: reading
+            them raises :class:`umongo.exceptions.NotLoadedFieldError` and
+            commit doesn't modify them unless they are set.
         """
-        self._data.from_mongo(data)
+        self._data.from_mongo(data, lazy=self.opts.lazy if lazy is None else lazy)
+        if projection:
+            self._data._set_projection(projection)
         self.is_created = True
 
     def to_mongo(self, update=False):
@@ -314,6 +374,77 @@ class DocumentImplementation(
         """Returns True if and only if the document was modified since last commit."""
         return not self.is_created or self._data.is_modified()
 
+    def inc(self, name, value=1):
+        """Increment a field, committed as ``$inc`` rather than ``$set``.
+
+        The value of the document is incremented as well, assuming the value
+        in database has not changed in the meantime.
+        """
+        self._data.inc(name, value)
+
+    def push(self, name, *values, slice=None):
+        """Append values to a list field, committed as ``$push``.
+
+        :param slice: Only keep the first ``slice`` items of the list if
+            positive, the last ones if negative.
+        """
+        self._data.push(name, values, slice)
+
+    def add_to_set(self, name, *values):
+        """Append to a list field the values it doesn't contain, committed as
+        ``$addToSet``."""
+        self._data.add_to_set(name, values)
+
+    def pull(self, name, *values):
+        """Remove all the occurrences of values from a list field, committed
+        as ``$pull``."""
+        self._data.pull(name, values)
+
+    # Optimistic concurrency control
+
+    def _init_version(self):
+        """Set the first version of a document about to be inserted."""
+        name = self.opts.version_field
+        if name is not None and not self._data.get(name):
+            self._data.set(name, 1)
+
+    def _guard_version(self, query, payload, replacement=False):
+        """Only write the document if its version in database is the one of
+        the document, and increment the version in the update or replacement
+        payload.
+        """
+        name = self.opts.version_field
+        if name is None:
+            return
+        field = self.schema.fields[name]
+        key = field.attribute or name
+        # Documents inserted before versioning have no version in database
+        version = self._data.get(name) or None
+        query[key] = version
+        if replacement:
+            payload[key] = (version or 0) + 1
+        else:
+            for operator in ("$set", "$unset"):
+                payload.get(operator, {}).pop(key, None)
+            payload.setdefault("$inc", {})[key] = 1
+
+    def _increment_version(self):
+        """Increment the version of the document once updated in database."""
+        name = self.opts.version_field
+        if name is not None:
+            self._data.set(name, (self._data.get(name) or 0) + 1)
+
+    def _update_error(self, ret, *args):
+        """Return the error to raise when no document matched an update."""
+        if self.opts.version_field is not None:
+            return VersionConflictError(ret, *args)
+        return UpdateError(ret, *args)
+
+    def is_partial(self):
+        """Returns True if some fields have not been loaded from database
+        because of the projection used to retrieve the document."""
+        return bool(self._data._not_loaded)
+
     # Data-proxy accessor shortcuts
 
     def __setitem__(self, name, value):
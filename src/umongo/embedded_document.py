@@ -124,9 +124,34 @@ class EmbeddedDocumentImplementation(Implementation, BaseDataObject):
         """Reset the list of document's modified items."""
         self._data.clear_modified()
 
+    def _set_parent(self, parent, key):
+        # Modifications are tracked by the data proxy
+        self._data._parent = (parent, key)
+
+    def _get_parent(self):
+        return self._data._parent
+
+    def _partial_update(self):
+        return self._data.to_mongo(update=True)
+
     def required_validate(self):
         self._data.required_validate()
 
+    @classmethod
+    def _build_empty(cls):
+        """Create an embedded document instance holding no data at all.
+
+        Unlike ``cls()``, this doesn't go through marshmallow load. It should
+        be followed by ``from_mongo``.
+        """
+        if cls.opts.abstract:
+            raise AbstractDocumentError(
+                "Cannot instantiate an abstract EmbeddedDocument",
+            )
+        doc = cls.__new__(cls)
+        doc._data = cls.DataProxy._build_empty()
+        return doc
+
     @classmethod
     def build_from_mongo(cls, data, use_cls=True):
         """Create an embedded document instance from MongoDB data
@@ -138,7 +163,7 @@ class EmbeddedDocumentImplementation(Implementation, BaseDataObject):
         # If a _cls is specified, we have to use this document class
         if use_cls and "_cls" in data:
             cls = cls.opts.instance.retrieve_embedded_document(data["_cls"])
-        doc = cls()
+        doc = cls._build_empty()
         doc.from_mongo(data)
         return doc
 
@@ -33,6 +33,10 @@ class UpdateError(UMongoError):
     """Error while updating document"""
 
 
+class VersionConflictError(UpdateError):
+    """Document modified in database since it was loaded"""
+
+
 class DeleteError(UMongoError):
     """Error while deleting document"""
 
@@ -51,3 +55,7 @@ class NoneReferenceError(UMongoError):
 
 class UnknownFieldInDBError(UMongoError):
     """Data from database contains unknown field"""
+
+
+class NotLoadedFieldError(UMongoError):
+    """Accessing a field excluded by the projection used to load the document"""
@@ -9,7 +9,7 @@ from bson import DBRef, Decimal128, ObjectId
 
 from . import marshmallow_bonus as ma_bonus_fields
 from .abstract import BaseField, I18nErrorDict
-from .data_objects import Dict, List, Reference
+from .data_objects import Dict, List, Reference, copy_output, decode_raw_bson
 from .document import DocumentImplementation
 from .exceptions import DocumentDefinitionError, NotRegisteredDocumentError
 from .i18n import gettext as _
@@ -171,7 +171,8 @@ class DictField(BaseField, ma.fields.Dict):
                 return ma.missing
             if callable(value):
                 return lambda: Dict(key_field, value_field, value())
-            return Dict(key_field, value_field, value)
+            # Each document gets its own copy of the default value
+            return lambda: Dict(key_field, value_field, value)
 
         self.dump_default = cast_value_or_callable(
             self.key_field,
@@ -208,7 +209,7 @@ class DictField(BaseField, ma.fields.Dict):
                     if self.key_field
                     else k: self.value_field.deserialize_from_mongo(v)
                     if self.value_field
-                    else v
+                    else decode_raw_bson(v)
                     for k, v in value.items()
                 },
             )
@@ -252,7 +253,8 @@ class ListField(BaseField, ma.fields.List):
                 return ma.missing
             if callable(value):
                 return lambda: List(inner, value())
-            return List(inner, value)
+            # Each document gets its own copy of the default value
+            return lambda: List(inner, value)
 
         self.dump_default = cast_value_or_callable(self.inner, self.dump_default)
         self.load_default = cast_value_or_callable(self.inner, self.load_default)
@@ -483,7 +485,8 @@ class EmbeddedField(BaseField, ma.fields.Nested):
     def _serialize(self, value, attr, obj):
         if value is None:
             return None
-        return value.dump()
+        # Reuse the cached output of the embedded document
+        return copy_output(value._data._dump_cached())
 
     def _deserialize(self, value, attr, data, **kwargs):
         embedded_document_cls = self.embedded_document_cls
@@ -516,7 +519,8 @@ class EmbeddedField(BaseField, ma.fields.Nested):
         return embedded_document_cls(**value)
 
     def _serialize_to_mongo(self, obj):
-        return obj.to_mongo()
+        # Reuse the cached output of the embedded document
+        return copy_output(obj._data._to_mongo_cached())
 
     def _deserialize_from_mongo(self, value):
         return self.embedded_document_cls.build_from_mongo(value)
@@ -0,0 +1,57 @@
+"""Fetch cache of an instance scope
+
+Keeps the documents loaded from database during the scope so fetching the
+same reference, or finding the same primary key, again doesn't query the
+database. Unlike the identity map of a unit of work, documents modified
+since they were loaded are not shared: they are fetched again.
+"""
+
+__all__ = ("FetchCache",)
+
+
+class FetchCache:
+    """Documents loaded from database, by collection and primary key"""
+
+    __slots__ = ("documents",)
+
+    def __init__(self):
+        self.documents = {}
+
+    @staticmethod
+    def _key(document_cls, pk):
+        return (document_cls.opts.collection_name, pk)
+
+    def get(self, document_cls, pk):
+        """Return the loaded document of the given class with the given pk,
+        if any and not modified since loaded."""
+        key = self._key(document_cls, pk)
+        doc = self.documents.get(key)
+        if doc is None or not isinstance(doc, document_cls):
+            return None
+        if doc.is_modified():
+            # The modifications may never be committed, don't share them
+            del self.documents[key]
+            return None
+        return doc
+
+    def add(self, doc):
+        """Register a document loaded from database, unless partially loaded."""
+        if not doc.is_partial() and doc.pk is not None:
+            self.documents[self._key(type(doc), doc.pk)] = doc
+
+    def committed(self, doc):
+        """Forget about the document loaded with the pk of a document just
+        updated in database, unless it is the same document."""
+        key = self._key(type(doc), doc.pk)
+        if self.documents.get(key) is not doc:
+            self.documents.pop(key, None)
+
+    def discard(self, document_cls, pk=None):
+        """Forget about a pk (e.g. once deleted), or all the pks of the
+        document's collection if not known."""
+        if pk is not None:
+            self.documents.pop(self._key(document_cls, pk), None)
+            return
+        collection_name = document_cls.opts.collection_name
+        for key in [key for key in self.documents if key[0] == collection_name]:
+            del self.documents[key]
@@ -2,9 +2,13 @@ from mongomock.collection import Cursor
 from mongomock.database import Database
 
 from umongo.document import DocumentImplementation
-from umongo.instance import Instance
 
-from .pymongo import BaseWrappedCursor, PyMongoBuilder, PyMongoDocument
+from .pymongo import (
+    BaseWrappedCursor,
+    PyMongoBuilder,
+    PyMongoDocument,
+    PyMongoInstance,
+)
 
 # Mongomock aims at working like pymongo
 
@@ -23,7 +27,7 @@ class MongoMockBuilder(PyMongoBuilder):
     BASE_DOCUMENT_CLS = MongoMockDocument
 
 
-class MongoMockInstance(Instance):
+class MongoMockInstance(PyMongoInstance):
     """:class:`umongo.instance.Instance` implementation for mongomock"""
 
     BUILDER_CLS = MongoMockBuilder
@@ -1,12 +1,17 @@
 import collections
+import itertools
 from contextlib import contextmanager
 from contextvars import ContextVar
 
 import marshmallow as ma
 
+from bson import ObjectId
+from pymongo import ReturnDocument
 from pymongo.cursor import Cursor
 from pymongo.database import Database
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.operations import InsertOne, ReplaceOne, UpdateOne
+from pymongo.results import BulkWriteResult
 
 from umongo.builder import BaseBuilder
 from umongo.data_objects import Reference
@@ -17,30 +22,140 @@ from umongo.exceptions import (
     NotCreatedError,
     UpdateError,
 )
-from umongo.fields import DictField, EmbeddedField, ListField, ReferenceField
+from umongo.fields import (
+    DictField,
+    EmbeddedField,
+    GenericReferenceField,
+    ListField,
+    ReferenceField,
+)
 from umongo.instance import Instance
 from umongo.query_mapper import map_query
 
+from .fetch_cache import FetchCache
 from .tools import (
+    build_modified_document,
+    build_populated_document,
+    bulk_commit_batches,
+    cache_references,
+    cached_references,
+    collect_prefetch_references,
+    collect_references,
+    cook_find_args_projection,
     cook_find_filter,
     cook_find_projection,
+    cook_find_sort,
+    cook_populate_pipeline,
+    cook_update,
+    raw_bson_collection,
+    reference_check_key,
     remove_cls_field_from_embedded_docs,
+    split_bulk_write_error,
+    split_unmatched_updates,
+    uncache_references,
+    unique_error_messages,
 )
+from .unit_of_work import UnitOfWork
 
 SESSION = ContextVar("session", default=None)
+UNIT_OF_WORK = ContextVar("unit_of_work", default=None)
+# Existence of the references checked at once by `io_validate`
+CHECKED_REFERENCES = ContextVar("checked_references", default=None)
+FETCH_CACHE = ContextVar("fetch_cache", default=None)
+
+
+def _build_from_mongo(document_cls, data, **kwargs):
+    """Build a document, through the identity map of the unit of work if any,
+    and register it in the fetch cache if any"""
+    unit_of_work = UNIT_OF_WORK.get()
+    if unit_of_work is None:
+        doc = document_cls.build_from_mongo(data, **kwargs)
+    else:
+        doc = unit_of_work.build_from_mongo(document_cls, data, **kwargs)
+    fetch_cache = FETCH_CACHE.get()
+    if fetch_cache is not None:
+        fetch_cache.add(doc)
+    return doc
+
+
+def _fetch_cache_get(document_cls, pk):
+    """Return the document with the given pk from the fetch cache, if any"""
+    fetch_cache = FETCH_CACHE.get()
+    if fetch_cache is None or pk is None or isinstance(pk, dict):
+        return None
+    return fetch_cache.get(document_cls, pk)
+
+
+def _fetch_cache_discard(document_cls, pk=None):
+    fetch_cache = FETCH_CACHE.get()
+    if fetch_cache is not None:
+        fetch_cache.discard(document_cls, pk)
+
+
+def _unit_of_work_replace(document_cls, pk, doc=None):
+    """Replace the document of the unit of work with the given pk, if any"""
+    unit_of_work = UNIT_OF_WORK.get()
+    if unit_of_work is not None and pk is not None:
+        unit_of_work.replace(document_cls, pk, doc)
+
+
+def _fetch_cache_committed(doc):
+    fetch_cache = FETCH_CACHE.get()
+    if fetch_cache is not None:
+        fetch_cache.committed(doc)
 
 
 # pymongo.Cursor defines __del__ method, hence mongomock's WrappedCursor should
 # not inherit from this class otherwise garbage collection will crash...
 class BaseWrappedCursor:
-    __slots__ = ("document_cls", "raw_cursor")
-
-    def __init__(self, document_cls, cursor, *args, **kwargs):
+    __slots__ = (
+        "document_cls",
+        "lazy",
+        "prefetch_batch_size",
+        "prefetch_paths",
+        "prefetched",
+        "projection",
+        "raw_cursor",
+    )
+
+    def __init__(
+        self, document_cls, cursor, *args, lazy=None, projection=None, **kwargs
+    ):
         # Such a cunning plan my lord !
         # We inherit from Cursor but don't call its __init__ because
         # we act as a proxy to the underlying raw_cursor
         WrappedCursor.raw_cursor.__set__(self, cursor)
         WrappedCursor.document_cls.__set__(self, document_cls)
+        WrappedCursor.lazy.__set__(self, lazy)
+        WrappedCursor.projection.__set__(self, projection)
+        WrappedCursor.prefetch_paths.__set__(self, ())
+        WrappedCursor.prefetch_batch_size.__set__(self, None)
+        WrappedCursor.prefetched.__set__(self, collections.deque())
+
+    def prefetch(self, *paths, batch_size=100):
+        """Fetch the documents referenced by the given fields of the
+        documents returned by the cursor.
+
+        The documents are retrieved by batches of ``batch_size``, the
+        documents they reference are fetched with a single query per
+        referenced document class and per batch.
+
+        :param paths: Names of the reference fields, or of the lists and
+            dicts of references, with dots to go through embedded documents
+            (e.g. ``comments.author``).
+        """
+        WrappedCursor.prefetch_paths.__set__(self, paths)
+        WrappedCursor.prefetch_batch_size.__set__(self, batch_size)
+        return self
+
+    def _build(self, elem):
+        return _build_from_mongo(
+            self.document_cls,
+            elem,
+            use_cls=True,
+            lazy=self.lazy,
+            projection=self.projection,
+        )
 
     def __getattr__(self, name):
         return getattr(self.raw_cursor, name)
@@ -51,19 +166,39 @@ class BaseWrappedCursor:
     def __getitem__(self, index):
         if isinstance(index, slice):
             elems = self.raw_cursor[index]
-            return (
-                self.document_cls.build_from_mongo(elem, use_cls=True) for elem in elems
-            )
-        elem = self.raw_cursor[index]
-        return self.document_cls.build_from_mongo(elem, use_cls=True)
+            if self.prefetch_paths:
+                docs = [self._build(elem) for elem in elems]
+                _prefetch_references(docs, self.prefetch_paths)
+                return iter(docs)
+            return (self._build(elem) for elem in elems)
+        doc = self._build(self.raw_cursor[index])
+        if self.prefetch_paths:
+            _prefetch_references((doc,), self.prefetch_paths)
+        return doc
 
     def __next__(self):
-        elem = next(self.raw_cursor)
-        return self.document_cls.build_from_mongo(elem, use_cls=True)
+        if not self.prefetch_paths:
+            return self._build(next(self.raw_cursor))
+        if not self.prefetched:
+            docs = [
+                self._build(elem)
+                for elem in itertools.islice(self.raw_cursor, self.prefetch_batch_size)
+            ]
+            if not docs:
+                raise StopIteration
+            _prefetch_references(docs, self.prefetch_paths)
+            self.prefetched.extend(docs)
+        return self.prefetched.popleft()
 
     def __iter__(self):
+        if self.prefetch_paths:
+            while True:
+                try:
+                    yield next(self)
+                except StopIteration:
+                    return
         for elem in self.raw_cursor:
-            yield self.document_cls.build_from_mongo(elem, use_cls=True)
+            yield self._build(elem)
 
 
 class WrappedCursor(BaseWrappedCursor, Cursor):
@@ -87,8 +222,28 @@ class PyMongoDocument(DocumentImplementation):
         ret = self.collection.find_one(self.pk, session=SESSION.get())
         if ret is None:
             raise NotCreatedError("Document doesn't exists in database")
-        self._data = self.DataProxy()
-        self._data.from_mongo(ret)
+        self._data = self.DataProxy._build_empty()
+        self._data.from_mongo(ret, lazy=self.opts.lazy)
+
+    def load_missing(self):
+        """Retrieve from database the fields left out by the projection used
+        to find the document, in a single query.
+
+        Raises :class:`umongo.exceptions.NotCreatedError` if the document
+        doesn't exist in database.
+        """
+        if not self.is_partial():
+            return
+        if not self.is_created:
+            raise NotCreatedError("Document doesn't exists in database")
+        ret = self.collection.find_one(
+            self.pk,
+            projection=dict.fromkeys(self._data._not_loaded, True),
+            session=SESSION.get(),
+        )
+        if ret is None:
+            raise NotCreatedError("Document doesn't exists in database")
+        self._data._load_not_loaded(ret)
 
     def commit(self, io_validate_all=False, conditions=None, replace=False):
         """Commit the document in database.
@@ -101,9 +256,17 @@ class PyMongoDocument(DocumentImplementation):
             Raises :class:`umongo.exceptions.UpdateError` if the
             conditions are not satisfied.
         :param replace: Replace the document rather than update.
+
+        Inside a session with a unit of work, committing without arguments
+        only registers the document, which is written when the session ends
+        or is flushed.
         :return: A :class:`pymongo.results.UpdateResult` or
             :class:`pymongo.results.InsertOneResult` depending of the operation.
         """
+        unit_of_work = UNIT_OF_WORK.get()
+        if unit_of_work is not None and not (io_validate_all or conditions or replace):
+            unit_of_work.add(self)
+            return None
         try:
             if self.is_created:
                 if self.is_modified() or replace:
@@ -116,22 +279,30 @@ class PyMongoDocument(DocumentImplementation):
                         query.update(map_query(additional_filter, self.schema.fields))
                     self.required_validate()
                     self.io_validate(validate_all=io_validate_all)
-                    if replace:
+                    if replace and not self.is_partial():
                         payload = self._data.to_mongo(update=False)
+                        self._guard_version(query, payload, replacement=True)
                         ret = self.collection.replace_one(
                             query,
                             payload,
                             session=SESSION.get(),
                         )
                     else:
-                        payload = self._data.to_mongo(update=True)
+                        if replace:
+                            # Fields not loaded are left as is in database
+                            payload = self._data._to_mongo_loaded_update()
+                        else:
+                            payload = self._data.to_mongo(update=True)
+                        self._guard_version(query, payload)
                         ret = self.collection.update_one(
                             query,
                             payload,
                             session=SESSION.get(),
                         )
                     if ret.matched_count != 1:
-                        raise UpdateError(ret)
+                        raise self._update_error(ret)
+                    self._increment_version()
+                    _fetch_cache_committed(self)
                     self.post_update(ret)
                 else:
                     ret = None
@@ -143,6 +314,7 @@ class PyMongoDocument(DocumentImplementation):
                 self.pre_insert()
                 self.required_validate()
                 self.io_validate(validate_all=io_validate_all)
+                self._init_version()
                 payload = self._data.to_mongo(update=False)
                 ret = self.collection.insert_one(payload, session=SESSION.get())
                 # TODO: check ret ?
@@ -150,25 +322,58 @@ class PyMongoDocument(DocumentImplementation):
                 self.is_created = True
                 self.post_insert(ret)
         except DuplicateKeyError as exc:
-            # Sort value to make testing easier for compound indexes
-            keys = sorted(exc.details["keyPattern"].keys())
-            try:
-                fields = [self.schema.fields[k] for k in keys]
-            except KeyError:
+            messages = unique_error_messages(type(self), exc.details["keyPattern"])
+            if messages is None:
                 # A key in the index is unknown from umongo
                 raise exc from None
-            if len(keys) == 1:
-                msg = fields[0].error_messages["unique"]
-                raise ma.ValidationError({keys[0]: msg}) from exc
-            raise ma.ValidationError(
-                {
-                    k: f.error_messages["unique_compound"].format(fields=keys)
-                    for k, f in zip(keys, fields, strict=True)
-                },
-            ) from exc
+            raise ma.ValidationError(messages) from exc
         self._data.clear_modified()
         return ret
 
+    def _bulk_commit_operation(self, io_validate_all=False, replace=False):
+        """Run the hooks and validation of :meth:`commit` and return the
+        matching bulk write operation, None if there is nothing to commit.
+        """
+        if self.is_created:
+            if not (self.is_modified() or replace):
+                return None
+            query = {"_id": self.pk}
+            additional_filter = self.pre_update()
+            if additional_filter:
+                query.update(map_query(additional_filter, self.schema.fields))
+            self.required_validate()
+            self.io_validate(validate_all=io_validate_all)
+            if replace and not self.is_partial():
+                payload = self._data.to_mongo(update=False)
+                self._guard_version(query, payload, replacement=True)
+                return ReplaceOne(query, payload)
+            if replace:
+                payload = self._data._to_mongo_loaded_update()
+            else:
+                payload = self._data.to_mongo(update=True)
+            self._guard_version(query, payload)
+            return UpdateOne(query, payload)
+        self.pre_insert()
+        self.required_validate()
+        self.io_validate(validate_all=io_validate_all)
+        self._init_version()
+        payload = self._data.to_mongo(update=False)
+        # Generate the id as the driver would, to retrieve it once inserted
+        payload.setdefault("_id", ObjectId())
+        return InsertOne(payload)
+
+    def _bulk_commit_done(self, operation, ret):
+        """Update the document once its bulk write operation is done."""
+        if isinstance(operation, InsertOne):
+            self._data.set(self.pk_field, operation._doc["_id"])
+            self.is_created = True
+            self.post_insert(ret)
+        else:
+            self._increment_version()
+            _fetch_cache_committed(self)
+            self.post_update(ret)
+        self._data.clear_modified()
+
     def delete(self, conditions=None):
         """Remove the document from database.
 
@@ -192,8 +397,13 @@ class PyMongoDocument(DocumentImplementation):
         if additional_filter:
             query.update(map_query(additional_filter, self.schema.fields))
         ret = self.collection.delete_one(query, session=SESSION.get())
+        uncache_references(type(self), self.pk)
+        _fetch_cache_discard(type(self), self.pk)
         if ret.deleted_count != 1:
             raise DeleteError(ret)
+        unit_of_work = UNIT_OF_WORK.get()
+        if unit_of_work is not None:
+            unit_of_work.discard(self)
         self.is_created = False
         self.post_delete(ret)
         return ret
@@ -205,39 +415,117 @@ class PyMongoDocument(DocumentImplementation):
             fields that have been modified.
         """
         if validate_all:
-            _io_validate_data_proxy(self.schema, self._data)
+            partial = self._data.get_loaded_fields()
         else:
-            _io_validate_data_proxy(
-                self.schema,
-                self._data,
-                partial=self._data.get_modified_fields(),
-            )
+            partial = self._data.get_modified_fields() or self._data.get_loaded_fields()
+        token = CHECKED_REFERENCES.set(
+            _check_references(self.schema, self._data, partial),
+        )
+        try:
+            _io_validate_data_proxy(self.schema, self._data, partial=partial)
+        finally:
+            CHECKED_REFERENCES.reset(token)
 
     @classmethod
-    def find_one(cls, filter=None, projection=None, **kwargs):
-        """Find a single document in database."""
+    def find_one(
+        cls,
+        filter=None,
+        projection=None,
+        lazy=None,
+        raw_bson=False,
+        **kwargs,
+    ):
+        """Find a single document in database.
+
+        :param lazy: if True, the document's fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+        :param raw_bson: if True, retrieve the document as a
+            :class:`bson.raw_bson.RawBSONDocument` and load it lazily
+            unless ``lazy`` is False.
+
+        Inside :meth:`~umongo.frameworks.PyMongoInstance.fetch_cache`, finding
+        a document by primary key without projection returns the document
+        already loaded, if any.
+        """
+        if not (projection or raw_bson):
+            doc = _fetch_cache_get(cls, filter)
+            if doc is not None:
+                return doc
         filter = cook_find_filter(cls, filter)
         if projection:
             projection = cook_find_projection(cls, projection)
-        ret = cls.collection.find_one(
+        collection = cls.collection
+        if raw_bson:
+            collection = raw_bson_collection(collection)
+            lazy = True if lazy is None else lazy
+        ret = collection.find_one(
             filter,
             projection=projection,
             session=SESSION.get(),
             **kwargs,
         )
         if ret is not None:
-            ret = cls.build_from_mongo(ret, use_cls=True)
+            ret = _build_from_mongo(
+                cls,
+                ret,
+                use_cls=True,
+                lazy=lazy,
+                projection=projection,
+            )
         return ret
 
     @classmethod
-    def find(cls, filter=None, *args, **kwargs):
+    def find(cls, filter=None, *args, lazy=None, raw_bson=False, **kwargs):
         """Find a list document in database.
 
+        :param lazy: if True, the documents' fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+        :param raw_bson: if True, retrieve the documents as
+            :class:`bson.raw_bson.RawBSONDocument` and load them lazily
+            unless ``lazy`` is False.
+
         Returns a cursor that provide Documents.
         """
         filter = cook_find_filter(cls, filter)
-        raw_cursor = cls.collection.find(filter, *args, session=SESSION.get(), **kwargs)
-        return cls.cursor_cls(cls, raw_cursor)
+        args, kwargs, projection = cook_find_args_projection(cls, args, kwargs)
+        collection = cls.collection
+        if raw_bson:
+            collection = raw_bson_collection(collection)
+            lazy = True if lazy is None else lazy
+        raw_cursor = collection.find(filter, *args, session=SESSION.get(), **kwargs)
+        return cls.cursor_cls(cls, raw_cursor, lazy=lazy, projection=projection)
+
+    @classmethod
+    def find_populated(
+        cls,
+        filter=None,
+        populate=(),
+        sort=None,
+        skip=None,
+        limit=None,
+        lazy=None,
+        **kwargs,
+    ):
+        """Find documents in database along with the documents they
+        reference, joined with a ``$lookup`` stage of an aggregation.
+
+        :param populate: Names of the reference fields, or lists of
+            references, whose referenced documents are attached to the
+            references.
+        :param sort: a list of ``(field name, direction)`` pairs, or a dict
+        :param lazy: if True, the documents' fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+
+        Returns a list of Documents.
+        """
+        pipeline, joins = cook_populate_pipeline(
+            cls, filter, populate, sort=sort, skip=skip, limit=limit
+        )
+        raw_cursor = cls.collection.aggregate(pipeline, session=SESSION.get(), **kwargs)
+        return [
+            build_populated_document(cls, data, joins, _build_from_mongo, lazy=lazy)
+            for data in raw_cursor
+        ]
 
     @classmethod
     def count_documents(cls, filter=None, **kwargs):
@@ -249,6 +537,112 @@ class PyMongoDocument(DocumentImplementation):
         filter = cook_find_filter(cls, filter or {})
         return cls.collection.count_documents(filter, session=SESSION.get(), **kwargs)
 
+    @classmethod
+    def update_many(cls, filter, update, **kwargs):
+        """Update the documents matching the filter in database.
+
+        Field names of the filter and of the update are replaced by the ones
+        used in database and the values of the update operators are
+        deserialized and serialized by the matching fields.
+
+        :return: A :class:`pymongo.results.UpdateResult`
+        """
+        ret = cls.collection.update_many(
+            cook_find_filter(cls, filter),
+            cook_update(cls, update),
+            session=SESSION.get(),
+            **kwargs,
+        )
+        _fetch_cache_discard(cls)
+        return ret
+
+    @classmethod
+    def delete_many(cls, filter, **kwargs):
+        """Delete the documents matching the filter from database.
+
+        :return: A :class:`pymongo.results.DeleteResult`
+        """
+        ret = cls.collection.delete_many(
+            cook_find_filter(cls, filter),
+            session=SESSION.get(),
+            **kwargs,
+        )
+        uncache_references(cls)
+        _fetch_cache_discard(cls)
+        return ret
+
+    @classmethod
+    def find_one_and_update(
+        cls,
+        filter,
+        update,
+        projection=None,
+        sort=None,
+        upsert=False,
+        return_document=ReturnDocument.BEFORE,
+        lazy=None,
+        **kwargs,
+    ):
+        """Atomically update a single document and return it.
+
+        Field names of the filter, the update, the projection and the sort are
+        replaced by the ones used in database and the update is serialized as
+        with :meth:`update_many`.
+
+        :param return_document: :attr:`pymongo.ReturnDocument.BEFORE` to
+            return the document as it was before the update,
+            :attr:`pymongo.ReturnDocument.AFTER` to return the updated one
+        :param lazy: if True, the document's fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+
+        :return: The matching Document or None.
+        """
+        if projection:
+            projection = cook_find_projection(cls, projection)
+        ret = cls.collection.find_one_and_update(
+            cook_find_filter(cls, filter),
+            cook_update(cls, update),
+            projection=projection,
+            sort=None if sort is None else cook_find_sort(cls, sort),
+            upsert=upsert,
+            return_document=return_document,
+            session=SESSION.get(),
+            **kwargs,
+        )
+        doc = build_modified_document(cls, ret, lazy=lazy, projection=projection)
+        if ret is not None:
+            _fetch_cache_discard(cls, ret.get("_id"))
+            # The document as it was before the update is outdated
+            after = return_document == ReturnDocument.AFTER
+            _unit_of_work_replace(cls, ret.get("_id"), doc if after else None)
+        return doc
+
+    @classmethod
+    def find_one_and_delete(
+        cls, filter, projection=None, sort=None, lazy=None, **kwargs
+    ):
+        """Atomically delete a single document and return it.
+
+        :param lazy: if True, the document's fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+
+        :return: The deleted Document or None.
+        """
+        if projection:
+            projection = cook_find_projection(cls, projection)
+        ret = cls.collection.find_one_and_delete(
+            cook_find_filter(cls, filter),
+            projection=projection,
+            sort=None if sort is None else cook_find_sort(cls, sort),
+            session=SESSION.get(),
+            **kwargs,
+        )
+        if ret is not None:
+            uncache_references(cls, ret.get("_id"))
+            _fetch_cache_discard(cls, ret.get("_id"))
+            _unit_of_work_replace(cls, ret.get("_id"))
+        return build_modified_document(cls, ret, lazy=lazy, projection=projection)
+
     @classmethod
     def ensure_indexes(cls):
         """Check&create if needed the Document's indexes in database"""
@@ -276,7 +670,7 @@ def _io_validate_data_proxy(schema, data_proxy, partial=None):
     for name, field in schema.fields.items():
         if partial and name not in partial:
             continue
-        value = data_proxy.get(name)
+        value = data_proxy.get(name, shared=True)
         if value is ma.missing:
             continue
         try:
@@ -290,10 +684,49 @@ def _io_validate_data_proxy(schema, data_proxy, partial=None):
         raise ma.ValidationError(errors)
 
 
+def _prefetch_references(docs, paths):
+    """Fetch the documents referenced by the given paths of the documents,
+    with a single query per referenced document class."""
+    references = collect_prefetch_references(docs, paths)
+    for document_cls, class_references in references.items():
+        pks = list({reference.pk for reference in class_references})
+        fetched = {doc.pk: doc for doc in document_cls.find({"_id": {"$in": pks}})}
+        for reference in class_references:
+            reference._document = fetched.get(reference.pk)
+
+
+def _check_references(schema, data_proxy, partial):
+    """Check the existence of the references of a document with a single
+    query per referenced collection.
+
+    :return: A dict of the existence of the references by check key.
+    """
+    checked = {}
+    references = collect_references(schema, data_proxy, partial=partial)
+    for key, (document_cls, pks) in references.items():
+        found = cached_references(document_cls, pks)
+        if len(found) < len(pks):
+            cursor = document_cls.collection.find(
+                {"_id": {"$in": list(pks - found)}},
+                projection={"_id": True},
+                session=SESSION.get(),
+            )
+            queried = {doc["_id"] for doc in cursor}
+            cache_references(document_cls, queried)
+            found |= queried
+        for pk in pks:
+            checked[(*key, pk)] = pk in found
+    return checked
+
+
 def _reference_io_validate(field, value):
     if value is None:
         return
-    if not value.exists:
+    checked = CHECKED_REFERENCES.get()
+    exists = checked.get(reference_check_key(value)) if checked else None
+    if exists is None:
+        exists = value.exists
+    if not exists:
         raise ma.ValidationError(
             value.error_messages["not_found"].format(
                 document=value.document_cls.__name__,
@@ -348,6 +781,13 @@ class PyMongoReference(Reference):
         if not self._document or force_reload:
             if self.pk is None:
                 raise NoneReferenceError("Cannot retrieve a None Reference")
+            if force_reload:
+                _fetch_cache_discard(self.document_cls, self.pk)
+            unit_of_work = UNIT_OF_WORK.get()
+            if unit_of_work is not None and not force_reload:
+                self._document = unit_of_work.get(self.document_cls, self.pk)
+                if self._document is not None:
+                    return self._document
             self._document = self.document_cls.find_one(self.pk, projection=projection)
             if not self._document:
                 raise ma.ValidationError(
@@ -359,10 +799,15 @@ class PyMongoReference(Reference):
 
     @property
     def exists(self):
-        return (
+        if cached_references(self.document_cls, (self.pk,)):
+            return True
+        exists = (
             self.document_cls.collection.find_one(self.pk, projection={"_id": True})
             is not None
         )
+        if exists:
+            cache_references(self.document_cls, (self.pk,))
+        return exists
 
 
 class PyMongoBuilder(BaseBuilder):
@@ -385,6 +830,8 @@ class PyMongoBuilder(BaseBuilder):
         if isinstance(field, ReferenceField):
             field.io_validate.append(_reference_io_validate)
             field.reference_cls = PyMongoReference
+        if isinstance(field, GenericReferenceField):
+            field.reference_cls = PyMongoReference
         if isinstance(field, EmbeddedField):
             field.io_validate_recursive = _embedded_document_io_validate
 
@@ -399,14 +846,149 @@ class PyMongoInstance(Instance):
         return isinstance(db, Database)
 
     @contextmanager
-    def session(self):
+    def fetch_cache(self):
+        """Reuse the documents loaded from database in the context.
+
+        Fetching a reference or finding a document by primary key returns the
+        document of the same class already loaded in the context instead of
+        querying the database, unless it has been modified since.
+        """
+        token = FETCH_CACHE.set(FetchCache())
+        try:
+            yield
+        finally:
+            FETCH_CACHE.reset(token)
+
+    @contextmanager
+    def session(self, unit_of_work=False):
+        """Run the database operations of the context in a session.
+
+        :param unit_of_work: Keep a single document per primary key among the
+            documents retrieved in the context and defer commits. Committed
+            and modified documents are written with :meth:`commit_many`
+            when the context ends without error or on :meth:`flush`.
+        """
         with self.db.client.start_session() as session:
+            token = SESSION.set(session)
+            if unit_of_work:
+                unit_of_work_token = UNIT_OF_WORK.set(UnitOfWork())
             try:
-                token = SESSION.set(session)
                 yield session
+                if unit_of_work:
+                    self.flush()
             finally:
+                if unit_of_work:
+                    UNIT_OF_WORK.reset(unit_of_work_token)
                 SESSION.reset(token)
 
+    def flush(self):
+        """Write the documents committed or modified in the unit of work of
+        the current session.
+
+        :return: The list of :class:`pymongo.results.BulkWriteResult`.
+        """
+        unit_of_work = UNIT_OF_WORK.get()
+        if unit_of_work is None:
+            return []
+        docs = unit_of_work.dirty()
+        ret = self.commit_many(docs)
+        unit_of_work.flushed(docs)
+        return ret
+
+    def commit_many(
+        self,
+        docs,
+        *,
+        ordered=True,
+        io_validate_all=False,
+        replace=False,
+        batch_size=1000,
+    ):
+        """Commit several documents with bulk writes.
+
+        The hooks and validation of :meth:`PyMongoDocument.commit` are run
+        for every document before anything is written. The operations are
+        then sent with one ``bulk_write`` per collection and per
+        ``batch_size`` documents.
+
+        :param docs: Documents to commit.
+        :param ordered: Stop at the first failed write, otherwise try to
+            write all the documents.
+        :param io_validate_all: Validate all field instead of only changed ones.
+        :param replace: Replace the documents rather than update.
+        :param batch_size: Maximum number of operations per ``bulk_write``.
+        :return: The list of :class:`pymongo.results.BulkWriteResult`.
+
+        Raises :class:`marshmallow.ValidationError` with the messages of the
+        documents failing validation or violating a unique index, by index
+        of the document in ``docs``. Raises
+        :class:`umongo.exceptions.UpdateError` (or
+        :class:`umongo.exceptions.VersionConflictError` if versioned) if
+        documents to update are not matched, along with these documents by
+        index, once the other documents of the batch are committed.
+        """
+        entries = []
+        errors = {}
+        for index, doc in enumerate(docs):
+            try:
+                operation = doc._bulk_commit_operation(
+                    io_validate_all=io_validate_all,
+                    replace=replace,
+                )
+            except ma.ValidationError as exc:
+                errors[index] = exc.messages
+                continue
+            if operation is not None:
+                entries.append((index, doc, operation))
+        if errors:
+            raise ma.ValidationError(errors)
+
+        results = []
+        for collection, batch in bulk_commit_batches(entries, batch_size):
+            try:
+                ret = collection.bulk_write(
+                    [operation for _, _, operation in batch],
+                    ordered=ordered,
+                    session=SESSION.get(),
+                )
+            except BulkWriteError as exc:
+                ret = BulkWriteResult(exc.details, acknowledged=True)
+                done, batch_errors = split_bulk_write_error(
+                    batch,
+                    exc.details,
+                    ordered,
+                )
+                for _, doc, operation in done:
+                    doc._bulk_commit_done(operation, ret)
+                if batch_errors is None:
+                    raise
+                errors.update(batch_errors)
+                if ordered:
+                    raise ma.ValidationError(errors) from exc
+                results.append(ret)
+                continue
+            updates = [entry for entry in batch if not isinstance(entry[2], InsertOne)]
+            unmatched = []
+            if ret.matched_count != len(updates):
+                # Find out which documents were not matched by their update
+                raws = collection.find(
+                    {"_id": {"$in": [doc.pk for _, doc, _ in updates]}},
+                    session=SESSION.get(),
+                )
+                stored = {raw["_id"]: raw for raw in raws}
+                batch, unmatched = split_unmatched_updates(batch, stored)
+            for _, doc, operation in batch:
+                doc._bulk_commit_done(operation, ret)
+            if unmatched:
+                raise unmatched[0][1]._update_error(
+                    ret,
+                    {index: doc for index, doc, _ in unmatched},
+                )
+            results.append(ret)
+        if errors:
+            raise ma.ValidationError(errors)
+        return results
+
 
 class PyMongoMigrationInstance(PyMongoInstance):
     """PyMongo instance with migration features"""
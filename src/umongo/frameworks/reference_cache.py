@@ -0,0 +1,81 @@
+"""Cache of the references known to exist in database
+
+Checking the existence of a reference costs a query, which is wasted on the
+documents referenced over and over (e.g. the owner of many documents). The
+cache remembers the pks found in database for a limited time, trading a
+staleness window for these queries.
+"""
+
+import time
+from collections import OrderedDict
+
+__all__ = ("ReferenceCache",)
+
+
+class ReferenceCache:
+    """Bounded cache of the pks known to exist in database, by collection
+
+    :param maxsize: Maximum number of pks kept per collection, the least
+        recently used ones are evicted first.
+    :param ttl: Number of seconds a pk is considered to exist once found in
+        database. It may have been deleted by another process meanwhile.
+    :param timer: Function returning the current time in seconds.
+    """
+
+    __slots__ = ("_collections", "maxsize", "timer", "ttl")
+
+    def __init__(self, maxsize, ttl, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        # Expiration time of the pks, by collection name
+        self._collections = {}
+
+    def known(self, document_cls, pks):
+        """Return the pks known to exist among the given ones."""
+        entries = self._collections.get(document_cls.opts.collection_name)
+        if not entries:
+            return set()
+        now = self.timer()
+        known = set()
+        for pk in pks:
+            expiration = entries.get(pk)
+            if expiration is None:
+                continue
+            if expiration <= now:
+                del entries[pk]
+            else:
+                entries.move_to_end(pk)
+                known.add(pk)
+        return known
+
+    def exists(self, document_cls, pk):
+        """Return True if the pk is known to exist."""
+        return bool(self.known(document_cls, (pk,)))
+
+    def add(self, document_cls, pks):
+        """Register pks found in database."""
+        entries = self._collections.setdefault(
+            document_cls.opts.collection_name,
+            OrderedDict(),
+        )
+        expiration = self.timer() + self.ttl
+        for pk in pks:
+            entries[pk] = expiration
+            entries.move_to_end(pk)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def discard(self, document_cls, pk):
+        """Forget about a pk (e.g. once deleted)."""
+        entries = self._collections.get(document_cls.opts.collection_name)
+        if entries:
+            entries.pop(pk, None)
+
+    def clear(self, document_cls=None):
+        """Forget about the pks of a document's collection, or of all the
+        collections if no document is given."""
+        if document_cls is None:
+            self._collections.clear()
+        else:
+            self._collections.pop(document_cls.opts.collection_name, None)
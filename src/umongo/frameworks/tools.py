@@ -1,4 +1,19 @@
-from umongo.query_mapper import map_query
+import marshmallow as ma
+
+from bson.raw_bson import RawBSONDocument
+from pymongo.operations import InsertOne, ReplaceOne
+
+from umongo.exceptions import NotLoadedFieldError
+from umongo.fields import (
+    DictField,
+    EmbeddedField,
+    GenericReferenceField,
+    ListField,
+    ReferenceField,
+)
+from umongo.query_mapper import map_entry_with_dots, map_query
+
+DUPLICATE_KEY_ERROR_CODE = 11000
 
 
 def cook_find_filter(doc_cls, filter):
@@ -36,9 +51,474 @@ def cook_find_projection(doc_cls, projection):
     if isinstance(projection, list):
         projection = dict.fromkeys(projection, 1)
     projection = map_query(projection, doc_cls.schema.fields)
+    version_field = doc_cls.opts.version_field
+    if version_field is not None:
+        # Commits check the version, always retrieve it
+        key = doc_cls.schema.fields[version_field].attribute or version_field
+        if not projection.get(key, True):
+            del projection[key]
+        if any(
+            "$elemMatch" in value
+            if isinstance(value, dict)
+            else value and path != "_id"
+            for path, value in projection.items()
+        ):
+            projection[key] = 1
     return projection
 
 
+def cook_find_sort(doc_cls, sort):
+    """Replace field names in a sort specification by their database names.
+
+    :param sort: a list of ``(field name, direction)`` pairs, or a dict
+    """
+    if isinstance(sort, dict):
+        sort = sort.items()
+    return [
+        (map_entry_with_dots(key, doc_cls.schema.fields)[0], direction)
+        for key, direction in sort
+    ]
+
+
+def cook_find_args_projection(doc_cls, args, kwargs):
+    """Cook the projection passed to ``find``, either as first positional
+    argument or as keyword argument.
+
+    :return: the arguments to pass to the driver and the cooked projection
+    """
+    if args and args[0]:
+        projection = cook_find_projection(doc_cls, args[0])
+        args = (projection, *args[1:])
+    elif kwargs.get("projection"):
+        projection = cook_find_projection(doc_cls, kwargs["projection"])
+        kwargs = {**kwargs, "projection": projection}
+    else:
+        projection = None
+    return args, kwargs, projection
+
+
+def _map_update_path(path, fields):
+    """Map a dotted path of an update to its database name.
+
+    :return: the mapped path and the field it targets, None if unknown
+    """
+    mapped = []
+    field = None
+    entries = path.split(".")
+    for index, entry in enumerate(entries):
+        if index and field is None:
+            # Unknown target, keep the rest of the path as is
+            mapped.extend(entries[index:])
+            break
+        if isinstance(field, ListField) and (entry.isdigit() or entry[0] == "$"):
+            # Index or positional operator
+            field = field.inner
+            mapped.append(entry)
+            continue
+        if isinstance(field, DictField):
+            field = field.value_field
+            mapped.append(entry)
+            continue
+        if isinstance(field, EmbeddedField):
+            fields = field.embedded_document_cls.schema.fields
+        elif field is not None:
+            fields = {}
+        field = fields.get(entry)
+        mapped.append(getattr(field, "attribute", None) or entry)
+    return ".".join(mapped), field
+
+
+def _serialize_update_value(field, value):
+    if field is None:
+        return value
+    return field.serialize_to_mongo(field.deserialize(value))
+
+
+def _serialize_update_items(field, items):
+    inner = getattr(field, "inner", None)
+    return [_serialize_update_value(inner, item) for item in items]
+
+
+def cook_update(doc_cls, update):
+    """Replace the fields' name of an update by the one they have in database
+    and serialize the values of its operators with the fields.
+    """
+    cooked = {}
+    for operator, operations in update.items():
+        cooked_operations = cooked[operator] = {}
+        for path, value in operations.items():
+            mapped_path, field = _map_update_path(path, doc_cls.schema.fields)
+            if operator in ("$set", "$setOnInsert", "$inc", "$mul", "$min", "$max"):
+                value = _serialize_update_value(field, value)
+            elif operator in ("$push", "$addToSet"):
+                if isinstance(value, dict) and "$each" in value:
+                    value = {
+                        **value,
+                        "$each": _serialize_update_items(field, value["$each"]),
+                    }
+                else:
+                    value = _serialize_update_value(
+                        getattr(field, "inner", None), value
+                    )
+            elif operator == "$pullAll":
+                value = _serialize_update_items(field, value)
+            elif operator == "$pull":
+                inner = getattr(field, "inner", None)
+                if isinstance(value, dict):
+                    # Condition on the items
+                    if isinstance(inner, EmbeddedField):
+                        fields = inner.embedded_document_cls.schema.fields
+                        value = map_query(value, fields)
+                else:
+                    value = _serialize_update_value(inner, value)
+            elif operator == "$rename":
+                value, _ = _map_update_path(value, doc_cls.schema.fields)
+            cooked_operations[mapped_path] = value
+    return cooked
+
+
+def build_modified_document(doc_cls, data, **kwargs):
+    """Build the document returned by a ``find_one_and_*`` command.
+
+    The identity map of a unit of work is not used: the returned data comes
+    from the command and supersedes the one of the documents of the session,
+    which must be replaced.
+    """
+    if data is None:
+        return None
+    return doc_cls.build_from_mongo(data, use_cls=True, **kwargs)
+
+
+def unique_error_messages(doc_cls, key_pattern):
+    """Return the :class:`marshmallow.ValidationError` messages matching the
+    ``keyPattern`` of a duplicate key error, None if a key in the index is
+    unknown from umongo.
+    """
+    # Sort value to make testing easier for compound indexes
+    keys = sorted(key_pattern.keys())
+    try:
+        fields = [doc_cls.schema.fields[k] for k in keys]
+    except KeyError:
+        return None
+    if len(keys) == 1:
+        return {keys[0]: fields[0].error_messages["unique"]}
+    return {
+        k: f.error_messages["unique_compound"].format(fields=keys)
+        for k, f in zip(keys, fields, strict=True)
+    }
+
+
+def bulk_commit_batches(entries, batch_size):
+    """Group ``(index, document, operation)`` bulk commit entries by
+    collection and split them in batches of at most ``batch_size`` entries.
+
+    :return: an iterator of ``(collection, entries)``
+    """
+    by_collection = {}
+    for entry in entries:
+        by_collection.setdefault(entry[1].opts.collection_name, []).append(entry)
+    for collection_entries in by_collection.values():
+        collection = collection_entries[0][1].collection
+        for start in range(0, len(collection_entries), batch_size):
+            yield collection, collection_entries[start : start + batch_size]
+
+
+def split_bulk_write_error(batch, details, ordered):
+    """Split the entries of a batch whose bulk write failed.
+
+    :param details: ``details`` of the :class:`pymongo.errors.BulkWriteError`
+    :return: the entries written and the validation error messages of the
+        entries not written because of a duplicate key, by document index.
+        Messages are None if an error cannot be turned into a validation
+        error (not a duplicate key or unknown index keys).
+    """
+    failed = {error["index"]: error for error in details.get("writeErrors", ())}
+    if ordered:
+        # Operations following the first error are not run
+        done = batch[: min(failed, default=len(batch))]
+    else:
+        done = [entry for pos, entry in enumerate(batch) if pos not in failed]
+    errors = {}
+    for pos, error in failed.items():
+        index, doc, _ = batch[pos]
+        messages = None
+        if error.get("code") == DUPLICATE_KEY_ERROR_CODE and "keyPattern" in error:
+            messages = unique_error_messages(type(doc), error["keyPattern"])
+        if messages is None:
+            return done, None
+        errors[index] = messages
+    return done, errors
+
+
+def _bulk_update_applied(doc, operation, raw):
+    """Tell whether the database holds the document as left by its bulk
+    update or replacement ``operation``.
+
+    :param raw: the document retrieved from database, None if not found.
+    """
+    if raw is None:
+        return False
+    ignored = {"_id"}
+    name = doc.opts.version_field
+    if name is not None:
+        key = doc.schema.fields[name].attribute or name
+        if raw.get(key) != (operation._filter.get(key) or 0) + 1:
+            return False
+        # Another commit may have incremented the version from the same
+        # one, the other fields tell which commit it was
+        ignored.add(key)
+    if isinstance(operation, ReplaceOne):
+        keys = set(operation._doc)
+    else:
+        keys = {
+            path.partition(".")[0]
+            for paths in operation._doc.values()
+            for path in paths
+        }
+    stored = doc.DataProxy._build_empty()
+    stored.from_mongo(raw)
+    fields = doc._data._fields_from_mongo_key
+    return all(
+        stored.get(fields[key].name, shared=True)
+        == doc._data.get(fields[key].name, shared=True)
+        for key in keys
+        if key in fields and key not in ignored
+    )
+
+
+def split_unmatched_updates(batch, stored):
+    """Split the entries of a batch whose bulk write matched less documents
+    than it updates.
+
+    :param stored: the documents of the batch retrieved from database once
+        written, by pk.
+    :return: the entries written and the entries of the updates which didn't
+        match their document.
+    """
+    done = []
+    unmatched = []
+    for entry in batch:
+        _, doc, operation = entry
+        if isinstance(operation, InsertOne) or _bulk_update_applied(
+            doc, operation, stored.get(doc.pk)
+        ):
+            done.append(entry)
+        else:
+            unmatched.append(entry)
+    return done, unmatched
+
+
+def _reference_collection_key(document_cls):
+    return (document_cls.opts.instance, document_cls.opts.collection_name)
+
+
+def reference_check_key(reference):
+    """Return the key of a reference in the result of a batched existence
+    check of references."""
+    return (*_reference_collection_key(reference.document_cls), reference.pk)
+
+
+def _collect_field_references(field, value, references):
+    if value is None or value is ma.missing:
+        return
+    if isinstance(field, ReferenceField):
+        key = _reference_collection_key(value.document_cls)
+        references.setdefault(key, (value.document_cls, set()))[1].add(value.pk)
+    elif isinstance(field, ListField):
+        for item in value:
+            _collect_field_references(field.inner, item, references)
+    elif isinstance(field, DictField):
+        if field.value_field:
+            for item in value.values():
+                _collect_field_references(field.value_field, item, references)
+    elif isinstance(field, EmbeddedField):
+        collect_references(value.schema, value._data, references=references)
+
+
+def collect_references(schema, data_proxy, partial=None, references=None):
+    """Collect the references of a document and of its embedded documents,
+    which existence is checked by ``io_validate``.
+
+    :param partial: Names of the fields to collect the references of.
+    :return: A dict of ``(referenced document class, set of pks)`` by
+        referenced collection.
+    """
+    if references is None:
+        references = {}
+    for name, field in schema.fields.items():
+        if partial and name not in partial:
+            continue
+        value = data_proxy.get(name, shared=True)
+        _collect_field_references(field, value, references)
+    return references
+
+
+def cached_references(document_cls, pks):
+    """Return the pks known to exist by the reference cache of the document's
+    instance among the given ones."""
+    reference_cache = document_cls.opts.instance.reference_cache
+    if reference_cache is None:
+        return set()
+    return reference_cache.known(document_cls, pks)
+
+
+def cache_references(document_cls, pks):
+    """Register pks found in database into the reference cache of the
+    document's instance, if any."""
+    reference_cache = document_cls.opts.instance.reference_cache
+    if reference_cache is not None:
+        reference_cache.add(document_cls, pks)
+
+
+def uncache_references(document_cls, pk=None):
+    """Remove a deleted pk, or all the pks of the document's collection if
+    not known, from the reference cache of the document's instance."""
+    reference_cache = document_cls.opts.instance.reference_cache
+    if reference_cache is None:
+        return
+    if pk is None:
+        reference_cache.clear(document_cls)
+    else:
+        reference_cache.discard(document_cls, pk)
+
+
+def _collect_path_references(field, value, names, references):
+    if value is None or value is ma.missing:
+        return
+    if isinstance(field, ListField):
+        for item in value:
+            _collect_path_references(field.inner, item, names, references)
+    elif isinstance(field, DictField):
+        if field.value_field:
+            for item in value.values():
+                _collect_path_references(field.value_field, item, names, references)
+    elif isinstance(field, EmbeddedField):
+        if names:
+            _collect_data_proxy_path_references(value._data, names, references)
+    elif isinstance(field, (ReferenceField, GenericReferenceField)):
+        if not names and value._document is None:
+            references.setdefault(value.document_cls, []).append(value)
+
+
+def _collect_data_proxy_path_references(data_proxy, names, references):
+    name, *names = names
+    # Embedded documents of different classes may not have the field
+    if name not in data_proxy._fields:
+        return
+    try:
+        value = data_proxy.get(name, shared=True)
+    except NotLoadedFieldError:
+        return
+    field = data_proxy._fields[name]
+    _collect_path_references(field, value, names, references)
+
+
+def collect_prefetch_references(docs, paths):
+    """Collect the references not fetched yet of documents to prefetch.
+
+    :param paths: Names of the reference fields, or of the lists and dicts of
+        references, with dots to go through embedded documents
+        (e.g. ``comments.author``).
+    :return: A dict of the references by referenced document class.
+    """
+    references = {}
+    split_paths = [path.split(".") for path in paths]
+    for doc in docs:
+        for names in split_paths:
+            _collect_data_proxy_path_references(doc._data, names, references)
+    return references
+
+
+def _populated_document_cls(doc_cls, name):
+    field = doc_cls.schema.fields.get(name)
+    if isinstance(field, ListField):
+        field = field.inner
+    if not isinstance(field, ReferenceField):
+        raise TypeError(
+            f"Field `{name}` of {doc_cls.__name__} must be a reference field "
+            "or a list of references to be populated",
+        )
+    return field.document_cls
+
+
+def cook_populate_pipeline(doc_cls, filter, populate, sort=None, skip=None, limit=None):
+    """Build the aggregation pipeline of ``find_populated``.
+
+    Documents matching the filter are joined with the documents referenced
+    by the fields to populate with a ``$lookup`` stage per field.
+
+    :return: the pipeline and the ``(field name, referenced document class,
+        join alias)`` of the fields to populate
+    """
+    filter = cook_find_filter(doc_cls, filter) or {}
+    if not isinstance(filter, dict):
+        filter = {"_id": filter}
+    pipeline = [{"$match": filter}]
+    if sort:
+        pipeline.append({"$sort": dict(cook_find_sort(doc_cls, sort))})
+    if skip:
+        pipeline.append({"$skip": skip})
+    if limit:
+        pipeline.append({"$limit": limit})
+    joins = []
+    for index, name in enumerate(populate):
+        document_cls = _populated_document_cls(doc_cls, name)
+        field = doc_cls.schema.fields[name]
+        alias = f"__populate_{index}"
+        pipeline.append(
+            {
+                "$lookup": {
+                    "from": document_cls.opts.collection_name,
+                    "localField": field.attribute or name,
+                    "foreignField": "_id",
+                    "as": alias,
+                },
+            },
+        )
+        joins.append((name, document_cls, alias))
+    return pipeline, joins
+
+
+def _build_document(document_cls, data, **kwargs):
+    return document_cls.build_from_mongo(data, **kwargs)
+
+
+def build_populated_document(
+    doc_cls, data, joins, build_from_mongo=_build_document, **kwargs
+):
+    """Build a document retrieved by ``find_populated`` and attach the joined
+    documents to its references.
+
+    :param build_from_mongo: Function building a document from the document
+        class and MongoDB data, the ``build_from_mongo`` of the document class
+        by default.
+    """
+    joined = {name: data.pop(alias, ()) for name, _, alias in joins}
+    doc = build_from_mongo(doc_cls, data, use_cls=True, **kwargs)
+    for name, document_cls, _ in joins:
+        joined_docs = {
+            item["_id"]: build_from_mongo(document_cls, item, use_cls=True, **kwargs)
+            for item in joined[name]
+        }
+        for references in collect_prefetch_references([doc], [name]).values():
+            for reference in references:
+                reference._document = joined_docs.get(reference.pk)
+    return doc
+
+
+def raw_bson_collection(collection):
+    """Return the collection configured to retrieve documents as
+    :class:`bson.raw_bson.RawBSONDocument`.
+
+    Raw documents are only decoded when accessed, which lets lazy documents
+    decode only the fields they need.
+    """
+    codec_options = collection.codec_options.with_options(
+        document_class=RawBSONDocument,
+    )
+    return collection.with_options(codec_options=codec_options)
+
+
 def remove_cls_field_from_embedded_docs(dict_in, embedded_docs):
     """Recursively remove _cls field from nested embedded documents
 
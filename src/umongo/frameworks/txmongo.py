@@ -1,6 +1,12 @@
+from contextvars import ContextVar
+
 import marshmallow as ma
 
-from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.operations import InsertOne, ReplaceOne, UpdateOne
+from pymongo.results import BulkWriteResult
 from txmongo import filter as qf
 from txmongo.database import Database
 
@@ -20,16 +26,41 @@ from umongo.exceptions import (
     NotCreatedError,
     UpdateError,
 )
-from umongo.fields import DictField, EmbeddedField, ListField, ReferenceField
+from umongo.fields import (
+    DictField,
+    EmbeddedField,
+    GenericReferenceField,
+    ListField,
+    ReferenceField,
+)
 from umongo.instance import Instance
 from umongo.query_mapper import map_query
 
 from .tools import (
+    build_modified_document,
+    build_populated_document,
+    bulk_commit_batches,
+    cache_references,
+    cached_references,
+    collect_prefetch_references,
+    collect_references,
+    cook_find_args_projection,
     cook_find_filter,
     cook_find_projection,
+    cook_find_sort,
+    cook_populate_pipeline,
+    cook_update,
+    reference_check_key,
     remove_cls_field_from_embedded_docs,
+    split_bulk_write_error,
+    split_unmatched_updates,
+    uncache_references,
+    unique_error_messages,
 )
 
+# Existence of the references checked at once by `io_validate`
+CHECKED_REFERENCES = ContextVar("checked_references", default=None)
+
 
 class TxMongoDocument(DocumentImplementation):
     __slots__ = ()
@@ -48,8 +79,28 @@ class TxMongoDocument(DocumentImplementation):
         ret = yield self.collection.find_one(self.pk)
         if ret is None:
             raise NotCreatedError("Document doesn't exists in database")
-        self._data = self.DataProxy()
-        self._data.from_mongo(ret)
+        self._data = self.DataProxy._build_empty()
+        self._data.from_mongo(ret, lazy=self.opts.lazy)
+
+    @inlineCallbacks
+    def load_missing(self):
+        """Retrieve from database the fields left out by the projection used
+        to find the document, in a single query.
+
+        Raises :class:`umongo.exceptions.NotCreatedError` if the document
+        doesn't exist in database.
+        """
+        if not self.is_partial():
+            return
+        if not self.is_created:
+            raise NotCreatedError("Document doesn't exists in database")
+        ret = yield self.collection.find_one(
+            self.pk,
+            projection=dict.fromkeys(self._data._not_loaded, True),
+        )
+        if ret is None:
+            raise NotCreatedError("Document doesn't exists in database")
+        self._data._load_not_loaded(ret)
 
     @inlineCallbacks
     def commit(self, io_validate_all=False, conditions=None, replace=False):
@@ -78,14 +129,21 @@ class TxMongoDocument(DocumentImplementation):
                         query.update(map_query(additional_filter, self.schema.fields))
                     self.required_validate()
                     yield self.io_validate(validate_all=io_validate_all)
-                    if replace:
+                    if replace and not self.is_partial():
                         payload = self._data.to_mongo(update=False)
+                        self._guard_version(query, payload, replacement=True)
                         ret = yield self.collection.replace_one(query, payload)
                     else:
-                        payload = self._data.to_mongo(update=True)
+                        if replace:
+                            # Fields not loaded are left as is in database
+                            payload = self._data._to_mongo_loaded_update()
+                        else:
+                            payload = self._data.to_mongo(update=True)
+                        self._guard_version(query, payload)
                         ret = yield self.collection.update_one(query, payload)
                     if ret.matched_count != 1:
-                        raise UpdateError(ret)
+                        raise self._update_error(ret)
+                    self._increment_version()
                     yield maybeDeferred(self.post_update, ret)
                 else:
                     ret = None
@@ -97,6 +155,7 @@ class TxMongoDocument(DocumentImplementation):
                 yield maybeDeferred(self.pre_insert)
                 self.required_validate()
                 yield self.io_validate(validate_all=io_validate_all)
+                self._init_version()
                 payload = self._data.to_mongo(update=False)
                 ret = yield self.collection.insert_one(payload)
                 # TODO: check ret ?
@@ -104,25 +163,59 @@ class TxMongoDocument(DocumentImplementation):
                 self.is_created = True
                 yield maybeDeferred(self.post_insert, ret)
         except DuplicateKeyError as exc:
-            # Sort value to make testing easier for compound indexes
-            keys = sorted(exc.details["keyPattern"].keys())
-            try:
-                fields = [self.schema.fields[k] for k in keys]
-            except KeyError:
+            messages = unique_error_messages(type(self), exc.details["keyPattern"])
+            if messages is None:
                 # A key in the index is unknown from umongo
                 raise exc from None
-            if len(keys) == 1:
-                msg = fields[0].error_messages["unique"]
-                raise ma.ValidationError({keys[0]: msg}) from exc
-            raise ma.ValidationError(
-                {
-                    k: f.error_messages["unique_compound"].format(fields=keys)
-                    for k, f in zip(keys, fields, strict=True)
-                },
-            ) from exc
+            raise ma.ValidationError(messages) from exc
         self._data.clear_modified()
         return ret
 
+    @inlineCallbacks
+    def _bulk_commit_operation(self, io_validate_all=False, replace=False):
+        """Run the hooks and validation of :meth:`commit` and return the
+        matching bulk write operation, None if there is nothing to commit.
+        """
+        if self.is_created:
+            if not (self.is_modified() or replace):
+                return None
+            query = {"_id": self.pk}
+            additional_filter = yield maybeDeferred(self.pre_update)
+            if additional_filter:
+                query.update(map_query(additional_filter, self.schema.fields))
+            self.required_validate()
+            yield self.io_validate(validate_all=io_validate_all)
+            if replace and not self.is_partial():
+                payload = self._data.to_mongo(update=False)
+                self._guard_version(query, payload, replacement=True)
+                return ReplaceOne(query, payload)
+            if replace:
+                payload = self._data._to_mongo_loaded_update()
+            else:
+                payload = self._data.to_mongo(update=True)
+            self._guard_version(query, payload)
+            return UpdateOne(query, payload)
+        yield maybeDeferred(self.pre_insert)
+        self.required_validate()
+        yield self.io_validate(validate_all=io_validate_all)
+        self._init_version()
+        payload = self._data.to_mongo(update=False)
+        # Generate the id as the driver would, to retrieve it once inserted
+        payload.setdefault("_id", ObjectId())
+        return InsertOne(payload)
+
+    @inlineCallbacks
+    def _bulk_commit_done(self, operation, ret):
+        """Update the document once its bulk write operation is done."""
+        if isinstance(operation, InsertOne):
+            self._data.set(self.pk_field, operation._doc["_id"])
+            self.is_created = True
+            yield maybeDeferred(self.post_insert, ret)
+        else:
+            self._increment_version()
+            yield maybeDeferred(self.post_update, ret)
+        self._data.clear_modified()
+
     @inlineCallbacks
     def delete(self, conditions=None):
         """Remove the document from database.
@@ -147,12 +240,14 @@ class TxMongoDocument(DocumentImplementation):
         if additional_filter:
             query.update(map_query(additional_filter, self.schema.fields))
         ret = yield self.collection.delete_one(query)
+        uncache_references(type(self), self.pk)
         if ret.deleted_count != 1:
             raise DeleteError(ret)
         self.is_created = False
         yield maybeDeferred(self.post_delete, ret)
         return ret
 
+    @inlineCallbacks
     def io_validate(self, validate_all=False):
         """Run the io_validators of the document's fields.
 
@@ -160,17 +255,24 @@ class TxMongoDocument(DocumentImplementation):
             fields that have been modified.
         """
         if validate_all:
-            return _io_validate_data_proxy(self.schema, self._data)
-        return _io_validate_data_proxy(
-            self.schema,
-            self._data,
-            partial=self._data.get_modified_fields(),
-        )
+            partial = self._data.get_loaded_fields()
+        else:
+            partial = self._data.get_modified_fields() or self._data.get_loaded_fields()
+        checked = yield _check_references(self.schema, self._data, partial)
+        token = CHECKED_REFERENCES.set(checked)
+        try:
+            yield _io_validate_data_proxy(self.schema, self._data, partial=partial)
+        finally:
+            CHECKED_REFERENCES.reset(token)
 
     @classmethod
     @inlineCallbacks
-    def find_one(cls, filter=None, projection=None, **kwargs):
-        """Find a single document in database."""
+    def find_one(cls, filter=None, projection=None, lazy=None, **kwargs):
+        """Find a single document in database.
+
+        :param lazy: if True, the document's fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+        """
         filter = cook_find_filter(cls, filter)
         if projection:
             projection = cook_find_projection(cls, projection)
@@ -180,28 +282,53 @@ class TxMongoDocument(DocumentImplementation):
             **kwargs,
         )
         if ret is not None:
-            ret = cls.build_from_mongo(ret, use_cls=True)
+            ret = cls.build_from_mongo(
+                ret,
+                use_cls=True,
+                lazy=lazy,
+                projection=projection,
+            )
         return ret
 
     @classmethod
     @inlineCallbacks
-    def find(cls, filter=None, *args, **kwargs):
+    def find(cls, filter=None, *args, lazy=None, prefetch=None, **kwargs):
         """Find a list document in database.
 
+        :param lazy: if True, the documents' fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+        :param prefetch: Names of the reference fields, or of the lists and
+            dicts of references, with dots to go through embedded documents
+            (e.g. ``comments.author``). The documents they reference are
+            fetched with a single query per referenced document class.
+
         Returns a list of Documents.
         """
         filter = cook_find_filter(cls, filter)
+        args, kwargs, projection = cook_find_args_projection(cls, args, kwargs)
         raw_cursor_or_list = yield cls.collection.find(filter, *args, **kwargs)
-        return [cls.build_from_mongo(e, use_cls=True) for e in raw_cursor_or_list]
+        docs = [
+            cls.build_from_mongo(e, use_cls=True, lazy=lazy, projection=projection)
+            for e in raw_cursor_or_list
+        ]
+        if prefetch:
+            yield _prefetch_references(docs, prefetch)
+        return docs
 
     @classmethod
     @inlineCallbacks
-    def find_with_cursor(cls, filter=None, *args, **kwargs):
+    def find_with_cursor(cls, filter=None, *args, lazy=None, prefetch=None, **kwargs):
         """Find a list document in database.
 
+        :param lazy: if True, the documents' fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+        :param prefetch: Paths of the references to fetch by batch, see
+            :meth:`find`.
+
         Returns a cursor that provides Documents.
         """
         filter = cook_find_filter(cls, filter)
+        args, kwargs, projection = cook_find_args_projection(cls, args, kwargs)
         raw_cursor_or_list = yield cls.collection.find_with_cursor(
             filter,
             *args,
@@ -212,9 +339,49 @@ class TxMongoDocument(DocumentImplementation):
             cursor = result[1]
             if cursor is not None:
                 cursor.addCallback(wrap_raw_results)
-            return ([cls.build_from_mongo(e, use_cls=True) for e in result[0]], cursor)
+            docs = [
+                cls.build_from_mongo(e, use_cls=True, lazy=lazy, projection=projection)
+                for e in result[0]
+            ]
+            if prefetch:
+                defer = _prefetch_references(docs, prefetch)
+                return defer.addCallback(lambda _: (docs, cursor))
+            return (docs, cursor)
+
+        ret = yield maybeDeferred(wrap_raw_results, raw_cursor_or_list)
+        return ret
 
-        return wrap_raw_results(raw_cursor_or_list)
+    @classmethod
+    @inlineCallbacks
+    def find_populated(
+        cls,
+        filter=None,
+        populate=(),
+        sort=None,
+        skip=None,
+        limit=None,
+        lazy=None,
+        **kwargs,
+    ):
+        """Find documents in database along with the documents they
+        reference, joined with a ``$lookup`` stage of an aggregation.
+
+        :param populate: Names of the reference fields, or lists of
+            references, whose referenced documents are attached to the
+            references.
+        :param sort: a list of ``(field name, direction)`` pairs, or a dict
+        :param lazy: if True, the documents' fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+
+        Returns a list of Documents.
+        """
+        pipeline, joins = cook_populate_pipeline(
+            cls, filter, populate, sort=sort, skip=skip, limit=limit
+        )
+        raw_docs = yield cls.collection.aggregate(pipeline, **kwargs)
+        return [
+            build_populated_document(cls, data, joins, lazy=lazy) for data in raw_docs
+        ]
 
     @classmethod
     def count(cls, filter=None, **kwargs):
@@ -222,6 +389,97 @@ class TxMongoDocument(DocumentImplementation):
         filter = cook_find_filter(cls, filter)
         return cls.collection.count(filter=filter, **kwargs)
 
+    @classmethod
+    def update_many(cls, filter, update, **kwargs):
+        """Update the documents matching the filter in database.
+
+        Field names of the filter and of the update are replaced by the ones
+        used in database and the values of the update operators are
+        deserialized and serialized by the matching fields.
+
+        :return: A :class:`pymongo.results.UpdateResult`
+        """
+        return cls.collection.update_many(
+            cook_find_filter(cls, filter),
+            cook_update(cls, update),
+            **kwargs,
+        )
+
+    @classmethod
+    @inlineCallbacks
+    def delete_many(cls, filter, **kwargs):
+        """Delete the documents matching the filter from database.
+
+        :return: A :class:`pymongo.results.DeleteResult`
+        """
+        ret = yield cls.collection.delete_many(cook_find_filter(cls, filter), **kwargs)
+        uncache_references(cls)
+        return ret
+
+    @classmethod
+    @inlineCallbacks
+    def find_one_and_update(
+        cls,
+        filter,
+        update,
+        projection=None,
+        sort=None,
+        upsert=False,
+        return_document=ReturnDocument.BEFORE,
+        lazy=None,
+        **kwargs,
+    ):
+        """Atomically update a single document and return it.
+
+        Field names of the filter, the update, the projection and the sort are
+        replaced by the ones used in database and the update is serialized as
+        with :meth:`update_many`.
+
+        :param return_document: :attr:`pymongo.ReturnDocument.BEFORE` to
+            return the document as it was before the update,
+            :attr:`pymongo.ReturnDocument.AFTER` to return the updated one
+        :param lazy: if True, the document's fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+
+        :return: The matching Document or None.
+        """
+        if projection:
+            projection = cook_find_projection(cls, projection)
+        ret = yield cls.collection.find_one_and_update(
+            cook_find_filter(cls, filter),
+            cook_update(cls, update),
+            projection=projection,
+            sort=None if sort is None else qf.sort(cook_find_sort(cls, sort)),
+            upsert=upsert,
+            return_document=return_document,
+            **kwargs,
+        )
+        return build_modified_document(cls, ret, lazy=lazy, projection=projection)
+
+    @classmethod
+    @inlineCallbacks
+    def find_one_and_delete(
+        cls, filter, projection=None, sort=None, lazy=None, **kwargs
+    ):
+        """Atomically delete a single document and return it.
+
+        :param lazy: if True, the document's fields are deserialized on
+            first access (default: ``lazy`` Meta option)
+
+        :return: The deleted Document or None.
+        """
+        if projection:
+            projection = cook_find_projection(cls, projection)
+        ret = yield cls.collection.find_one_and_delete(
+            cook_find_filter(cls, filter),
+            projection=projection,
+            sort=None if sort is None else qf.sort(cook_find_sort(cls, sort)),
+            **kwargs,
+        )
+        if ret is not None:
+            uncache_references(cls, ret.get("_id"))
+        return build_modified_document(cls, ret, lazy=lazy, projection=projection)
+
     @classmethod
     @inlineCallbacks
     def ensure_indexes(cls):
@@ -279,7 +537,7 @@ def _io_validate_data_proxy(schema, data_proxy, partial=None):
     for name, field in schema.fields.items():
         if partial and name not in partial:
             continue
-        value = data_proxy.get(name)
+        value = data_proxy.get(name, shared=True)
         if value is ma.missing:
             continue
         try:
@@ -296,11 +554,57 @@ def _io_validate_data_proxy(schema, data_proxy, partial=None):
         raise ma.ValidationError(errors)
 
 
+@inlineCallbacks
+def _prefetch_references(docs, paths):
+    """Fetch the documents referenced by the given paths of the documents,
+    with a single query per referenced document class."""
+    references = collect_prefetch_references(docs, paths)
+    for document_cls, class_references in references.items():
+        pks = list({reference.pk for reference in class_references})
+        fetched_docs = yield document_cls.find({"_id": {"$in": pks}})
+        fetched = {doc.pk: doc for doc in fetched_docs}
+        for reference in class_references:
+            reference._document = fetched.get(reference.pk)
+
+
+@inlineCallbacks
+def _check_references(schema, data_proxy, partial):
+    """Check the existence of the references of a document with a single
+    query per referenced collection.
+
+    :return: A dict of the existence of the references by check key.
+    """
+    checked = {}
+    references = collect_references(schema, data_proxy, partial=partial)
+    for key, (document_cls, pks) in references.items():
+        found = cached_references(document_cls, pks)
+        if len(found) < len(pks):
+            docs = yield document_cls.collection.find(
+                {"_id": {"$in": list(pks - found)}},
+                projection={"_id": True},
+            )
+            queried = {doc["_id"] for doc in docs}
+            cache_references(document_cls, queried)
+            found |= queried
+        for pk in pks:
+            checked[(*key, pk)] = pk in found
+    return checked
+
+
 @inlineCallbacks
 def _reference_io_validate(field, value):
     if value is None:
         return
-    yield value.fetch(no_data=True)
+    checked = CHECKED_REFERENCES.get()
+    exists = checked.get(reference_check_key(value)) if checked else None
+    if exists is None:
+        exists = yield value.exists
+    if not exists:
+        raise ma.ValidationError(
+            value.error_messages["not_found"].format(
+                document=value.document_cls.__name__,
+            ),
+        )
 
 
 @inlineCallbacks
@@ -364,9 +668,25 @@ class TxMongoReference(Reference):
                 )
         return self._document
 
+    @property
+    @inlineCallbacks
+    def exists(self):
+        if cached_references(self.document_cls, (self.pk,)):
+            return True
+        ret = yield self.document_cls.collection.find_one(
+            self.pk,
+            projection={"_id": True},
+        )
+        exists = ret is not None
+        if exists:
+            cache_references(self.document_cls, (self.pk,))
+        return exists
+
 
 class TxMongoBuilder(BaseBuilder):
     BASE_DOCUMENT_CLS = TxMongoDocument
+    # txmongo's `with_options` ignores read concern and read preference
+    COLLECTION_OPTIONS = ("write_concern", "codec_options")
 
     def _patch_field(self, field):
         super()._patch_field(field)
@@ -387,6 +707,8 @@ class TxMongoBuilder(BaseBuilder):
         if isinstance(field, ReferenceField):
             field.io_validate.append(_reference_io_validate)
             field.reference_cls = TxMongoReference
+        if isinstance(field, GenericReferenceField):
+            field.reference_cls = TxMongoReference
         if isinstance(field, EmbeddedField):
             field.io_validate_recursive = _embedded_document_io_validate
 
@@ -400,6 +722,99 @@ class TxMongoInstance(Instance):
     def is_compatible_with(db):
         return isinstance(db, Database)
 
+    @inlineCallbacks
+    def commit_many(
+        self,
+        docs,
+        *,
+        ordered=True,
+        io_validate_all=False,
+        replace=False,
+        batch_size=1000,
+    ):
+        """Commit several documents with bulk writes.
+
+        The hooks and validation of :meth:`TxMongoDocument.commit` are run
+        for every document before anything is written. The operations are
+        then sent with one ``bulk_write`` per collection and per
+        ``batch_size`` documents.
+
+        :param docs: Documents to commit.
+        :param ordered: Stop at the first failed write, otherwise try to
+            write all the documents.
+        :param io_validate_all: Validate all field instead of only changed ones.
+        :param replace: Replace the documents rather than update.
+        :param batch_size: Maximum number of operations per ``bulk_write``.
+        :return: The list of :class:`pymongo.results.BulkWriteResult`.
+
+        Raises :class:`marshmallow.ValidationError` with the messages of the
+        documents failing validation or violating a unique index, by index
+        of the document in ``docs``. Raises
+        :class:`umongo.exceptions.UpdateError` (or
+        :class:`umongo.exceptions.VersionConflictError` if versioned) if
+        documents to update are not matched, along with these documents by
+        index, once the other documents of the batch are committed.
+        """
+        entries = []
+        errors = {}
+        for index, doc in enumerate(docs):
+            try:
+                operation = yield doc._bulk_commit_operation(
+                    io_validate_all=io_validate_all,
+                    replace=replace,
+                )
+            except ma.ValidationError as exc:
+                errors[index] = exc.messages
+                continue
+            if operation is not None:
+                entries.append((index, doc, operation))
+        if errors:
+            raise ma.ValidationError(errors)
+
+        results = []
+        for collection, batch in bulk_commit_batches(entries, batch_size):
+            try:
+                ret = yield collection.bulk_write(
+                    [operation for _, _, operation in batch],
+                    ordered=ordered,
+                )
+            except BulkWriteError as exc:
+                ret = BulkWriteResult(exc.details, acknowledged=True)
+                done, batch_errors = split_bulk_write_error(
+                    batch,
+                    exc.details,
+                    ordered,
+                )
+                for _, doc, operation in done:
+                    yield doc._bulk_commit_done(operation, ret)
+                if batch_errors is None:
+                    raise
+                errors.update(batch_errors)
+                if ordered:
+                    raise ma.ValidationError(errors) from exc
+                results.append(ret)
+                continue
+            updates = [entry for entry in batch if not isinstance(entry[2], InsertOne)]
+            unmatched = []
+            if ret.matched_count != len(updates):
+                # Find out which documents were not matched by their update
+                raws = yield collection.find(
+                    {"_id": {"$in": [doc.pk for _, doc, _ in updates]}},
+                )
+                stored = {raw["_id"]: raw for raw in raws}
+                batch, unmatched = split_unmatched_updates(batch, stored)
+            for _, doc, operation in batch:
+                yield doc._bulk_commit_done(operation, ret)
+            if unmatched:
+                raise unmatched[0][1]._update_error(
+                    ret,
+                    {index: doc for index, doc, _ in unmatched},
+                )
+            results.append(ret)
+        if errors:
+            raise ma.ValidationError(errors)
+        return results
+
 
 class TxMongoMigrationInstance(TxMongoInstance):
     """TxMongo instance with migration features"""
@@ -0,0 +1,90 @@
+"""Unit of work of an instance session
+
+Keeps a single document per primary key among the documents retrieved during
+the session (identity map) and gathers the documents to commit so they are
+written together when the session ends or is flushed.
+"""
+
+__all__ = ("UnitOfWork",)
+
+
+class UnitOfWork:
+    """Identity map and pending commits of a session
+
+    Documents are identified by their collection and primary key, documents
+    of classes sharing a collection therefore share the identity map.
+    """
+
+    __slots__ = ("identity_map", "pending")
+
+    def __init__(self):
+        self.identity_map = {}
+        # Documents to commit, by id to keep a single entry per document
+        self.pending = {}
+
+    @staticmethod
+    def _key(document_cls, pk):
+        return (document_cls.opts.collection_name, pk)
+
+    def get(self, document_cls, pk):
+        """Return the document of the session with the given pk, if any."""
+        return self.identity_map.get(self._key(document_cls, pk))
+
+    def build_from_mongo(self, document_cls, data, **kwargs):
+        """Build a document from MongoDB data, or return the document of the
+        session with the same pk. In the latter case the data is ignored,
+        which keeps the modifications done on the document.
+
+        Partially loaded documents (e.g. with a projection) are not kept in
+        the session, they would be returned to queries expecting all fields.
+        """
+        pk = data.get("_id")
+        if pk is None:
+            return document_cls.build_from_mongo(data, **kwargs)
+        key = self._key(document_cls, pk)
+        doc = self.identity_map.get(key)
+        if doc is None:
+            doc = document_cls.build_from_mongo(data, **kwargs)
+            if not doc.is_partial():
+                self.identity_map[key] = doc
+        return doc
+
+    def replace(self, document_cls, pk, doc=None):
+        """Replace the document of the session with the given pk by a document
+        returned by a command modifying it in database, or forget about it if
+        no document is given (e.g. deleted) or if it is partially loaded.
+        """
+        key = self._key(document_cls, pk)
+        self.identity_map.pop(key, None)
+        if doc is not None and not doc.is_partial():
+            self.identity_map[key] = doc
+
+    def add(self, doc):
+        """Register a document to commit on flush."""
+        self.pending[id(doc)] = doc
+
+    def discard(self, doc):
+        """Forget about a document (e.g. once deleted)."""
+        self.pending.pop(id(doc), None)
+        if doc.is_created:
+            key = self._key(type(doc), doc.pk)
+            if self.identity_map.get(key) is doc:
+                del self.identity_map[key]
+
+    def dirty(self):
+        """Return the documents to commit: the ones registered with
+        :meth:`add`, then the modified documents of the identity map.
+        """
+        docs = dict(self.pending)
+        for doc in self.identity_map.values():
+            # Documents deleted meanwhile must not be inserted again
+            if id(doc) not in docs and doc.is_created and doc.is_modified():
+                docs[id(doc)] = doc
+        return list(docs.values())
+
+    def flushed(self, docs):
+        """Register committed documents in the identity map."""
+        self.pending.clear()
+        for doc in docs:
+            if doc.is_created and not doc.is_partial():
+                self.identity_map.setdefault(self._key(type(doc), doc.pk), doc)
@@ -31,11 +31,37 @@ class Instance(abc.ABC):
     .. note::
         Instance registration is divided between :class:`umongo.Document` and
         :class:`umongo.EmbeddedDocument`.
+
+    :param db: Database to use, may be set later with :meth:`set_db`.
+    :param compiled_dump: Dump documents registered into this instance with a
+        function generated for their schema rather than with marshmallow's
+        generic :meth:`marshmallow.Schema.dump`. The output is the same but
+        much faster to produce.
+    :param reference_cache_size: Maximum number of pks known to exist kept
+        per collection to check references without querying the database,
+        0 to disable the cache.
+    :param reference_cache_ttl: Number of seconds a referenced pk is
+        considered to exist once found in database.
     """
 
     BUILDER_CLS = None
 
-    def __init__(self, db=None):
+    def __init__(
+        self,
+        db=None,
+        *,
+        compiled_dump=False,
+        reference_cache_size=0,
+        reference_cache_ttl=60,
+    ):
+        self.compiled_dump = compiled_dump
+        self.reference_cache = None
+        if reference_cache_size:
+            from .frameworks.reference_cache import ReferenceCache  # noqa: PLC0415
+
+            self.reference_cache = ReferenceCache(
+                reference_cache_size, reference_cache_ttl
+            )
         self.builder = self.BUILDER_CLS(self)
         self._doc_lookup = {}
         self._embedded_lookup = {}
@@ -45,13 +71,13 @@ class Instance(abc.ABC):
             self.set_db(db)
 
     @classmethod
-    def from_db(cls, db):
+    def from_db(cls, db, **kwargs):
+        """Create an instance of the implementation compatible with the
+        database, the keyword arguments are passed to its constructor."""
         from .frameworks import find_instance_from_db  # noqa: PLC0415
 
         instance_cls = find_instance_from_db(db)
-        instance = instance_cls()
-        instance.set_db(db)
-        return instance
+        return instance_cls(db, **kwargs)
 
     def retrieve_document(self, name_or_template):
         """Retrieve a :class:`umongo.document.DocumentImplementation` registered
@@ -160,3 +186,8 @@ class Instance(abc.ABC):
         """
         assert self.is_compatible_with(db)
         self._db = db
+        # Collections are cached by the documents
+        for doc_cls in self._doc_lookup.values():
+            doc_cls._collection = None
+        if self.reference_cache is not None:
+            self.reference_cache.clear()
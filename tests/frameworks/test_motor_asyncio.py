@@ -7,6 +7,8 @@ import pytest
 import marshmallow as ma
 
 from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from pymongo import ReturnDocument
 from pymongo.collection import Collection
 from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
 
@@ -135,6 +137,121 @@ class TestMotorAsyncIO(BaseDBTest):
 
         loop.run_until_complete(do_test())
 
+    def test_commit_many(self, loop, instance, classroom_model):
+        Student = classroom_model.Student
+        Teacher = classroom_model.Teacher
+
+        async def do_test():
+            john = Student(name="John Doe")
+            await john.commit()
+            john.name = "William Doe"
+            jane = Student(name="Jane Doe")
+            teacher = Teacher(name="M. Strickland")
+            untouched = await Student.find_one(john.id)
+            ret = await instance.commit_many([john, jane, teacher, untouched])
+            assert [r.inserted_count for r in ret] == [1, 1]
+            assert [r.modified_count for r in ret] == [1, 0]
+            assert [doc.is_created for doc in (jane, teacher)] == [True, True]
+            assert [doc.is_modified() for doc in (john, jane)] == [False, False]
+            assert (await Student.find_one(john.id)).name == "William Doe"
+            assert (await Student.find_one(jane.id)).name == "Jane Doe"
+            assert (await Teacher.find_one(teacher.id)).name == "M. Strickland"
+
+            # Validation errors are raised before anything is written
+            with pytest.raises(ma.ValidationError) as exc:
+                await instance.commit_many([Student(name="Joe"), Student()])
+            assert exc.value.messages == {
+                1: {"name": ["Missing data for required field."]},
+            }
+            assert await Student.count_documents({"name": "Joe"}) == 0
+
+        loop.run_until_complete(do_test())
+
+    def test_update_many_delete_many(self, loop, instance):
+        @instance.register
+        class Animal(Document):
+            name = fields.StrField(attribute="n")
+            weight = fields.IntField(attribute="w")
+
+        @instance.register
+        class Dog(Animal):
+            pass
+
+        async def do_test():
+            await Animal.collection.drop()
+            for name in ("Scruffy", "Garfield"):
+                await Animal(name=name, weight=3).commit()
+            for name in ("Pluto", "Snoopy"):
+                await Dog(name=name, weight=10).commit()
+
+            ret = await Dog.update_many({"weight": 10}, {"$inc": {"weight": 2}})
+            assert ret.modified_count == 2
+            assert await Dog.count_documents({"weight": 12}) == 2
+            with pytest.raises(ma.ValidationError):
+                await Animal.update_many({}, {"$set": {"weight": "heavy"}})
+
+            assert (await Dog.delete_many({})).deleted_count == 2
+            assert await Animal.count_documents() == 2
+
+        loop.run_until_complete(do_test())
+
+    def test_find_one_and_update_delete(self, loop, instance):
+        @instance.register
+        class Job(Document):
+            name = fields.StrField(attribute="n")
+            priority = fields.IntField(attribute="p")
+            claimed = fields.BooleanField(load_default=False)
+
+        async def do_test():
+            await Job.collection.drop()
+            for name, priority in (("low", 1), ("high", 3), ("mid", 2)):
+                await Job(name=name, priority=priority).commit()
+
+            job = await Job.find_one_and_update(
+                {"claimed": False},
+                {"$set": {"claimed": True}},
+                sort=[("priority", -1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            assert isinstance(job, Job)
+            assert job.name == "high"
+            assert job.claimed is True
+            job = await Job.find_one_and_delete(
+                {"claimed": False}, sort=[("priority", 1)]
+            )
+            assert job.name == "low"
+            assert await Job.count_documents() == 2
+            assert await Job.find_one_and_delete({"name": "low"}) is None
+
+        loop.run_until_complete(do_test())
+
+    def test_version_field(self, loop, instance):
+        @instance.register
+        class Account(Document):
+            balance = fields.IntField(default=0)
+            version = fields.IntField()
+
+            class Meta:
+                version_field = "version"
+
+        async def do_test():
+            account = Account()
+            await account.commit()
+            assert account.version == 1
+            account1 = await Account.find_one(account.id)
+            account2 = await Account.find_one(account.id)
+            account1.balance = 10
+            await account1.commit()
+            assert account1.version == 2
+            account2.balance = 20
+            with pytest.raises(exceptions.VersionConflictError):
+                await account2.commit()
+            await account2.reload()
+            assert account2.balance == 10
+            assert account2.version == 2
+
+        loop.run_until_complete(do_test())
+
     def test_remove(self, loop, classroom_model):
         Student = classroom_model.Student
 
@@ -184,6 +301,40 @@ class TestMotorAsyncIO(BaseDBTest):
 
         loop.run_until_complete(do_test())
 
+    def test_lazy(self, loop, classroom_model):
+        Student = classroom_model.Student
+        Course = classroom_model.Course
+
+        async def do_test():
+            course = Course(name="Hoverboard 101", teacher=None)
+            await course.commit()
+            john = Student(name="John Doe", courses=[course])
+            await john.commit()
+            john2 = await Student.find_one(john.id, lazy=True)
+            assert john2._data._raw_data == {"courses": [course.pk]}
+            assert john2.courses == [course]
+            john2 = (await Student.find(lazy=True).to_list(length=1))[0]
+            assert john2._data._raw_data == {"courses": [course.pk]}
+            assert john2.courses == [course]
+
+        loop.run_until_complete(do_test())
+
+    def test_raw_bson(self, loop, classroom_model):
+        Course = classroom_model.Course
+        Room = classroom_model.Room
+
+        async def do_test():
+            course = Course(name="Hoverboard 101", teacher=None, room=Room(seats=42))
+            await course.commit()
+            course2 = await Course.find_one(course.id, raw_bson=True)
+            assert isinstance(course2._data._raw_data["room"], RawBSONDocument)
+            assert course2.room.seats == 42
+            course2 = (await Course.find(raw_bson=True).to_list(length=1))[0]
+            assert course2.room.seats == 42
+            assert course2.name == "Hoverboard 101"
+
+        loop.run_until_complete(do_test())
+
     def test_cursor(self, loop, classroom_model):
         Student = classroom_model.Student
 
@@ -349,7 +500,8 @@ class TestMotorAsyncIO(BaseDBTest):
                 projection={"has_apple": 0},
                 force_reload=True,
             )
-            assert teacher_fetched.has_apple is None
+            with pytest.raises(exceptions.NotLoadedFieldError):
+                teacher_fetched.has_apple
             # Test bad ref as well
             course.teacher = Reference(classroom_model.Teacher, ObjectId())
             with pytest.raises(ma.ValidationError) as exc:
@@ -573,6 +725,131 @@ class TestMotorAsyncIO(BaseDBTest):
 
         loop.run_until_complete(do_test())
 
+    def test_prefetch(self, loop, instance):
+        @instance.register
+        class Author(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Post(Document):
+            author = fields.ReferenceField(Author)
+            coauthors = fields.ListField(fields.ReferenceField(Author))
+
+        async def do_test():
+            await Author.collection.drop()
+            await Post.collection.drop()
+            authors = [Author(name=f"Author {i}") for i in range(3)]
+            for author in authors:
+                await author.commit()
+            for i in range(5):
+                await Post(author=authors[i % 3], coauthors=authors[: i % 3]).commit()
+
+            with mock.patch.object(Author, "find", wraps=Author.find) as find:
+                cursor = Post.find().sort("_id", 1).prefetch("author", "coauthors")
+                posts = await cursor.to_list(length=10)
+                find.assert_called_once()
+            assert len(posts) == 5
+            with mock.patch.object(Author.collection, "find_one") as find_one:
+                for i, post in enumerate(posts):
+                    assert await post.author.fetch() == authors[i % 3]
+                    coauthors = [await author.fetch() for author in post.coauthors]
+                    assert coauthors == authors[: i % 3]
+                find_one.assert_not_called()
+
+            with mock.patch.object(Author, "find", wraps=Author.find) as find:
+                posts = [
+                    post async for post in Post.find().prefetch("author", batch_size=2)
+                ]
+                assert find.call_count == 3
+            with mock.patch.object(Author.collection, "find_one") as find_one:
+                for post in posts:
+                    await post.author.fetch()
+                find_one.assert_not_called()
+
+        loop.run_until_complete(do_test())
+
+    def test_find_populated(self, loop, instance):
+        @instance.register
+        class Author(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Post(Document):
+            title = fields.StrField()
+            author = fields.ReferenceField(Author)
+
+        async def do_test():
+            await Author.collection.drop()
+            await Post.collection.drop()
+            authors = [Author(name=f"Author {i}") for i in range(2)]
+            for author in authors:
+                await author.commit()
+            for i in range(3):
+                await Post(title=f"Post {i}", author=authors[i % 2]).commit()
+
+            posts = await Post.find_populated(populate=["author"], sort={"title": 1})
+            assert len(posts) == 3
+            with mock.patch.object(Author.collection, "find_one") as find_one:
+                for i, post in enumerate(posts):
+                    assert await post.author.fetch() == authors[i % 2]
+                find_one.assert_not_called()
+
+        loop.run_until_complete(do_test())
+
+    def test_fetch_cache(self, loop, instance, classroom_model):
+        Teacher = classroom_model.Teacher
+        Course = classroom_model.Course
+
+        async def do_test():
+            teacher = Teacher(name="M. Strickland")
+            await teacher.commit()
+            courses = [Course(name=f"Course {i}", teacher=teacher) for i in range(2)]
+            for course in courses:
+                await course.commit()
+            courses = [await Course.find_one(course.id) for course in courses]
+
+            collection = Teacher.collection
+            with mock.patch.object(
+                collection, "find_one", wraps=collection.find_one
+            ) as find_one:
+                with instance.fetch_cache():
+                    fetched = await courses[0].teacher.fetch()
+                    assert await Teacher.find_one(teacher.id) is fetched
+                    assert find_one.call_count == 1
+                    fetched.name = "Dr. Brown"
+                    other = await courses[1].teacher.fetch()
+                    assert other is not fetched
+                    assert other.name == "M. Strickland"
+                    assert find_one.call_count == 2
+                await Teacher.find_one(teacher.id)
+                assert find_one.call_count == 3
+
+        loop.run_until_complete(do_test())
+
+    def test_io_validate_references_batched(self, loop, instance, classroom_model):
+        Teacher = classroom_model.Teacher
+
+        @instance.register
+        class Staff(Document):
+            head = fields.ReferenceField(Teacher)
+            teachers = fields.ListField(fields.ReferenceField(Teacher))
+
+        async def do_test():
+            teachers = [Teacher(name=f"Teacher {i}") for i in range(3)]
+            for teacher in teachers:
+                await teacher.commit()
+            staff = Staff(head=teachers[0], teachers=[*teachers, ObjectId()])
+            collection = Teacher.collection
+            with mock.patch.object(collection, "find", wraps=collection.find) as find:
+                with pytest.raises(ma.ValidationError) as exc:
+                    await staff.io_validate()
+                find.assert_called_once()
+            assert exc.value.messages == {
+                "teachers": {3: ["Reference not found for document Teacher."]},
+            }
+
+        loop.run_until_complete(do_test())
+
     def test_indexes(self, loop, instance):
         async def do_test():
             @instance.register
@@ -1210,6 +1487,40 @@ class TestMotorAsyncIO(BaseDBTest):
 
         loop.run_until_complete(do_test())
 
+    def test_session_unit_of_work(self, loop, instance, classroom_model):
+        Student = classroom_model.Student
+        Course = classroom_model.Course
+        Teacher = classroom_model.Teacher
+
+        async def do_test():
+            teacher = Teacher(name="M. Strickland")
+            await teacher.commit()
+            course = Course(name="History", teacher=teacher)
+            await course.commit()
+            john = Student(name="John Doe", courses=[course])
+            await john.commit()
+
+            async with instance.session(unit_of_work=True):
+                # Documents are retrieved once per session
+                john2 = await Student.find_one(john.id)
+                assert await Student.find_one(john.id) is john2
+                assert (await Student.find({"name": "John Doe"}).to_list(1))[0] is john2
+                history = await john2.courses[0].fetch()
+                assert await Course.find_one(course.id) is history
+                # Commits are deferred until the session ends or is flushed
+                jane = Student(name="Jane Doe")
+                assert await jane.commit() is None
+                john2.name = "William Doe"
+                assert not jane.is_created
+                ret = await instance.flush()
+                assert [r.inserted_count for r in ret] == [1]
+                assert [r.modified_count for r in ret] == [1]
+                assert await Student.find_one(jane.id) is jane
+                john2.name = "Bill Doe"
+            assert (await Student.find_one(john.id)).name == "Bill Doe"
+
+        loop.run_until_complete(do_test())
+
     def test_2_to_3_migration(self, loop, db):
         instance = framework.MotorAsyncIOMigrationInstance(db)
 
@@ -6,13 +6,15 @@ import pytest
 import marshmallow as ma
 
 from bson import ObjectId
-from pymongo import MongoClient
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient, ReadPreference, ReturnDocument, WriteConcern
 from pymongo.collection import Collection
 from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
 
 from umongo import (
     Document,
     EmbeddedDocument,
+    Instance,
     MixinDocument,
     Reference,
     exceptions,
@@ -78,6 +80,106 @@ class TestPymongo(BaseDBTest):
         with pytest.raises(exceptions.NotCreatedError):
             Student(name="Joe").commit(conditions={"name": "dummy"})
 
+    def test_update_embedded(self, instance):
+        @instance.register
+        class Address(EmbeddedDocument):
+            street = fields.StrField()
+            city = fields.StrField()
+
+        @instance.register
+        class Person(Document):
+            address = fields.EmbeddedField(Address)
+
+        john = Person(address={"street": "1 main street", "city": "Paris"})
+        john.commit()
+        john2 = Person.find_one(john.id)
+        john.address.street = "2 main street"
+        assert john.to_mongo(update=True) == {
+            "$set": {"address.street": "2 main street"},
+        }
+        john.commit()
+        # Only the modified sub-field is written, sibling ones are preserved
+        john2.address.city = "Lyon"
+        john2.commit()
+        john.reload()
+        assert john.address == {"street": "2 main street", "city": "Lyon"}
+
+    def test_update_list(self, instance):
+        @instance.register
+        class Log(Document):
+            entries = fields.ListField(fields.StrField())
+
+        log = Log(entries=["a", "b"])
+        log.commit()
+        log2 = Log.find_one(log.id)
+        log.entries.append("c")
+        log.commit()
+        # Appends from concurrent writers are all kept
+        log2.entries.extend(["d", "e"])
+        assert log2.to_mongo(update=True) == {
+            "$push": {"entries": {"$each": ["d", "e"]}},
+        }
+        log2.commit()
+        log.reload()
+        assert log.entries == ["a", "b", "c", "d", "e"]
+        log.entries.pop(0)
+        log.commit()
+        log.entries.remove("d")
+        log.commit()
+        log.entries.insert(1, "f")
+        log.commit()
+        assert Log.find_one(log.id).entries == log.entries == ["b", "f", "c", "e"]
+
+    def test_update_dict(self, instance):
+        @instance.register
+        class Stats(Document):
+            counters = fields.DictField(values=fields.IntField())
+
+        stats = Stats(counters={"a": 1, "b": 2})
+        stats.commit()
+        stats2 = Stats.find_one(stats.id)
+        stats.counters["a"] += 1
+        stats.commit()
+        # Keys modified by concurrent writers are all kept
+        stats2.counters["c"] = 3
+        del stats2.counters["b"]
+        stats2.commit()
+        stats.reload()
+        assert stats.counters == {"a": 2, "c": 3}
+
+    def test_partial_document(self, classroom_model):
+        Student = classroom_model.Student
+        john = Student(name="John Doe", birthday=dt.datetime(1995, 12, 12))
+        john.commit()
+        john2 = Student.find_one(john.id, projection=["name"])
+        assert john2.is_partial()
+        assert john2.name == "John Doe"
+        with pytest.raises(exceptions.NotLoadedFieldError):
+            john2.birthday
+        # Fields not loaded are left untouched, even when replacing
+        john2.name = "William Doe"
+        john2.required_validate()
+        john2.commit(io_validate_all=True)
+        john2.commit(replace=True)
+        john.reload()
+        assert john.name == "William Doe"
+        assert john.birthday == dt.datetime(1995, 12, 12)
+        # Setting a field makes it loaded
+        del john2.birthday
+        assert john2.birthday is None
+        john2.commit()
+        john.reload()
+        assert john.birthday is None
+        # Remaining fields are retrieved in a single query
+        john3 = next(Student.find({"_id": john.id}, projection={"name": 0}))
+        assert john3.is_partial()
+        with pytest.raises(exceptions.NotLoadedFieldError):
+            john3.name
+        john3.load_missing()
+        assert not john3.is_partial()
+        assert john3.name == "William Doe"
+        assert john3._data == john._data
+
     def test_replace(self, classroom_model):
         Student = classroom_model.Student
         john = Student(name="John Doe", birthday=dt.datetime(1995, 12, 12))
@@ -101,6 +203,279 @@ class TestPymongo(BaseDBTest):
         with pytest.raises(exceptions.NotCreatedError):
             Student(name="Joe").commit(conditions={"name": "dummy"}, replace=True)
 
+    def test_commit_many(self, instance, classroom_model):
+        Student = classroom_model.Student
+        Teacher = classroom_model.Teacher
+        john = Student(name="John Doe")
+        john.commit()
+        john.name = "William Doe"
+        jane = Student(name="Jane Doe")
+        teacher = Teacher(name="M. Strickland")
+        untouched = Student.find_one(john.id)
+        ret = instance.commit_many([john, jane, teacher, untouched])
+        assert [r.inserted_count for r in ret] == [1, 1]
+        assert [r.modified_count for r in ret] == [1, 0]
+        assert [doc.is_created for doc in (jane, teacher)] == [True, True]
+        assert [doc.is_modified() for doc in (john, jane)] == [False, False]
+        assert Student.find_one(john.id).name == "William Doe"
+        assert Student.find_one(jane.id).name == "Jane Doe"
+        assert Teacher.find_one(teacher.id).name == "M. Strickland"
+
+        # Validation errors are raised before anything is written
+        with pytest.raises(ma.ValidationError) as exc:
+            instance.commit_many([Student(name="Joe"), Student()])
+        assert exc.value.messages == {1: {"name": ["Missing data for required field."]}}
+        assert Student.count_documents({"name": "Joe"}) == 0
+
+    def test_commit_many_unique(self, instance):
+        @instance.register
+        class UniqueIndexDoc(Document):
+            value = fields.IntField(unique=True)
+
+        UniqueIndexDoc.collection.drop()
+        UniqueIndexDoc.ensure_indexes()
+        docs = [UniqueIndexDoc(value=value) for value in (1, 1, 2)]
+        with pytest.raises(ma.ValidationError) as exc:
+            instance.commit_many(docs)
+        assert exc.value.messages == {1: {"value": "Field value must be unique."}}
+        assert [doc.is_created for doc in docs] == [True, False, False]
+        docs = [UniqueIndexDoc(value=value) for value in (1, 3, 3)]
+        with pytest.raises(ma.ValidationError) as exc:
+            instance.commit_many(docs, ordered=False)
+        assert exc.value.messages == {
+            0: {"value": "Field value must be unique."},
+            2: {"value": "Field value must be unique."},
+        }
+        assert [doc.is_created for doc in docs] == [False, True, False]
+
+    def test_update_many_delete_many(self, instance):
+        @instance.register
+        class Animal(Document):
+            name = fields.StrField(attribute="n")
+            weight = fields.IntField(attribute="w")
+            birthday = fields.DateTimeField()
+
+        @instance.register
+        class Dog(Animal):
+            pass
+
+        Animal.collection.drop()
+        for name in ("Scruffy", "Garfield"):
+            Animal(name=name, weight=3).commit()
+        for name in ("Pluto", "Snoopy"):
+            Dog(name=name, weight=10).commit()
+
+        # The `_cls` discriminator restricts updates to the child documents
+        ret = Dog.update_many(
+            {"weight": 10},
+            {"$inc": {"weight": 2}, "$set": {"birthday": "2000-01-01T00:00:00"}},
+        )
+        assert ret.modified_count == 2
+        assert {dog.weight for dog in Dog.find()} == {12}
+        assert Dog.count_documents({"birthday": dt.datetime(2000, 1, 1)}) == 2
+        assert Animal.update_many({}, {"$set": {"weight": 4}}).modified_count == 4
+        with pytest.raises(ma.ValidationError):
+            Animal.update_many({}, {"$set": {"weight": "heavy"}})
+
+        assert Dog.delete_many({"name": "Scruffy"}).deleted_count == 0
+        assert Dog.delete_many({}).deleted_count == 2
+        assert Animal.count_documents() == 2
+        assert Animal.delete_many({"name": "Scruffy"}).deleted_count == 1
+        assert [animal.name for animal in Animal.find()] == ["Garfield"]
+
+    def test_find_one_and_update_delete(self, instance):
+        @instance.register
+        class Job(Document):
+            name = fields.StrField(attribute="n")
+            priority = fields.IntField(attribute="p")
+            claimed = fields.BooleanField(load_default=False)
+            tags = fields.ListField(fields.StrField())
+
+        Job.collection.drop()
+        for name, priority in (("low", 1), ("high", 3), ("mid", 2)):
+            Job(name=name, priority=priority).commit()
+
+        # Claim the job with the highest priority
+        job = Job.find_one_and_update(
+            {"claimed": False},
+            {"$set": {"claimed": True}, "$push": {"tags": "claimed"}},
+            sort=[("priority", -1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        assert isinstance(job, Job)
+        assert job.name == "high"
+        assert job.claimed is True
+        assert list(job.tags) == ["claimed"]
+        assert not job.is_modified()
+        job = Job.find_one_and_update(
+            {"claimed": False},
+            {"$set": {"claimed": True}},
+            projection=["name", "claimed"],
+            sort={"priority": -1},
+        )
+        # Document as it was before the update, limited to the projection
+        assert job.is_partial()
+        assert job.name == "mid"
+        assert job.claimed is False
+        with pytest.raises(exceptions.NotLoadedFieldError):
+            job.priority
+        assert (
+            Job.find_one_and_update({"name": "none"}, {"$inc": {"priority": 1}}) is None
+        )
+        job = Job.find_one_and_update(
+            {"name": "none"},
+            {"$set": {"priority": "4"}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        assert job.priority == 4
+        assert Job.collection.find_one({"n": "none"})["p"] == 4
+
+        job = Job.find_one_and_delete({"claimed": True}, sort=[("priority", 1)])
+        assert job.name == "mid"
+        assert Job.find_one({"name": "mid"}) is None
+        assert Job.find_one_and_delete({"name": "mid"}) is None
+        assert Job.count_documents() == 3
+
+    def test_version_field(self, instance):
+        @instance.register
+        class Account(Document):
+            balance = fields.IntField(default=0)
+            version = fields.IntField(attribute="v")
+
+            class Meta:
+                version_field = "version"
+
+        account = Account()
+        account.commit()
+        assert account.version == 1
+        assert not account.is_modified()
+        account1 = Account.find_one(account.id)
+        account2 = Account.find_one(account.id)
+        account1.balance = 10
+        account1.commit()
+        assert account1.version == 2
+        assert not account1.is_modified()
+        assert Account.collection.find_one(account.id) == {
+            "_id": account.id,
+            "balance": 10,
+            "v": 2,
+        }
+        # The document has been modified since account2 was loaded
+        account2.balance = 20
+        with pytest.raises(exceptions.VersionConflictError):
+            account2.commit()
+        assert account2.version == 1
+        account2.reload()
+        account2.balance = 20
+        account2.commit(replace=True)
+        assert account2.version == 3
+        assert Account.find_one(account.id).balance == 20
+        # Documents inserted before versioning have no version
+        Account.collection.update_one({"_id": account.id}, {"$unset": {"v": ""}})
+        account2.reload()
+        assert account2.version is None
+        account2.inc("balance", 5)
+        account2.commit()
+        assert account2.version == 1
+        # Bulk commits are versioned as well
+        account1.reload()
+        account1.balance = 30
+        instance.commit_many([account1])
+        assert account1.version == 2
+        account2.balance = 40
+        with pytest.raises(exceptions.UpdateError):
+            instance.commit_many([account2])
+        assert Account.find_one(account.id).balance == 30
+        # The version is retrieved whatever the projection
+        for projection in (["balance"], {"balance": 0}, {"v": 0}, {"version": 0}):
+            partial = Account.find_one(account.id, projection=projection)
+            assert partial.version == account1.version
+            partial.balance = 50
+            partial.commit()
+            account1.reload()
+            assert partial.version == account1.version
+
+    def test_commit_many_version_conflict(self, instance):
+        @instance.register
+        class Account(Document):
+            balance = fields.IntField(default=0)
+            version = fields.IntField(attribute="v")
+
+            class Meta:
+                version_field = "version"
+
+        accounts = [Account(), Account()]
+        instance.commit_many(accounts)
+        stale = Account.find_one(accounts[1].id)
+        accounts[1].balance = 5
+        accounts[1].commit()
+        accounts[0].balance = 10
+        stale.balance = 20
+        created = Account(balance=30)
+        with pytest.raises(exceptions.VersionConflictError) as exc:
+            instance.commit_many([accounts[0], stale, created])
+        assert exc.value.args[1] == {1: stale}
+        # The documents matching their update are committed
+        assert not accounts[0].is_modified()
+        assert accounts[0].version == 2
+        assert created.is_created
+        assert stale.is_modified()
+        assert stale.version == 1
+        assert Account.find_one(stale.id).balance == 5
+        accounts[0].balance = 15
+        accounts[0].commit()
+        assert Account.find_one(accounts[0].id).balance == 15
+
+    def test_collection_options(self, instance):
+        @instance.register
+        class Telemetry(Document):
+            value = fields.IntField()
+
+            class Meta:
+                write_concern = WriteConcern(w=0)
+                read_preference = ReadPreference.SECONDARY_PREFERRED
+
+        @instance.register
+        class ChildTelemetry(Telemetry):
+            class Meta:
+                write_concern = WriteConcern(w=1)
+
+        assert Telemetry.collection.write_concern == WriteConcern(w=0)
+        assert (
+            Telemetry.collection.read_preference == ReadPreference.SECONDARY_PREFERRED
+        )
+        assert Telemetry.collection.read_concern == instance.db.read_concern
+        assert ChildTelemetry.collection.write_concern == WriteConcern(w=1)
+        assert (
+            ChildTelemetry.collection.read_preference
+            == ReadPreference.SECONDARY_PREFERRED
+        )
+        assert Telemetry.collection is Telemetry.collection
+
+    def test_atomic_operators(self, instance):
+        @instance.register
+        class Article(Document):
+            views = fields.IntField(default=0)
+            tags = fields.ListField(fields.StrField())
+
+        article = Article()
+        article.commit()
+        # Concurrent updates don't overwrite each other
+        article1 = Article.find_one(article.id)
+        article2 = Article.find_one(article.id)
+        article1.inc("views")
+        article1.push("tags", "a", "b", slice=-2)
+        article2.inc("views", 2)
+        article2.add_to_set("tags", "c")
+        article1.commit()
+        article2.commit()
+        assert article1.views == 1
+        assert not article1.is_modified()
+        article.reload()
+        assert article.views == 3
+        assert article.tags == ["a", "b", "c"]
+
     def test_delete(self, classroom_model):
         Student = classroom_model.Student
         Student.collection.drop()
@@ -177,6 +552,43 @@ class TestPymongo(BaseDBTest):
         assert len(students) == 1
         assert students[0].name == "student-0"
 
+    def test_lazy(self, classroom_model):
+        Student = classroom_model.Student
+        Course = classroom_model.Course
+        course = Course(name="Hoverboard 101", teacher=None)
+        course.commit()
+        john = Student(name="John Doe", courses=[course])
+        john.commit()
+        john2 = Student.find_one(john.id, lazy=True)
+        assert john2._data._raw_data == {"courses": [course.pk]}
+        assert john2.courses == [course]
+        john2 = next(Student.find(lazy=True))
+        assert john2._data._raw_data == {"courses": [course.pk]}
+        john2.name = "William Doe"
+        john2.commit()
+        john.reload()
+        assert john.name == "William Doe"
+        assert john.courses == [course]
+
+    def test_raw_bson(self, classroom_model):
+        Student = classroom_model.Student
+        Course = classroom_model.Course
+        Room = classroom_model.Room
+        course = Course(name="Hoverboard 101", teacher=None, room=Room(seats=42))
+        course.commit()
+        course2 = Course.find_one(course.id, raw_bson=True)
+        assert isinstance(course2._data._raw_data["room"], RawBSONDocument)
+        assert course2.room.seats == 42
+        assert course2.name == "Hoverboard 101"
+        john = Student(name="John Doe", courses=[course])
+        john.commit()
+        john2 = next(Student.find({"name": "John Doe"}, raw_bson=True))
+        assert john2.courses == [course]
+        john2.name = "William Doe"
+        john2.commit()
+        john.reload()
+        assert john.name == "William Doe"
+
     def test_classroom(self, classroom_model):
         student = classroom_model.Student(
             name="Marty McFly",
@@ -251,13 +663,12 @@ class TestPymongo(BaseDBTest):
         assert course.teacher.fetch().name == "Dr. Brown"
         assert course.teacher.fetch(force_reload=True).name == "M. Strickland"
         # Test fetch with projection
-        assert (
-            course.teacher.fetch(
-                projection={"has_apple": 0},
-                force_reload=True,
-            ).has_apple
-            is None
+        teacher_fetched = course.teacher.fetch(
+            projection={"has_apple": 0},
+            force_reload=True,
         )
+        with pytest.raises(exceptions.NotLoadedFieldError):
+            teacher_fetched.has_apple
         # Test bad ref as well
         course.teacher = Reference(classroom_model.Teacher, ObjectId())
         with pytest.raises(ma.ValidationError) as exc:
@@ -271,6 +682,168 @@ class TestPymongo(BaseDBTest):
         del course.teacher
         course.io_validate()
 
+    def test_prefetch(self, instance):
+        @instance.register
+        class Author(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Tag(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Comment(EmbeddedDocument):
+            author = fields.ReferenceField(Author)
+
+        @instance.register
+        class Post(Document):
+            author = fields.ReferenceField(Author)
+            tags = fields.ListField(fields.ReferenceField(Tag))
+            related = fields.GenericReferenceField()
+            comments = fields.ListField(fields.EmbeddedField(Comment))
+
+        for doc_cls in (Author, Tag, Post):
+            doc_cls.collection.drop()
+        authors = [Author(name=f"Author {i}") for i in range(3)]
+        tags = [Tag(name=f"Tag {i}") for i in range(3)]
+        for doc in (*authors, *tags):
+            doc.commit()
+        for i in range(5):
+            Post(
+                author=authors[i % 3],
+                tags=tags[: i % 3],
+                related=tags[i % 3] if i % 2 else authors[0],
+                comments=[{"author": authors[(i + 1) % 3]}],
+            ).commit()
+        Post.collection.insert_one({"author": ObjectId()})
+
+        with (
+            mock.patch.object(Author, "find", wraps=Author.find) as author_find,
+            mock.patch.object(Tag, "find", wraps=Tag.find) as tag_find,
+        ):
+            posts = list(
+                Post.find()
+                .sort("_id", 1)
+                .prefetch("author", "tags", "related", "comments.author", batch_size=4),
+            )
+            # One query per referenced class and per batch
+            assert author_find.call_count == 2
+            assert tag_find.call_count == 2
+        assert len(posts) == 6
+        with mock.patch.object(Author.collection, "find_one") as find_one:
+            for i, post in enumerate(posts[:5]):
+                assert post.author.fetch() == authors[i % 3]
+                assert [tag.fetch() for tag in post.tags] == tags[: i % 3]
+                assert post.related.fetch() == (tags[i % 3] if i % 2 else authors[0])
+                assert post.comments[0].author.fetch() == authors[(i + 1) % 3]
+            find_one.assert_not_called()
+        # Missing documents are not prefetched
+        with pytest.raises(ma.ValidationError):
+            posts[5].author.fetch()
+        post = Post.find().sort("_id", 1).prefetch("author")[1]
+        with mock.patch.object(Author.collection, "find_one") as find_one:
+            assert post.author.fetch() == authors[1]
+            find_one.assert_not_called()
+
+    def test_find_populated(self, instance):
+        @instance.register
+        class Author(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Post(Document):
+            title = fields.StrField()
+            author = fields.ReferenceField(Author, attribute="a")
+            coauthors = fields.ListField(fields.ReferenceField(Author))
+
+        Author.collection.drop()
+        Post.collection.drop()
+        authors = [Author(name=f"Author {i}") for i in range(3)]
+        for author in authors:
+            author.commit()
+        for i in range(4):
+            Post(
+                title=f"Post {i}", author=authors[i % 3], coauthors=authors[: i % 3]
+            ).commit()
+        Post.collection.insert_one({"title": "Orphan", "a": ObjectId()})
+
+        collection = Post.collection
+        with mock.patch.object(
+            collection, "aggregate", wraps=collection.aggregate
+        ) as aggregate:
+            posts = Post.find_populated(
+                {"title": {"$ne": "Post 0"}},
+                populate=["author", "coauthors"],
+                sort=[("title", 1)],
+            )
+            aggregate.assert_called_once()
+        assert [post.title for post in posts] == [
+            "Orphan",
+            "Post 1",
+            "Post 2",
+            "Post 3",
+        ]
+        with mock.patch.object(Author.collection, "find_one") as find_one:
+            for i, post in enumerate(posts[1:], 1):
+                assert isinstance(post.author.fetch(), Author)
+                assert post.author.fetch() == authors[i % 3]
+                coauthors = [author.fetch() for author in post.coauthors]
+                assert coauthors == authors[: i % 3]
+            find_one.assert_not_called()
+        # Missing documents are not attached
+        with pytest.raises(ma.ValidationError):
+            posts[0].author.fetch()
+        posts = Post.find_populated(skip=1, limit=1, sort={"title": -1})
+        assert [post.title for post in posts] == ["Post 2"]
+
+    def test_fetch_cache(self, instance, classroom_model):
+        Teacher = classroom_model.Teacher
+        Course = classroom_model.Course
+        teacher = Teacher(name="M. Strickland")
+        teacher.commit()
+        courses = [Course(name=f"Course {i}", teacher=teacher) for i in range(3)]
+        for course in courses:
+            course.commit()
+        courses = [Course.find_one(course.id) for course in courses]
+
+        collection = Teacher.collection
+        with mock.patch.object(
+            collection, "find_one", wraps=collection.find_one
+        ) as find_one:
+            with instance.fetch_cache():
+                fetched = courses[0].teacher.fetch()
+                assert courses[1].teacher.fetch() is fetched
+                assert Teacher.find_one(teacher.id) is fetched
+                assert find_one.call_count == 1
+                # Modified documents are not shared
+                fetched.name = "Dr. Brown"
+                assert courses[2].teacher.fetch() is not fetched
+                assert courses[2].teacher.fetch().name == "M. Strickland"
+                assert find_one.call_count == 2
+                # Documents outdated by a commit are fetched again
+                fetched.commit()
+                assert Teacher.find_one(teacher.id).name == "Dr. Brown"
+                assert find_one.call_count == 3
+                reloaded = courses[0].teacher.fetch(force_reload=True)
+                assert reloaded is not fetched
+                assert Teacher.find_one(teacher.id) is reloaded
+                assert find_one.call_count == 4
+                # Projections are not cached
+                Teacher.find_one(teacher.id, projection=["name"])
+                assert find_one.call_count == 5
+                assert Teacher.find_one(teacher.id, projection={"_id": 0}).pk is None
+                assert find_one.call_count == 6
+                Teacher.find_one(teacher.id)
+                assert find_one.call_count == 6
+                Teacher.update_many(
+                    {"name": "Dr. Brown"}, {"$set": {"has_apple": True}}
+                )
+                assert Teacher.find_one(teacher.id).has_apple is True
+                assert find_one.call_count == 7
+            # The cache is scoped to the context
+            Teacher.find_one(teacher.id)
+            assert find_one.call_count == 8
+
     def test_io_validate(self, instance, classroom_model):
         Student = classroom_model.Student
 
@@ -431,6 +1004,75 @@ class TestPymongo(BaseDBTest):
         del student.embedded_io_field
         student.io_validate()
 
+    def test_io_validate_references_batched(self, instance, classroom_model):
+        Teacher = classroom_model.Teacher
+
+        @instance.register
+        class EmbeddedDoc(EmbeddedDocument):
+            teachers = fields.ListField(fields.ReferenceField(Teacher))
+
+        @instance.register
+        class Staff(Document):
+            head = fields.ReferenceField(Teacher)
+            teachers = fields.ListField(fields.ReferenceField(Teacher))
+            by_subject = fields.DictField(values=fields.ReferenceField(Teacher))
+            embedded = fields.EmbeddedField(EmbeddedDoc)
+
+        teachers = [Teacher(name=f"Teacher {i}") for i in range(5)]
+        for teacher in teachers:
+            teacher.commit()
+        missing = ObjectId()
+        staff = Staff(
+            head=teachers[0],
+            teachers=[*teachers, missing, teachers[0]],
+            by_subject={"math": teachers[1], "art": missing},
+            embedded={"teachers": [missing, teachers[2]]},
+        )
+        not_found = ["Reference not found for document Teacher."]
+        collection = Teacher.collection
+        with mock.patch.object(collection, "find", wraps=collection.find) as find:
+            with pytest.raises(ma.ValidationError) as exc:
+                staff.io_validate()
+            # A single query checks all the references
+            find.assert_called_once()
+        assert exc.value.messages == {
+            "teachers": {5: not_found},
+            "by_subject": {"art": {"value": not_found}},
+            "embedded": {"teachers": {0: not_found}},
+        }
+        assert set(find.call_args.args[0]["_id"]["$in"]) == {
+            *(teacher.pk for teacher in teachers),
+            missing,
+        }
+
+    def test_reference_cache(self, db):
+        instance = Instance.from_db(db, reference_cache_size=10)
+
+        @instance.register
+        class Owner(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Item(Document):
+            owner = fields.ReferenceField(Owner)
+
+        owner = Owner(name="Marty")
+        owner.commit()
+        collection = Owner.collection
+        with mock.patch.object(collection, "find", wraps=collection.find) as find:
+            Item(owner=owner).io_validate()
+            Item(owner=owner).io_validate()
+            # Second validation uses the cache
+            find.assert_called_once()
+        with mock.patch.object(collection, "find_one", wraps=collection.find_one) as fo:
+            assert Item(owner=owner).owner.exists
+            fo.assert_not_called()
+        # Deleting the document removes it from the cache
+        owner.delete()
+        with pytest.raises(ma.ValidationError):
+            Item(owner=owner.pk).io_validate()
+        assert not Item(owner=owner.pk).owner.exists
+
     def test_indexes(self, instance):
         @instance.register
         class SimpleIndexDoc(Document):
@@ -966,6 +1608,102 @@ class TestPymongo(BaseDBTest):
         coll_mock.create_indexes.assert_called_once()
         assert coll_mock.create_indexes.call_args[1]["session"] == session
 
+    def test_session_unit_of_work(self, instance, classroom_model):
+        Student = classroom_model.Student
+        Course = classroom_model.Course
+        Teacher = classroom_model.Teacher
+        teacher = Teacher(name="M. Strickland")
+        teacher.commit()
+        course = Course(name="History", teacher=teacher)
+        course.commit()
+        john = Student(name="John Doe", courses=[course])
+        john.commit()
+
+        with instance.session(unit_of_work=True):
+            # Documents are retrieved once per session
+            john2 = Student.find_one(john.id)
+            assert Student.find_one(john.id) is john2
+            assert next(Student.find({"name": "John Doe"})) is john2
+            history = john2.courses[0].fetch()
+            assert Course.find_one(course.id) is history
+            teacher2 = Teacher.find_one(teacher.id)
+            with mock.patch.object(Teacher, "find_one") as find_one:
+                assert history.teacher.fetch() is teacher2
+                find_one.assert_not_called()
+            # Commits are deferred until the session ends or is flushed
+            jane = Student(name="Jane Doe")
+            assert jane.commit() is None
+            john2.name = "William Doe"
+            history.name = "Modern History"
+            assert not jane.is_created
+            assert Student.count_documents() == 1
+            ret = instance.flush()
+            assert [r.inserted_count for r in ret] == [1, 0]
+            assert [r.modified_count for r in ret] == [1, 1]
+            assert jane.is_created
+            assert Student.find_one(jane.id) is jane
+            assert instance.flush() == []
+            john2.name = "Bill Doe"
+        assert Student.find_one(john.id).name == "Bill Doe"
+        assert Course.find_one(course.id).name == "Modern History"
+
+        # Nothing is written if the session ends with an error
+        def failing_session():
+            with instance.session(unit_of_work=True):
+                Student(name="Joe").commit()
+                raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            failing_session()
+        assert Student.count_documents({"name": "Joe"}) == 0
+
+        # Partially loaded documents are not kept in the session
+        with instance.session(unit_of_work=True):
+            partial = Student.find_one(john.id, projection=["name"])
+            assert partial.is_partial()
+            full = Student.find_one(john.id)
+            assert full is not partial
+            assert not full.is_partial()
+            assert full.birthday is None
+
+        # Deleted documents are removed from the session
+        with instance.session(unit_of_work=True):
+            bill = Student.find_one(john.id)
+            Course.find_one(course.id).delete()
+            bill.delete()
+            assert Student.find_one(john.id) is None
+            with pytest.raises(ma.ValidationError):
+                bill.courses[0].fetch()
+        assert Student.count_documents({"_id": john.id}) == 0
+        assert Course.count_documents({"_id": course.id}) == 0
+
+        # Documents returned by find_one_and_* replace the ones of the session
+        with instance.session(unit_of_work=True):
+            stale = Teacher.find_one(teacher.id)
+            stale.name = "Stale"
+            updated = Teacher.find_one_and_update(
+                {"_id": teacher.id},
+                {"$set": {"has_apple": True}},
+                return_document=ReturnDocument.AFTER,
+            )
+            assert Teacher.find_one(teacher.id) is updated
+            # The document returned before the update is not kept
+            Teacher.find_one_and_update(
+                {"_id": teacher.id}, {"$set": {"name": "Dr. Brown"}}
+            )
+            fetched = Teacher.find_one(teacher.id)
+            assert fetched is not updated
+            assert fetched.name == "Dr. Brown"
+        # Outdated documents are not written
+        fetched = Teacher.find_one(teacher.id)
+        assert (fetched.name, fetched.has_apple) == ("Dr. Brown", True)
+        with instance.session(unit_of_work=True):
+            deleted = Teacher.find_one(teacher.id)
+            deleted.name = "Deleted"
+            Teacher.find_one_and_delete({"_id": teacher.id})
+            assert Teacher.find_one(teacher.id) is None
+        assert Teacher.count_documents({"_id": teacher.id}) == 0
+
     def test_2_to_3_migration(self, db):
         instance = framework_pymongo.PyMongoMigrationInstance(db)
 
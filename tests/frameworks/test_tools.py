@@ -1,8 +1,19 @@
+import datetime as dt
+
 import pytest
 
+import marshmallow as ma
+
+from bson import ObjectId
 from pymongo import MongoClient
 
-from umongo.frameworks.tools import cook_find_projection
+from umongo import Document, fields
+from umongo.frameworks.tools import (
+    cook_find_projection,
+    cook_find_sort,
+    cook_populate_pipeline,
+    cook_update,
+)
 
 from ..common import TEST_DB
 
@@ -40,3 +51,104 @@ def test_cook_find_projection(classroom_model):
     projection = {"room.seats": 0}
     cooked = cook_find_projection(classroom_model.Course, projection=projection)
     assert cooked == {"room._seats": 0}
+
+
+def test_cook_find_sort(classroom_model):
+    cooked = cook_find_sort(classroom_model.Teacher, [("has_apple", -1), ("name", 1)])
+    assert cooked == [("_has_apple", -1), ("name", 1)]
+    cooked = cook_find_sort(classroom_model.Course, {"room.seats": 1})
+    assert cooked == [("room._seats", 1)]
+
+
+def test_cook_populate_pipeline(classroom_model):
+    pipeline, joins = cook_populate_pipeline(
+        classroom_model.Student,
+        {"name": "John"},
+        ["courses"],
+        sort={"name": 1},
+        limit=10,
+    )
+    assert pipeline == [
+        {"$match": {"name": "John"}},
+        {"$sort": {"name": 1}},
+        {"$limit": 10},
+        {
+            "$lookup": {
+                "from": "course",
+                "localField": "courses",
+                "foreignField": "_id",
+                "as": "__populate_0",
+            },
+        },
+    ]
+    assert joins == [("courses", classroom_model.Course, "__populate_0")]
+    course_id = ObjectId()
+    pipeline, _ = cook_populate_pipeline(classroom_model.Course, course_id, [])
+    assert pipeline == [{"$match": {"_id": course_id}}]
+    with pytest.raises(TypeError):
+        cook_populate_pipeline(classroom_model.Course, None, ["room"])
+
+
+def test_cook_update(instance, classroom_model):
+    Course = classroom_model.Course
+    Student = classroom_model.Student
+    teacher = classroom_model.Teacher.build_from_mongo(
+        {"_id": ObjectId(), "name": "M. Strickland"},
+    )
+    course_id = ObjectId()
+
+    # Field names are mapped and values serialized by the fields
+    cooked = cook_update(
+        Course,
+        {
+            "$set": {"teacher": teacher, "room": {"seats": 10}},
+            "$inc": {"room.seats": 2},
+            "$unset": {"name": ""},
+        },
+    )
+    assert cooked == {
+        "$set": {"teacher": teacher.id, "room": {"_seats": 10}},
+        "$inc": {"room._seats": 2},
+        "$unset": {"name": ""},
+    }
+    cooked = cook_update(
+        classroom_model.Teacher,
+        {"$rename": {"has_apple": "name"}, "$set": {"has_apple": "yes"}},
+    )
+    assert cooked == {"$rename": {"_has_apple": "name"}, "$set": {"_has_apple": True}}
+    # Paths under an unknown key or a dict are not mapped any further
+    cooked = cook_update(
+        classroom_model.Teacher,
+        {"$set": {"meta.has_apple": "yes", "meta.name.has_apple": 1}},
+    )
+    assert cooked == {"$set": {"meta.has_apple": "yes", "meta.name.has_apple": 1}}
+
+    @instance.register
+    class Profile(Document):
+        name = fields.StrField(attribute="n")
+        meta = fields.DictField(attribute="m")
+
+    cooked = cook_update(Profile, {"$set": {"meta.name": "John", "meta.name.name": 1}})
+    assert cooked == {"$set": {"m.name": "John", "m.name.name": 1}}
+
+    # List items are serialized by the inner field
+    cooked = cook_update(
+        Student,
+        {
+            "$push": {"courses": {"$each": [str(course_id)], "$position": 0}},
+            "$set": {"courses.0": course_id, "birthday": "1995-12-12T00:00:00"},
+        },
+    )
+    assert cooked == {
+        "$push": {"courses": {"$each": [course_id], "$position": 0}},
+        "$set": {"courses.0": course_id, "birthday": dt.datetime(1995, 12, 12)},
+    }
+    assert cook_update(Student, {"$pull": {"courses": str(course_id)}}) == {
+        "$pull": {"courses": course_id},
+    }
+    assert cook_update(Student, {"$pullAll": {"courses": [str(course_id)]}}) == {
+        "$pullAll": {"courses": [course_id]},
+    }
+
+    with pytest.raises(ma.ValidationError):
+        cook_update(Course, {"$set": {"room": {"seats": "many"}}})
@@ -1,16 +1,19 @@
 import datetime as dt
 from functools import wraps
+from unittest import mock
 
 import pytest
 
 import marshmallow as ma
 
 from bson import ObjectId
+from pymongo import ReadPreference, ReturnDocument, WriteConcern
 from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
 
 from umongo import (
     Document,
     EmbeddedDocument,
+    Instance,
     MixinDocument,
     Reference,
     exceptions,
@@ -161,6 +164,180 @@ class TestTxMongo(BaseDBTest):
         with pytest.raises(exceptions.DeleteError):
             yield john.delete()
 
+    @pytest_inlineCallbacks
+    def test_commit_many(self, instance, classroom_model):
+        Student = classroom_model.Student
+        Teacher = classroom_model.Teacher
+        john = Student(name="John Doe")
+        yield john.commit()
+        john.name = "William Doe"
+        jane = Student(name="Jane Doe")
+        teacher = Teacher(name="M. Strickland")
+        untouched = yield Student.find_one(john.id)
+        ret = yield instance.commit_many([john, jane, teacher, untouched])
+        assert [r.inserted_count for r in ret] == [1, 1]
+        assert [r.modified_count for r in ret] == [1, 0]
+        assert [doc.is_created for doc in (jane, teacher)] == [True, True]
+        assert [doc.is_modified() for doc in (john, jane)] == [False, False]
+        john2 = yield Student.find_one(john.id)
+        assert john2.name == "William Doe"
+        jane2 = yield Student.find_one(jane.id)
+        assert jane2.name == "Jane Doe"
+        teacher2 = yield Teacher.find_one(teacher.id)
+        assert teacher2.name == "M. Strickland"
+
+        # Validation errors are raised before anything is written
+        with pytest.raises(ma.ValidationError) as exc:
+            yield instance.commit_many([Student(name="Joe"), Student()])
+        assert exc.value.messages == {1: {"name": ["Missing data for required field."]}}
+        count = yield Student.count({"name": "Joe"})
+        assert count == 0
+
+    @pytest_inlineCallbacks
+    def test_update_many_delete_many(self, instance):
+        @instance.register
+        class Animal(Document):
+            name = fields.StrField(attribute="n")
+            weight = fields.IntField(attribute="w")
+            birthday = fields.DateTimeField()
+
+        @instance.register
+        class Dog(Animal):
+            pass
+
+        yield Animal.collection.drop()
+        for name in ("Scruffy", "Garfield"):
+            yield Animal(name=name, weight=3).commit()
+        for name in ("Pluto", "Snoopy"):
+            yield Dog(name=name, weight=10).commit()
+
+        # The `_cls` discriminator restricts updates to the child documents
+        ret = yield Dog.update_many(
+            {"weight": 10},
+            {"$inc": {"weight": 2}, "$set": {"birthday": "2000-01-01T00:00:00"}},
+        )
+        assert ret.modified_count == 2
+        dogs = yield Dog.find()
+        assert {dog.weight for dog in dogs} == {12}
+        count = yield Dog.count({"birthday": dt.datetime(2000, 1, 1)})
+        assert count == 2
+        ret = yield Animal.update_many({}, {"$set": {"weight": 4}})
+        assert ret.modified_count == 4
+        with pytest.raises(ma.ValidationError):
+            yield Animal.update_many({}, {"$set": {"weight": "heavy"}})
+
+        ret = yield Dog.delete_many({"name": "Scruffy"})
+        assert ret.deleted_count == 0
+        ret = yield Dog.delete_many({})
+        assert ret.deleted_count == 2
+        count = yield Animal.count()
+        assert count == 2
+        ret = yield Animal.delete_many({"name": "Scruffy"})
+        assert ret.deleted_count == 1
+        animals = yield Animal.find()
+        assert [animal.name for animal in animals] == ["Garfield"]
+
+    @pytest_inlineCallbacks
+    def test_find_one_and_update_delete(self, instance):
+        @instance.register
+        class Job(Document):
+            name = fields.StrField(attribute="n")
+            priority = fields.IntField(attribute="p")
+            claimed = fields.BooleanField(load_default=False)
+
+        yield Job.collection.drop()
+        for name, priority in (("low", 1), ("high", 3), ("mid", 2)):
+            yield Job(name=name, priority=priority).commit()
+
+        job = yield Job.find_one_and_update(
+            {"claimed": False},
+            {"$set": {"claimed": True}},
+            sort=[("priority", -1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        assert isinstance(job, Job)
+        assert job.name == "high"
+        assert job.claimed is True
+        job = yield Job.find_one_and_update(
+            {"claimed": False},
+            {"$set": {"claimed": True}},
+            projection=["name", "claimed"],
+            sort={"priority": -1},
+        )
+        assert job.is_partial()
+        assert job.name == "mid"
+        assert job.claimed is False
+        job = yield Job.find_one_and_update({"name": "none"}, {"$inc": {"priority": 1}})
+        assert job is None
+
+        job = yield Job.find_one_and_delete({"claimed": True}, sort=[("priority", 1)])
+        assert job.name == "mid"
+        job = yield Job.find_one({"name": "mid"})
+        assert job is None
+        job = yield Job.find_one_and_delete({"name": "mid"})
+        assert job is None
+        count = yield Job.count()
+        assert count == 2
+
+    @pytest_inlineCallbacks
+    def test_version_field(self, instance):
+        @instance.register
+        class Account(Document):
+            balance = fields.IntField(default=0)
+            version = fields.IntField(attribute="v")
+
+            class Meta:
+                version_field = "version"
+
+        account = Account()
+        yield account.commit()
+        assert account.version == 1
+        account1 = yield Account.find_one(account.id)
+        account2 = yield Account.find_one(account.id)
+        account1.balance = 10
+        yield account1.commit()
+        assert account1.version == 2
+        raw = yield Account.collection.find_one(account.id)
+        assert raw == {"_id": account.id, "balance": 10, "v": 2}
+        # The document has been modified since account2 was loaded
+        account2.balance = 20
+        with pytest.raises(exceptions.VersionConflictError):
+            yield account2.commit()
+        assert account2.version == 1
+        yield account2.reload()
+        account2.balance = 20
+        yield account2.commit(replace=True)
+        assert account2.version == 3
+        # Bulk commits are versioned as well
+        yield account1.reload()
+        account1.balance = 30
+        yield instance.commit_many([account1])
+        assert account1.version == 4
+        account2.balance = 40
+        with pytest.raises(exceptions.UpdateError):
+            yield instance.commit_many([account2])
+        account = yield Account.find_one(account.id)
+        assert account.balance == 30
+
+    def test_collection_options(self, instance):
+        @instance.register
+        class Telemetry(Document):
+            value = fields.IntField()
+
+            class Meta:
+                write_concern = WriteConcern(w=0)
+
+        assert Telemetry.collection.write_concern == WriteConcern(w=0)
+        # txmongo collections ignore the read concern and read preference
+        with pytest.raises(exceptions.DocumentDefinitionError):
+
+            @instance.register
+            class Report(Document):
+                value = fields.IntField()
+
+                class Meta:
+                    read_preference = ReadPreference.SECONDARY_PREFERRED
+
     @pytest_inlineCallbacks
     def test_reload(self, classroom_model):
         Student = classroom_model.Student
@@ -175,6 +352,21 @@ class TestTxMongo(BaseDBTest):
         yield john.reload()
         assert john.name == "William Doe"
 
+    @pytest_inlineCallbacks
+    def test_lazy(self, classroom_model):
+        Student = classroom_model.Student
+        Course = classroom_model.Course
+        course = Course(name="Hoverboard 101", teacher=None)
+        yield course.commit()
+        john = Student(name="John Doe", courses=[course])
+        yield john.commit()
+        john2 = yield Student.find_one(john.id, lazy=True)
+        assert john2._data._raw_data == {"courses": [course.pk]}
+        assert john2.courses == [course]
+        results = yield Student.find(lazy=True)
+        assert results[0]._data._raw_data == {"courses": [course.pk]}
+        assert results[0].courses == [course]
+
     @pytest_inlineCallbacks
     def test_find_no_cursor(self, classroom_model):
         Student = classroom_model.Student
@@ -321,6 +513,93 @@ class TestTxMongo(BaseDBTest):
         del course.teacher
         yield course.io_validate()
 
+    @pytest_inlineCallbacks
+    def test_prefetch(self, instance):
+        @instance.register
+        class Author(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Post(Document):
+            author = fields.ReferenceField(Author)
+            coauthors = fields.ListField(fields.ReferenceField(Author))
+
+        yield Author.collection.drop()
+        yield Post.collection.drop()
+        authors = [Author(name=f"Author {i}") for i in range(3)]
+        for author in authors:
+            yield author.commit()
+        for i in range(5):
+            yield Post(author=authors[i % 3], coauthors=authors[: i % 3]).commit()
+
+        with mock.patch.object(Author, "find", wraps=Author.find) as find:
+            posts = yield Post.find(sort=[("_id", 1)], prefetch=["author", "coauthors"])
+            find.assert_called_once()
+        assert len(posts) == 5
+        with mock.patch.object(Author.collection, "find_one") as find_one:
+            for i, post in enumerate(posts):
+                author = yield post.author.fetch()
+                assert author == authors[i % 3]
+                assert len(post.coauthors) == i % 3
+                for coauthor, expected in zip(post.coauthors, authors, strict=False):
+                    fetched = yield coauthor.fetch()
+                    assert fetched == expected
+            find_one.assert_not_called()
+
+        # One query per batch of the cursor
+        with mock.patch.object(Author, "find", wraps=Author.find) as find:
+            posts, cursor = yield Post.find_with_cursor(
+                batch_size=3,
+                prefetch=["author"],
+            )
+            while cursor is not None:
+                batch, cursor = yield cursor
+                posts += batch
+            assert find.call_count == 2
+        assert len(posts) == 5
+        with mock.patch.object(Author.collection, "find_one") as find_one:
+            for post in posts:
+                yield post.author.fetch()
+            find_one.assert_not_called()
+
+    @pytest_inlineCallbacks
+    def test_find_populated(self, instance):
+        @instance.register
+        class Author(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Post(Document):
+            title = fields.StrField()
+            author = fields.ReferenceField(Author, attribute="a")
+
+        yield Author.collection.drop()
+        yield Post.collection.drop()
+        authors = [Author(name=f"Author {i}") for i in range(2)]
+        for author in authors:
+            yield author.commit()
+        for i in range(3):
+            yield Post(title=f"Post {i}", author=authors[i % 2]).commit()
+        yield Post.collection.insert_one({"title": "Orphan", "a": ObjectId()})
+
+        posts = yield Post.find_populated(
+            {"title": {"$ne": "Orphan"}},
+            populate=["author"],
+            sort={"title": 1},
+        )
+        assert [post.title for post in posts] == ["Post 0", "Post 1", "Post 2"]
+        with mock.patch.object(Author.collection, "find_one") as find_one:
+            for i, post in enumerate(posts):
+                author = yield post.author.fetch()
+                assert author == authors[i % 2]
+            find_one.assert_not_called()
+        posts = yield Post.find_populated(populate=["author"], skip=1, limit=1)
+        assert len(posts) == 1
+        # Missing documents are not attached
+        posts = yield Post.find_populated({"title": "Orphan"}, populate=["author"])
+        with pytest.raises(ma.ValidationError):
+            yield posts[0].author.fetch()
+
     @pytest_inlineCallbacks
     def test_io_validate(self, instance, classroom_model):
         Student = classroom_model.Student
@@ -514,6 +793,68 @@ class TestTxMongo(BaseDBTest):
         del student.embedded_io_field
         yield student.io_validate()
 
+    @pytest_inlineCallbacks
+    def test_io_validate_references_batched(self, instance, classroom_model):
+        Teacher = classroom_model.Teacher
+
+        @instance.register
+        class Staff(Document):
+            head = fields.ReferenceField(Teacher)
+            teachers = fields.ListField(fields.ReferenceField(Teacher))
+            by_subject = fields.DictField(values=fields.ReferenceField(Teacher))
+
+        teachers = [Teacher(name=f"Teacher {i}") for i in range(3)]
+        for teacher in teachers:
+            yield teacher.commit()
+        missing = ObjectId()
+        staff = Staff(
+            head=teachers[0],
+            teachers=[*teachers, missing],
+            by_subject={"math": teachers[1], "art": missing},
+        )
+        not_found = ["Reference not found for document Teacher."]
+        collection = Teacher.collection
+        with mock.patch.object(collection, "find", wraps=collection.find) as find:
+            with pytest.raises(ma.ValidationError) as exc:
+                yield staff.io_validate()
+            # A single query checks all the references
+            find.assert_called_once()
+        assert exc.value.messages == {
+            "teachers": {3: not_found},
+            "by_subject": {"art": {"value": not_found}},
+        }
+
+    @pytest_inlineCallbacks
+    def test_reference_cache(self, db):
+        instance = Instance.from_db(db, reference_cache_size=10)
+
+        @instance.register
+        class Owner(Document):
+            name = fields.StrField()
+
+        @instance.register
+        class Item(Document):
+            owner = fields.ReferenceField(Owner)
+
+        owner = Owner(name="Marty")
+        yield owner.commit()
+        collection = Owner.collection
+        with mock.patch.object(collection, "find", wraps=collection.find) as find:
+            yield Item(owner=owner).io_validate()
+            yield Item(owner=owner).io_validate()
+            # Second validation uses the cache
+            find.assert_called_once()
+        with mock.patch.object(collection, "find_one", wraps=collection.find_one) as fo:
+            exists = yield Item(owner=owner).owner.exists
+            assert exists
+            fo.assert_not_called()
+        # Deleting the document removes it from the cache
+        yield owner.delete()
+        with pytest.raises(ma.ValidationError):
+            yield Item(owner=owner.pk).io_validate()
+        exists = yield Item(owner=owner.pk).owner.exists
+        assert not exists
+
     @pytest_inlineCallbacks
     def test_indexes(self, instance):
         @instance.register
@@ -1,3 +1,5 @@
+import datetime as dt
+
 import pytest
 
 import marshmallow as ma
@@ -6,7 +8,13 @@ from bson import ObjectId
 
 from umongo import EmbeddedDocument, exceptions, fields, validate
 from umongo.abstract import BaseSchema
-from umongo.data_proxy import BaseDataProxy, BaseNonStrictDataProxy, data_proxy_factory
+from umongo.data_objects import List
+from umongo.data_proxy import (
+    BaseDataProxy,
+    BaseDataStorage,
+    BaseNonStrictDataProxy,
+    data_proxy_factory,
+)
 
 from .common import BaseTest, assert_equal_order
 
@@ -155,6 +163,108 @@ class TestDataProxy(BaseTest):
         assert not d.get("a").is_modified()
         assert not d.get("b").is_modified()
 
+    def test_nested_modification_notifies_parents(self):
+        @self.instance.register
+        class MyEmbedded(EmbeddedDocument):
+            aa = fields.IntField()
+            ll = fields.ListField(fields.IntField())
+
+        class MySchema(BaseSchema):
+            a = fields.EmbeddedField(MyEmbedded, instance=self.instance)
+            b = fields.ListField(
+                fields.EmbeddedField(MyEmbedded, instance=self.instance),
+            )
+            c = fields.DictField(values=fields.ListField(fields.IntField()))
+            d = fields.ListField(fields.IntField(), default=[])
+
+        MyDataProxy = data_proxy_factory("My", MySchema())
+        d = MyDataProxy()
+        d.from_mongo(
+            {
+                "a": {"aa": 1, "ll": [1]},
+                "b": [{"aa": 2}, {"aa": 3, "ll": [1, 2]}],
+                "c": {"x": [1], "y": [2]},
+            }
+        )
+        assert not d.is_modified()
+        d.get("a").ll.append(2)
+        assert d.get_modified_fields() == {"a"}
+        d.get("b")[1].ll.pop()
+        assert d.get_modified_fields() == {"a", "b"}
+        d.get("c")["y"].append(3)
+        assert d.get_modified_fields() == {"a", "b", "c"}
+        assert d.to_mongo(update=True) == {
+            "$set": {
+                "b": [{"aa": 2}, {"aa": 3, "ll": [1]}],
+            },
+            "$push": {"a.ll": {"$each": [2]}, "c.y": {"$each": [3]}},
+        }
+        d.clear_modified()
+        assert not d.is_modified()
+        assert not d.get("b")[1].is_modified()
+        assert not d.get("b")[1].ll.is_modified()
+        # Clearing a nested data object also clears its parents
+        d.get("b")[0].aa = 4
+        assert d.get_modified_fields() == {"b"}
+        d.get("b")[0].clear_modified()
+        assert not d.get("b").is_modified()
+        assert not d.is_modified()
+        # Elements added to a data object notify it as well
+        d.get("b").append(MyEmbedded(aa=5))
+        d.clear_modified()
+        d.get("b")[2].aa = 6
+        assert d.get_modified_fields() == {"b"}
+        # Default data objects are not shared between data proxies
+        d2 = MyDataProxy()
+        d2.from_mongo({})
+        d2.get("d").append(1)
+        assert d.get("d") == []
+        assert d2.get_modified_fields() == {"d"}
+
+    def test_data_object_assigned_to_another_container(self):
+        @self.instance.register
+        class MyEmbedded(EmbeddedDocument):
+            aa = fields.IntField()
+
+        class MySchema(BaseSchema):
+            a = fields.EmbeddedField(MyEmbedded, instance=self.instance)
+            b = fields.ListField(
+                fields.EmbeddedField(MyEmbedded, instance=self.instance),
+            )
+            c = fields.DictField(values=fields.ListField(fields.IntField()))
+
+        MyDataProxy = data_proxy_factory("My", MySchema())
+        d1 = MyDataProxy()
+        d1.from_mongo({"a": {"aa": 1}, "b": [{"aa": 2}], "c": {"x": [1]}})
+        d2 = MyDataProxy()
+        d2.from_mongo({})
+        # Data objects held by another container are copied
+        d2.set("a", d1.get("a"))
+        d2.set("b", [d1.get("a"), *d1.get("b")])
+        d2.set("c", {})
+        d2.get("c")["x"] = d1.get("c")["x"]
+        assert d2.get("a") is not d1.get("a")
+        assert d2.get("b")[1] is not d1.get("b")[0]
+        assert d2.get("c")["x"] is not d1.get("c")["x"]
+        # The original containers are still notified of the modifications
+        d1.get("a").aa = 3
+        d1.get("b")[0].aa = 4
+        d1.get("c")["x"].append(2)
+        assert d1.get_modified_fields() == {"a", "b", "c"}
+        assert d1.to_mongo(update=True) == {
+            "$set": {"a.aa": 3, "b": [{"aa": 4}]},
+            "$push": {"c.x": {"$each": [2]}},
+        }
+        assert d2.to_mongo() == {
+            "a": {"aa": 1},
+            "b": [{"aa": 1}, {"aa": 2}],
+            "c": {"x": [1]},
+        }
+        # Setting a data object back to its own container keeps it
+        a = d1.get("a")
+        d1.set("a", a)
+        assert d1.get("a") is a
+
     def test_set(self):
         class MySchema(BaseSchema):
             a = fields.IntField()
@@ -234,6 +344,76 @@ class TestDataProxy(BaseTest):
         d.from_mongo({"in_mongo": 42})
         assert d.get("in_front") == 42
 
+    def test_from_mongo_conversions_and_defaults(self):
+        class MySchema(BaseSchema):
+            a = fields.IntField(attribute="in_mongo_a")
+            b = fields.DateField(allow_none=True)
+            c = fields.ListField(fields.IntField())
+            d = fields.IntField(default=42)
+            e = fields.StrField()
+
+        MyDataProxy = data_proxy_factory("My", MySchema())
+        d = MyDataProxy()
+        d.set("e", "dirty")
+        d.from_mongo(
+            {"in_mongo_a": 1, "b": dt.datetime(2021, 1, 2), "c": [1, 2]},
+        )
+        assert d._data == {
+            "in_mongo_a": 1,
+            "b": dt.date(2021, 1, 2),
+            "c": [1, 2],
+            "d": 42,
+            "e": ma.missing,
+        }
+        assert isinstance(d._data["c"], List)
+        assert d.get_modified_fields() == set()
+        d.from_mongo({"b": None})
+        assert d._data["b"] is None
+        assert d._data["c"] is ma.missing
+        with pytest.raises(exceptions.UnknownFieldInDBError):
+            d.from_mongo({"in_mongo_a": 1, "xxx": "foo"})
+        # Failing load doesn't alter the data proxy
+        assert d._data["b"] is None
+        d._set_projection({"in_mongo_a": 0})
+        d.set("d", 12)
+        with pytest.raises(exceptions.UnknownFieldInDBError):
+            d.from_mongo({"b": None, "xxx": "foo"})
+        assert d._not_loaded == {"in_mongo_a"}
+        assert d.get_modified_fields() == {"d"}
+        assert d.to_mongo(update=True) == {"$set": {"d": 12}}
+
+    def test_from_mongo_lazy(self):
+        class MySchema(BaseSchema):
+            a = fields.IntField()
+            b = fields.DateField(attribute="in_mongo_b")
+            c = fields.ListField(fields.IntField())
+            d = fields.IntField(default=42)
+
+        MyDataProxy = data_proxy_factory("My", MySchema())
+        d = MyDataProxy()
+        d.from_mongo(
+            {"a": 1, "in_mongo_b": dt.datetime(2021, 1, 2), "c": [1, 2]},
+            lazy=True,
+        )
+        # Values without conversion and defaults are loaded right away
+        assert d._data == {"a": 1, "d": 42}
+        assert d._raw_data == {"in_mongo_b": dt.datetime(2021, 1, 2), "c": [1, 2]}
+        assert d.to_mongo() == {
+            "a": 1,
+            "in_mongo_b": dt.datetime(2021, 1, 2),
+            "c": [1, 2],
+            "d": 42,
+        }
+        assert d.get("b") == dt.date(2021, 1, 2)
+        assert d._raw_data == {"c": [1, 2]}
+        d.set("c", [3])
+        assert d._raw_data == {}
+        assert d.to_mongo(update=True) == {"$set": {"c": [3]}}
+        d.from_mongo({"c": [1, 2]}, lazy=True)
+        assert d.get_modified_fields() == set()
+        assert d.dump() == {"c": [1, 2], "d": 42}
+        assert d._raw_data == {}
+
     def test_equality(self):
         class MySchema(BaseSchema):
             a = fields.IntField()
@@ -446,6 +626,84 @@ class TestDataProxy(BaseTest):
         d.get("e")["b"] = 4
         assert_equal_order(d.to_mongo()["e"], {"a": 1, "b": 4, "c": 3})
 
+    def test_serialization_cache(self):
+        @self.instance.register
+        class MyEmbedded(EmbeddedDocument):
+            aa = fields.IntField()
+            ll = fields.ListField(fields.IntField())
+
+        class MySchema(BaseSchema):
+            a = fields.IntField()
+            e = fields.EmbeddedField(MyEmbedded, instance=self.instance)
+            b = fields.ListField(
+                fields.EmbeddedField(MyEmbedded, instance=self.instance),
+            )
+
+        MyDataProxy = data_proxy_factory("My", MySchema())
+        d = MyDataProxy._build_empty()
+        d.from_mongo({"a": 1, "e": {"aa": 1, "ll": [1]}, "b": [{"aa": 2}]})
+        mongo = d.to_mongo()
+        dump = d.dump()
+        assert mongo == {"a": 1, "e": {"aa": 1, "ll": [1]}, "b": [{"aa": 2}]}
+        assert dump == mongo
+        # Unchanged output is reused, but the returned values are copies
+        assert d._to_mongo_cached() is d._to_mongo_cached()
+        assert d._dump_cached() is d._dump_cached()
+        mongo["a"] = 2
+        mongo["e"]["ll"].append(666)
+        dump["b"].append({"aa": 666})
+        assert d.to_mongo()["a"] == 1
+        assert d.to_mongo()["e"] == {"aa": 1, "ll": [1]}
+        assert d.dump()["b"] == [{"aa": 2}]
+        # Modifications invalidate the cached output up to the document
+        d.get("e").ll.append(2)
+        assert d.to_mongo()["e"] == {"aa": 1, "ll": [1, 2]}
+        assert d.dump()["e"] == {"aa": 1, "ll": [1, 2]}
+        e_mongo = d.get("e")._data._to_mongo_cached()
+        d.get("b")[0].aa = 3
+        assert d.to_mongo()["b"] == [{"aa": 3}]
+        assert d.dump()["b"] == [{"aa": 3}]
+        assert d.get("e")._data._to_mongo_cached() is e_mongo
+        d.set("a", 4)
+        assert d.to_mongo()["a"] == 4
+        assert d.dump()["a"] == 4
+        d.from_mongo({"a": 5})
+        assert d.to_mongo() == d.dump() == {"a": 5}
+
+    def test_storage(self):
+        class MySchema(BaseSchema):
+            a = fields.IntField()
+            b = fields.IntField(attribute="in_mongo_b")
+
+        MyDataProxy = data_proxy_factory("My", MySchema())
+        assert issubclass(MyDataProxy._storage_cls, BaseDataStorage)
+        assert MyDataProxy._storage_cls.__name__ == "MyDataStorage"
+        d = MyDataProxy._build_empty()
+        d.from_mongo({"in_mongo_b": 2})
+        # One slot per field, no per-instance dict
+        assert not hasattr(d._data, "__dict__")
+        assert d._data == {"a": ma.missing, "in_mongo_b": 2}
+        del d._data["a"]
+        assert "a" not in d._data
+        assert d._data.get("a") is None
+        with pytest.raises(KeyError):
+            d._data["a"]
+        with pytest.raises(KeyError):
+            d._data["unknown"] = 1
+        assert list(d._data) == ["in_mongo_b"]
+        assert len(d._data) == 1
+        copy = d._data.copy()
+        copy["a"] = 1
+        assert copy == {"a": 1, "in_mongo_b": 2}
+        assert d._data == {"in_mongo_b": 2}
+        # Modified fields are tracked with a bitmask
+        assert d._modified_data == 0
+        d.set("b", 3)
+        assert d._modified_data == MyDataProxy._key_bits["in_mongo_b"]
+        assert d.get_modified_fields() == {"b"}
+        d.clear_modified()
+        assert d._modified_data == 0
+
 
 class TestNonStrictDataProxy(BaseTest):
     def test_build(self):
@@ -5,7 +5,8 @@ import pytest
 
 import marshmallow as ma
 
-from bson import DBRef, ObjectId
+from bson import DBRef, ObjectId, encode
+from bson.raw_bson import RawBSONDocument
 
 from umongo import (
     Document,
@@ -20,7 +21,7 @@ from umongo import (
 )
 from umongo.abstract import BaseSchema
 
-from .common import BaseTest
+from .common import BaseTest, MockedDB, MockedInstance
 
 
 class BaseStudent(Document):
@@ -93,6 +94,126 @@ class TestDocument(BaseTest):
             "gpa": 3.0,
         }
 
+    def test_from_mongo_lazy(self):
+        @self.instance.register
+        class LazyStudent(BaseStudent):
+            marks = fields.ListField(fields.IntField())
+
+            class Meta:
+                lazy = True
+
+        @self.instance.register
+        class EagerStudent(BaseStudent):
+            marks = fields.ListField(fields.IntField())
+
+        assert LazyStudent.opts.lazy is True
+        assert EagerStudent.opts.lazy is False
+        data = {"name": "John Doe", "marks": [12, 14]}
+        john = LazyStudent.build_from_mongo(data)
+        assert john._data._raw_data == {"marks": [12, 14]}
+        assert john.marks == [12, 14]
+        assert john._data._raw_data == {}
+        john = EagerStudent.build_from_mongo(data, lazy=True)
+        assert john._data._raw_data == {"marks": [12, 14]}
+        assert john.to_mongo() == data
+        assert john.dump() == {"name": "John Doe", "marks": [12, 14]}
+        john = LazyStudent.build_from_mongo(data, lazy=False)
+        assert not john._data._raw_data
+
+    def test_from_mongo_projection(self):
+        @self.instance.register
+        class Mark(EmbeddedDocument):
+            value = fields.IntField()
+
+        @self.instance.register
+        class MarkedStudent(BaseStudent):
+            marks = fields.ListField(fields.EmbeddedField(Mark), default=list)
+
+        data = {"_id": 1, "name": "John Doe"}
+        john = MarkedStudent.build_from_mongo(data, projection={"name": 1})
+        assert john.is_partial()
+        assert john.name == "John Doe"
+        for name in ("birthday", "gpa", "marks"):
+            with pytest.raises(exceptions.NotLoadedFieldError):
+                john[name]
+        assert dict(john._data.items()) == {"id": 1, "name": "John Doe"}
+        assert john._data.get_loaded_fields() == {"id", "name"}
+        john.gpa = 3.0
+        assert john.gpa == 3.0
+        assert john._data._to_mongo_loaded_update() == {
+            "$set": {"name": "John Doe", "gpa": 3.0},
+        }
+        # Partially retrieved fields are not loaded either
+        for projection in (
+            {"name": 1, "marks.value": 1},
+            {"name": 1, "marks": {"$elemMatch": {"value": 12}}},
+            {"birthday": 0, "gpa": 0, "marks": {"$slice": 1}},
+            {"birthday": 0, "gpa": 0, "marks.value": 0},
+        ):
+            john = MarkedStudent.build_from_mongo(
+                {**data, "marks": [{"value": 12}]},
+                projection=projection,
+            )
+            assert john._data._not_loaded == {"birthday", "gpa", "marks"}
+        john = MarkedStudent.build_from_mongo(data, projection={"_id": 0})
+        assert john._data._not_loaded == {"_id"}
+        # The primary key is readable even when left out
+        assert john.pk is None
+        assert john == john  # noqa: PLR0124 (comparison by identity)
+        assert john != MarkedStudent.build_from_mongo(data, projection={"_id": 0})
+        # Fields left out by the projection are loaded on demand
+        john = MarkedStudent.build_from_mongo(data, projection={"gpa": 0})
+        john._data._load_not_loaded({"_id": 1, "gpa": 2.0})
+        assert not john.is_partial()
+        assert john.gpa == 2.0
+        john = MarkedStudent.build_from_mongo(data)
+        assert not john.is_partial()
+        assert john._data.get_loaded_fields() is None
+
+    def test_from_mongo_raw_bson(self):
+        @self.instance.register
+        class Mark(EmbeddedDocument):
+            value = fields.IntField()
+
+        @self.instance.register
+        class MarkedStudent(BaseStudent):
+            marks = fields.ListField(fields.EmbeddedField(Mark))
+            best_mark = fields.EmbeddedField(Mark)
+            extra = fields.DictField()
+
+        data = {
+            "name": "John Doe",
+            "marks": [{"value": 12}, {"value": 14}],
+            "best_mark": {"value": 14},
+            "extra": {"a": {"b": 1}, "l": [{"c": 2}]},
+        }
+        raw = RawBSONDocument(encode(data))
+        john = MarkedStudent.build_from_mongo(raw, lazy=True)
+        assert john.name == "John Doe"
+        assert isinstance(john._data._raw_data["best_mark"], RawBSONDocument)
+        assert john.best_mark.value == 14
+        assert [mark.value for mark in john.marks] == [12, 14]
+        john.best_mark.value = 16
+        assert john.to_mongo(update=True) == {"$set": {"best_mark.value": 16}}
+        assert john.to_mongo() == {**data, "best_mark": {"value": 16}}
+        # Nested raw documents are decoded into mutable dicts
+        for lazy in (True, False):
+            john = MarkedStudent.build_from_mongo(raw, lazy=lazy)
+            mongo = john.to_mongo()
+            assert type(mongo["best_mark"]) is dict
+            mongo["best_mark"]["value"] = 0
+            john.extra["a"]["c"] = 3
+            john.extra["l"][0]["d"] = 4
+            assert john.dump()["extra"] == {
+                "a": {"b": 1, "c": 3},
+                "l": [{"c": 2, "d": 4}],
+            }
+            assert type(john.dump()["extra"]["a"]) is dict
+
+    def test_build_from_mongo_abstract(self):
+        with pytest.raises(exceptions.AbstractDocumentError):
+            self.instance.retrieve_document("BaseStudent").build_from_mongo({})
+
     def test_update(self):
         john = self.Student.build_from_mongo(
             data={
@@ -123,6 +244,137 @@ class TestDocument(BaseTest):
             "gpa": 3.0,
         }
 
+    def test_compiled_dump(self):
+        compiled_instance = MockedInstance(MockedDB("my_moked_db"), compiled_dump=True)
+        compiled_instance.register(BaseStudent)
+        for instance in (self.instance, compiled_instance):
+
+            @instance.register
+            class Mark(EmbeddedDocument):
+                value = fields.IntField(attribute="v")
+                comment = fields.StrField(data_key="note")
+
+            @instance.register
+            class Course(Document):
+                pass
+
+            @instance.register
+            class MarkedStudent(BaseStudent):
+                marks = fields.ListField(fields.EmbeddedField(Mark))
+                best_mark = fields.EmbeddedField(Mark)
+                course = fields.ReferenceField(Course)
+                any_ref = fields.GenericReferenceField()
+                scores = fields.DictField(values=fields.IntField())
+                level = fields.IntField(dump_default=1)
+
+                @post_dump
+                def add_rank(self, data, **kwargs):
+                    data["rank"] = len(data)
+                    return data
+
+        student_cls = self.instance.retrieve_document("MarkedStudent")
+        compiled_student_cls = compiled_instance.retrieve_document("MarkedStudent")
+        assert student_cls.DataProxy._compiled_dump is None
+        assert compiled_student_cls.DataProxy._compiled_dump is not None
+        course_id = ObjectId()
+        data = {
+            "_id": ObjectId(),
+            "name": "John Doe",
+            "birthday": dt.datetime(1995, 12, 12),
+            "marks": [{"v": 12, "comment": "Good"}, {"v": 14}],
+            "best_mark": {"v": 14},
+            "course": course_id,
+            "any_ref": {"_id": course_id, "_cls": "Course"},
+            "scores": {"math": 12},
+        }
+        expected = {
+            "id": str(data["_id"]),
+            "name": "John Doe",
+            "birthday": "1995-12-12T00:00:00",
+            "marks": [{"value": 12, "note": "Good"}, {"value": 14}],
+            "best_mark": {"value": 14},
+            "course": str(course_id),
+            "any_ref": {"id": str(course_id), "cls": "Course"},
+            "scores": {"math": 12},
+            "level": 1,
+            "rank": 9,
+        }
+        assert student_cls.build_from_mongo(data).dump() == expected
+        assert compiled_student_cls.build_from_mongo(data).dump() == expected
+        # Fields left out by a projection are dumped as marshmallow does
+        john = student_cls.build_from_mongo(data, projection={"name": 1})
+        compiled_john = compiled_student_cls.build_from_mongo(
+            data,
+            projection={"name": 1},
+        )
+        assert compiled_john.dump() == john.dump()
+
+    def test_atomic_operators(self):
+        @self.instance.register
+        class Mark(EmbeddedDocument):
+            value = fields.IntField()
+
+        @self.instance.register
+        class Article(Document):
+            views = fields.IntField(attribute="v")
+            tags = fields.ListField(fields.StrField())
+            marks = fields.ListField(fields.EmbeddedField(Mark))
+            title = fields.StrField()
+
+        data = {"_id": 1, "v": 3, "tags": ["a", "b"], "marks": [{"value": 1}]}
+        article = Article.build_from_mongo(data)
+        article.inc("views")
+        article.inc("views", 2)
+        article.add_to_set("tags", "b", "c")
+        article.push("marks", {"value": 2}, Mark(value=3), slice=-2)
+        article.title = "Atomic"
+        assert article.views == 6
+        assert article.tags == ["a", "b", "c"]
+        assert article.marks == [Mark(value=2), Mark(value=3)]
+        assert article.is_modified()
+        assert article._data.get_modified_fields() == {
+            "views",
+            "tags",
+            "marks",
+            "title",
+        }
+        assert article.to_mongo(update=True) == {
+            "$inc": {"v": 3},
+            "$addToSet": {"tags": {"$each": ["b", "c"]}},
+            "$push": {"marks": {"$each": [{"value": 2}, {"value": 3}], "$slice": -2}},
+            "$set": {"title": "Atomic"},
+        }
+        article.clear_modified()
+        assert not article.is_modified()
+        assert article.to_mongo(update=True) is None
+
+        # Missing values are initialized
+        article = Article.build_from_mongo({"_id": 1})
+        article.inc("views", 2)
+        article.push("tags", "a")
+        assert article.to_mongo(update=True) == {
+            "$inc": {"v": 2},
+            "$push": {"tags": {"$each": ["a"]}},
+        }
+        assert article.views == 2
+        assert article.tags == ["a"]
+
+        # Operators that cannot be combined fall back to rewriting the field
+        article = Article.build_from_mongo(data)
+        article.pull("tags", "a")
+        assert article.to_mongo(update=True) == {"$pull": {"tags": {"$in": ["a"]}}}
+        article.push("tags", "c")
+        article.inc("views")
+        article.views = 10
+        assert article.to_mongo(update=True) == {"$set": {"tags": ["b", "c"], "v": 10}}
+        article = Article.build_from_mongo(data)
+        article.push("tags", "c")
+        article.tags.append("d")
+        assert article.to_mongo(update=True) == {"$set": {"tags": ["a", "b", "c", "d"]}}
+
+        with pytest.raises(ma.ValidationError):
+            article.inc("views", "many")
+
     def test_fields_by_attr(self):
         john = self.Student.build_from_mongo(
             data={
@@ -491,6 +743,62 @@ class TestDocument(BaseTest):
         assert jane.id != john.id
         assert jane.name == "John Doe"
 
+    def test_clone_copy_on_write(self):
+        @self.instance.register
+        class Child(EmbeddedDocument):
+            name = fields.StrField()
+
+        @self.instance.register
+        class Parent(Document):
+            names = fields.ListField(fields.StrField())
+            tags = fields.DictField(values=fields.IntField())
+            child = fields.EmbeddedField(Child)
+
+        john = Parent.build_from_mongo(
+            {
+                "_id": ObjectId("5672d47b1d41c88dcd37ef05"),
+                "names": ["John"],
+                "tags": {"a": 1},
+                "child": {"name": "John Jr."},
+            }
+        )
+        names = john.names
+        jane = john.clone()
+        # Data objects are shared until modified
+        assert jane._data._data["names"] is names
+        assert jane._data._data["child"] is john._data._data["child"]
+        assert jane.is_modified()
+        assert jane.to_mongo() == {
+            "names": ["John"],
+            "tags": {"a": 1},
+            "child": {"name": "John Jr."},
+        }
+        # Modifying the original copies the data object for the clone first
+        names.append("Doe")
+        john.child.name = "Johnny"
+        assert john.to_mongo(update=True) == {
+            "$push": {"names": {"$each": ["Doe"]}},
+            "$set": {"child.name": "Johnny"},
+        }
+        assert jane.names == ["John"]
+        assert jane.child.name == "John Jr."
+        # Accessing a data object from the clone gives it its own copy
+        tags = jane.tags
+        assert tags is not john.tags
+        tags["b"] = 2
+        assert john.tags == {"a": 1}
+        assert john._data.get_modified_fields() == {"names", "child"}
+        # Clones of a clone share the data objects of the original
+        bob = jane.clone()
+        assert bob._data._data["tags"] is tags
+        assert jane.tags is tags
+        john.clear_modified()
+        del john.tags["a"]
+        assert bob.tags == {"a": 1, "b": 2}
+        jane.from_mongo({"names": ["Jane"]})
+        assert bob.names == ["John"]
+        assert bob.child.name == "John Jr."
+
     def test_modify_pk_field(self):
         @self.instance.register
         class User(Document):
@@ -740,6 +1048,11 @@ class TestConfig(BaseTest):
             Duck(name="Roger")
         assert exc.value.args[0] == {"name": ["Not suitable name for duck !"]}
 
+        # Data from mongo doesn't go through marshmallow load
+        roger = Duck.build_from_mongo({"_id": "Roger", "_cls": "Duck"})
+        assert roger.name == "Roger"
+        assert roger.is_created is True
+
     def test_bad_inheritance(self):
         @self.instance.register
         class NotAbstractParent(Document):
@@ -811,3 +1124,29 @@ class TestConfig(BaseTest):
         with pytest.raises(ma.ValidationError) as exc:
             NonStrictDoc(a=42, b="foo")
         assert exc.value.messages == {"b": ["Unknown field."]}
+
+    def test_version_field(self):
+        @self.instance.register
+        class VersionedDoc(Document):
+            version = fields.IntField()
+
+            class Meta:
+                version_field = "version"
+
+        @self.instance.register
+        class VersionedChildDoc(VersionedDoc):
+            pass
+
+        assert VersionedDoc.opts.version_field == "version"
+        assert VersionedChildDoc.opts.version_field == "version"
+
+        with pytest.raises(exceptions.DocumentDefinitionError) as exc:
+
+            @self.instance.register
+            class BadVersionedDoc(Document):
+                version = fields.StrField()
+
+                class Meta:
+                    version_field = "version"
+
+        assert exc.value.args[0] == "Version field `version` must be an IntField"
@@ -82,7 +82,7 @@ class TestEmbeddedDocument(BaseTest):
         assert embedded.is_modified()
         assert embedded.to_mongo(update=True) == {"$set": {"in_mongo_a": 3}}
         assert d.to_mongo(update=True) == {
-            "$set": {"in_mongo_embedded": {"in_mongo_a": 3, "b": 2}},
+            "$set": {"in_mongo_embedded.in_mongo_a": 3},
         }
         embedded.clear_modified()
         assert embedded.to_mongo(update=True) is None
@@ -90,7 +90,9 @@ class TestEmbeddedDocument(BaseTest):
 
         del embedded.a
         assert embedded.to_mongo(update=True) == {"$unset": {"in_mongo_a": ""}}
-        assert d.to_mongo(update=True) == {"$set": {"in_mongo_embedded": {"b": 2}}}
+        assert d.to_mongo(update=True) == {
+            "$unset": {"in_mongo_embedded.in_mongo_a": ""},
+        }
 
         d.set("embedded", MyEmbeddedDocument(a=4))
         assert d.get("embedded").to_mongo(update=True) == {"$set": {"in_mongo_a": 4}}
@@ -135,6 +137,61 @@ class TestEmbeddedDocument(BaseTest):
         d3.from_mongo({"in_mongo_embedded": None})
         assert d3.get("embedded") is None
 
+    def test_nested_update(self):
+        @self.instance.register
+        class City(EmbeddedDocument):
+            name = fields.StrField()
+            zip = fields.StrField(attribute="zip_code")
+
+        @self.instance.register
+        class Address(EmbeddedDocument):
+            street = fields.StrField()
+            city = fields.EmbeddedField(City, attribute="in_mongo_city")
+
+        @self.instance.register
+        class Person(Document):
+            name = fields.StrField()
+            address = fields.EmbeddedField(Address)
+
+        person = Person.build_from_mongo(
+            {
+                "_id": 1,
+                "name": "John",
+                "address": {
+                    "street": "1 main street",
+                    "in_mongo_city": {"name": "Paris", "zip_code": "75000"},
+                },
+            },
+        )
+        person.address.street = "2 main street"
+        person.address.city.name = "Lyon"
+        del person.address.city.zip
+        assert person.to_mongo(update=True) == {
+            "$set": {
+                "address.street": "2 main street",
+                "address.in_mongo_city.name": "Lyon",
+            },
+            "$unset": {"address.in_mongo_city.zip_code": ""},
+        }
+        person.clear_modified()
+        # Replacing an embedded document rewrites it as a whole
+        person.address.city = City(name="Nice")
+        person.name = "Jane"
+        assert person.to_mongo(update=True) == {
+            "$set": {"address.in_mongo_city": {"name": "Nice"}, "name": "Jane"},
+        }
+        person.clear_modified()
+        person.address = Address(street="3 main street")
+        person.address.city = City(name="Lille")
+        assert person.to_mongo(update=True) == {
+            "$set": {
+                "address": {
+                    "street": "3 main street",
+                    "in_mongo_city": {"name": "Lille"},
+                },
+            },
+        }
+
     def test_fields_by_attr(self):
         @self.instance.register
         class EmbeddedStudent(EmbeddedDocument):
@@ -304,9 +304,7 @@ class TestFields(BaseTest):
 
         dict_ = d.get("dict")
         dict_["a"] = 1
-        assert d.to_mongo(update=True) == {
-            "$set": {"in_mongo_dict": {"a": 1, "b": {"c": True}}},
-        }
+        assert d.to_mongo(update=True) == {"$set": {"in_mongo_dict.a": 1}}
         dict_.clear_modified()
         assert d.to_mongo(update=True) is None
 
@@ -338,7 +336,7 @@ class TestFields(BaseTest):
         d3.from_mongo({"in_mongo_dict": {}})
         assert d3._data.get("in_mongo_dict") == {}
         d3.get("dict")["c"] = 3
-        assert d3.to_mongo(update=True) == {"$set": {"in_mongo_dict": {"c": 3}}}
+        assert d3.to_mongo(update=True) == {"$set": {"in_mongo_dict.c": 3}}
         assert d3.to_mongo() == {"in_mongo_dict": {"c": 3}}
 
         d4 = MyDataProxy({"dict": None})
@@ -370,6 +368,64 @@ class TestFields(BaseTest):
         d5 = MyDataProxy({"dtdict": {"a": "2016-08-06T00:00:00"}})
         assert d5.to_mongo() == {"dtdict": {"a": dt.datetime(2016, 8, 6)}}
 
+    def test_dict_operations(self):
+        class MySchema(BaseSchema):
+            counters = fields.DictField(
+                keys=fields.StrField(),
+                values=fields.IntField(),
+                attribute="in_mongo_counters",
+            )
+            dtdict = fields.DictField(values=fields.DateTimeField())
+
+        MyDataProxy = data_proxy_factory("My", MySchema())
+        d = MyDataProxy()
+        d.from_mongo(
+            {"in_mongo_counters": {"a": 1, "b": 2, "c": 3, "d": 4}, "dtdict": {}},
+        )
+        counters = d.get("counters")
+        counters["a"] += 1
+        counters.update({"e": 5})
+        counters.setdefault("f", 6)
+        del counters["b"]
+        assert counters.pop("c") == 3
+        assert counters.pop("z", None) is None
+        assert d.to_mongo(update=True) == {
+            "$set": {
+                "in_mongo_counters.a": 2,
+                "in_mongo_counters.e": 5,
+                "in_mongo_counters.f": 6,
+            },
+            "$unset": {"in_mongo_counters.b": "", "in_mongo_counters.c": ""},
+        }
+        d.clear_modified()
+        assert not counters.is_modified()
+        assert d.to_mongo(update=True) is None
+        key, _ = counters.popitem()
+        assert d.to_mongo(update=True) == {"$unset": {f"in_mongo_counters.{key}": ""}}
+        d.clear_modified()
+
+        # Values are serialized
+        dtdict = d.get("dtdict")
+        dtdict["x"] = "2016-08-06T00:00:00"
+        assert d.to_mongo(update=True) == {
+            "$set": {"dtdict.x": dt.datetime(2016, 8, 6)},
+        }
+        d.clear_modified()
+
+        # Keys which cannot be used in a dotted path rewrite the dict
+        counters["x.y"] = 1
+        counters["a"] = 3
+        assert d.to_mongo(update=True) == {
+            "$set": {"in_mongo_counters": {"a": 3, "d": 4, "e": 5, "x.y": 1}},
+        }
+        d.clear_modified()
+        counters["$x"] = 1
+        assert "in_mongo_counters" in d.to_mongo(update=True)["$set"]
+        d.clear_modified()
+        counters.set_modified()
+        counters["a"] = 4
+        assert "in_mongo_counters" in d.to_mongo(update=True)["$set"]
+
     @pytest.mark.skip(reason="TxMongo not compatible with Python 3.12 dict_items")
     def test_dict_default(self):
         class MySchema(BaseSchema):
@@ -455,21 +511,10 @@ class TestFields(BaseTest):
         # Modifying an EmbeddedDocument inside a dict should count a dict modification
         d.clear_modified()
         d.get("refs")["1"] = obj_id2
-        assert d.to_mongo(update=True) == {
-            "$set": {"refs": {"1": obj_id2, "2": obj_id2, "3": obj_id1, "4": obj_id2}},
-        }
+        assert d.to_mongo(update=True) == {"$set": {"refs.1": obj_id2}}
         d.clear_modified()
         d.get("embeds")["b"].field = 42
-        assert d.to_mongo(update=True) == {
-            "$set": {
-                "embeds": {
-                    "a": {"field": 1},
-                    "b": {"field": 42},
-                    "c": {"field": 3},
-                    "d": {"field": 4},
-                },
-            },
-        }
+        assert d.to_mongo(update=True) == {"$set": {"embeds.b.field": 42}}
 
     def test_list(self):
         class MySchema(BaseSchema):
@@ -494,7 +539,9 @@ class TestFields(BaseTest):
         d.clear_modified()
         d.get("list").insert(0, 42)
         assert d.dump() == {"list": [42, 1, 2, 3]}
-        assert d.to_mongo(update=True) == {"$set": {"in_mongo_list": [42, 1, 2, 3]}}
+        assert d.to_mongo(update=True) == {
+            "$push": {"in_mongo_list": {"$each": [42], "$position": 0}},
+        }
 
         d.clear_modified()
         d.set("list", [5, 6, 7])
@@ -504,7 +551,7 @@ class TestFields(BaseTest):
         d.clear_modified()
         d.get("list").pop()
         assert d.dump() == {"list": [5, 6]}
-        assert d.to_mongo(update=True) == {"$set": {"in_mongo_list": [5, 6]}}
+        assert d.to_mongo(update=True) == {"$pop": {"in_mongo_list": 1}}
 
         d.clear_modified()
         d.get("list").clear()
@@ -519,7 +566,7 @@ class TestFields(BaseTest):
         d.clear_modified()
         d.get("list").remove(1)
         assert d.dump() == {"list": [2, 3]}
-        assert d.to_mongo(update=True) == {"$set": {"in_mongo_list": [2, 3]}}
+        assert d.to_mongo(update=True) == {"$pull": {"in_mongo_list": {"$in": [1]}}}
 
         d.clear_modified()
         d.get("list").reverse()
@@ -534,7 +581,9 @@ class TestFields(BaseTest):
         d.clear_modified()
         d.get("list").extend([4, 5])
         assert d.dump() == {"list": [2, 3, 4, 5]}
-        assert d.to_mongo(update=True) == {"$set": {"in_mongo_list": [2, 3, 4, 5]}}
+        assert d.to_mongo(update=True) == {
+            "$push": {"in_mongo_list": {"$each": [4, 5]}},
+        }
 
         d.from_mongo({"in_mongo_list": [2, 3, 4, 5]})
         assert (
@@ -552,7 +601,7 @@ class TestFields(BaseTest):
         d2.from_mongo({"in_mongo_list": []})
         d2.get("list").append(1)
         assert d2.to_mongo() == {"in_mongo_list": [1]}
-        assert d2.to_mongo(update=True) == {"$set": {"in_mongo_list": [1]}}
+        assert d2.to_mongo(update=True) == {"$push": {"in_mongo_list": {"$each": [1]}}}
 
         # Test repr readability
         repr_d = repr(d.get("list"))
@@ -571,6 +620,77 @@ class TestFields(BaseTest):
             == "<object umongo.data_objects.List([])>"
         )
 
+    def test_list_operations(self):
+        @self.instance.register
+        class MyEmbedded(EmbeddedDocument):
+            a = fields.IntField()
+
+        class MySchema(BaseSchema):
+            list = fields.ListField(fields.IntField())
+            embedded_list = fields.ListField(
+                fields.EmbeddedField(MyEmbedded, instance=self.instance),
+            )
+
+        MyDataProxy = data_proxy_factory("My", MySchema())
+        d = MyDataProxy()
+        d.from_mongo({"list": [1, 2, 3, 2], "embedded_list": [{"a": 1}, {"a": 2}]})
+        lst = d.get("list")
+        embedded_list = d.get("embedded_list")
+
+        # Appends are pushed together
+        lst.append(4)
+        lst.extend([5, 6])
+        embedded_list.append(MyEmbedded(a=3))
+        assert d.to_mongo(update=True) == {
+            "$push": {
+                "list": {"$each": [4, 5, 6]},
+                "embedded_list": {"$each": [{"a": 3}]},
+            },
+        }
+        d.clear_modified()
+        lst.pop(0)
+        assert d.to_mongo(update=True) == {"$pop": {"list": -1}}
+        d.clear_modified()
+        lst.remove(3)
+        lst.remove(5)
+        assert d.to_mongo(update=True) == {"$pull": {"list": {"$in": [3, 5]}}}
+        d.clear_modified()
+        lst.insert(-1, 7)
+        assert lst == [2, 2, 4, 7, 6]
+        assert d.to_mongo(update=True) == {
+            "$push": {"list": {"$each": [7], "$position": 3}},
+        }
+        d.clear_modified()
+
+        # Operations that cannot be expressed atomically rewrite the list
+        def check_rewritten(*operations):
+            for operation in operations:
+                operation()
+            assert d.to_mongo(update=True) == {"$set": {"list": list(lst)}}
+            d.clear_modified()
+
+        # `$pull` would remove all the matching elements
+        check_rewritten(lambda: lst.remove(2))
+        # Multiple operators can't be applied to the same field
+        check_rewritten(lambda: lst.append(8), lambda: lst.pop())
+        check_rewritten(lambda: lst.pop(), lambda: lst.pop())
+        check_rewritten(lambda: lst.insert(0, 9), lambda: lst.insert(0, 10))
+        check_rewritten(lambda: lst.pop(1))
+        check_rewritten(lambda: lst.sort())
+        check_rewritten(lambda: lst.set_modified(), lambda: lst.append(11))
+
+        # Elements modifications and embedded documents removal as well
+        embedded_list.append(MyEmbedded(a=4))
+        embedded_list[0].a = 5
+        assert d.to_mongo(update=True) == {
+            "$set": {"embedded_list": [{"a": 5}, {"a": 2}, {"a": 3}, {"a": 4}]},
+        }
+        d.clear_modified()
+        embedded_list.remove(embedded_list[0])
+        assert d.to_mongo(update=True) == {
+            "$set": {"embedded_list": [{"a": 2}, {"a": 3}, {"a": 4}]},
+        }
+
     @pytest.mark.skip(reason="TxMongo not compatible with Python 3.12 dict_items")
     def test_list_default(self):
         class MySchema(BaseSchema):
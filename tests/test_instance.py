@@ -103,6 +103,19 @@ class TestInstance:
         assert Embedded1.opts.instance is instance1
         assert Embedded2.opts.instance is instance2
 
+    def test_from_db_options(self, db):
+        instance = Instance.from_db(
+            db,
+            compiled_dump=True,
+            reference_cache_size=10,
+            reference_cache_ttl=5,
+        )
+        assert instance.db is db
+        assert instance.compiled_dump is True
+        assert instance.reference_cache.maxsize == 10
+        assert instance.reference_cache.ttl == 5
+        assert Instance.from_db(db).reference_cache is None
+
     def test_register_other_implementation(self, db):
         instance1 = Instance.from_db(db)
         instance2 = Instance.from_db(db)
@@ -196,6 +209,67 @@ class TestInstance:
 
         assert doc_impl_cls.collection == db["doc"]
 
+    def test_collection_cache(self, db_and_instance):
+        db, instance = db_and_instance
+        instance = instance(db)
+
+        class Doc(Document):
+            pass
+
+        doc_impl_cls = instance.register(Doc)
+
+        collection = doc_impl_cls.collection
+        assert doc_impl_cls.collection is collection
+        assert doc_impl_cls().collection is collection
+
+        # Changing the database resets the collection
+        other_db = (
+            type(db)("other_db") if isinstance(db, MockedDB) else db.client["other_db"]
+        )
+        instance.set_db(other_db)
+        assert doc_impl_cls.collection is not collection
+        assert doc_impl_cls.collection == other_db["doc"]
+
+    def test_reference_cache(self):
+        instance = MockedInstance(MockedDB("my_db"), reference_cache_size=2)
+        assert MockedInstance(MockedDB("my_db")).reference_cache is None
+        cache = instance.reference_cache
+        now = 0
+        cache.timer = lambda: now
+
+        class Doc(Document):
+            pass
+
+        class OtherDoc(Document):
+            pass
+
+        Doc = instance.register(Doc)
+        OtherDoc = instance.register(OtherDoc)
+
+        cache.add(Doc, [1, 2])
+        cache.add(OtherDoc, [1])
+        assert cache.known(Doc, [1, 2, 3]) == {1, 2}
+        assert cache.exists(OtherDoc, 1)
+        assert not cache.exists(OtherDoc, 2)
+        # Least recently used pks are evicted first
+        assert cache.exists(Doc, 1)
+        cache.add(Doc, [3])
+        assert cache.known(Doc, [1, 2, 3]) == {1, 3}
+        # Pks expire after the ttl
+        now = 30
+        cache.add(Doc, [4])
+        now = 61
+        assert cache.known(Doc, [1, 3, 4]) == {4}
+        cache.discard(Doc, 4)
+        assert not cache.exists(Doc, 4)
+        cache.add(Doc, [5])
+        cache.clear(Doc)
+        assert not cache.exists(Doc, 5)
+        # The cache is reset with the database
+        cache.add(OtherDoc, [6])
+        instance.set_db(MockedDB("other_db"))
+        assert not cache.exists(OtherDoc, 6)
+
     def test_patched_fields(self, db):
         instance1 = Instance.from_db(db)
         instance2 = Instance.from_db(db)